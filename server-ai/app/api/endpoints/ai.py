@@ -1,7 +1,12 @@
 from fastapi import APIRouter, HTTPException, Body, UploadFile, File
-from app.services.ai_generator import ai_service
-from pydantic import BaseModel
-from typing import List
+from fastapi.responses import StreamingResponse
+from app.services.ai_generator import get_ai_service
+from app.services.thumbnails import InvalidThumbnailError, ThumbnailTooLargeError, prepare_thumbnail
+from pydantic import BaseModel, ValidationError
+from typing import Any, AsyncIterator, List, Tuple, Type
+import asyncio
+import json
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -13,6 +18,29 @@ class MetadataResponse(BaseModel):
     description: str
     hashtags: List[str]
 
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_generation(key: str, events: AsyncIterator[Tuple[str, Any]], model: Type[BaseModel]) -> AsyncIterator[str]:
+    """
+    Server-Sent Events for a streamed generation:
+    `delta` events carry raw model text as it is produced, then exactly one
+    `result` (JSON validated against `model`) or `error` event ends the stream.
+    """
+    async for event, data in events:
+        if event != "result":
+            yield sse_event(event, {"text": data} if event == "delta" else {"detail": data})
+            continue
+        try:
+            result = model.model_validate(data).model_dump()
+        except ValidationError as e:
+            yield sse_event("error", {"detail": f"Model returned invalid output: {e.errors()[0]['msg']}"})
+            return
+        await get_ai_service().cache_result(key, result)
+        yield sse_event("result", result)
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 @router.post("/generate-metadata", response_model=MetadataResponse)
 async def generate_metadata(request: MetadataRequest):
     """
@@ -21,13 +49,24 @@ async def generate_metadata(request: MetadataRequest):
     if len(request.description.split()) < 3:
         raise HTTPException(status_code=400, detail="Description is too short.")
         
-    result = await ai_service.generate_video_metadata(request.description)
+    result = await get_ai_service().generate_video_metadata(request.description)
     
     if "error" in result:
          raise HTTPException(status_code=500, detail=result["error"])
 
     return result
 
+@router.post("/generate-metadata/stream")
+async def generate_metadata_stream(request: MetadataRequest):
+    """
+    Streaming variant of /generate-metadata (text/event-stream).
+    """
+    if len(request.description.split()) < 3:
+        raise HTTPException(status_code=400, detail="Description is too short.")
+    
+    key, events = get_ai_service().stream_video_metadata(request.description)
+    return StreamingResponse(stream_generation(key, events, MetadataResponse), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @router.post("/analyze-thumbnail")
 async def analyze_thumbnail(file: UploadFile = File(...)):
     """
@@ -37,20 +76,60 @@ async def analyze_thumbnail(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="File must be an image")
     
     try:
-        contents = await file.read()
-        result = await ai_service.analyze_thumbnail(contents, file.content_type)
+        thumbnail = await prepare_thumbnail(file)
+        result = await get_ai_service().analyze_thumbnail(thumbnail.data, thumbnail.mime_type, thumbnail.sha256)
         
         if "error" in result:
              raise HTTPException(status_code=500, detail=result["error"])
              
         return result
+    except ThumbnailTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidThumbnailError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/analyze-thumbnails")
+async def analyze_thumbnails(files: List[UploadFile] = File(...)):
+    """
+    Upload several thumbnail variants (A/B test) and get them scored and
+    ranked in one request. Variants are analyzed concurrently.
+    """
+    if len(files) < 2:
+        raise HTTPException(status_code=400, detail="Upload at least two images to compare")
+    if len(files) > settings.THUMBNAIL_BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.THUMBNAIL_BATCH_MAX_FILES} images per comparison")
+    for file in files:
+        if not (file.content_type or "").startswith("image/"):
+            raise HTTPException(status_code=400, detail=f"{file.filename}: file must be an image")
+    
+    try:
+        thumbnails = await asyncio.gather(*[prepare_thumbnail(file) for file in files])
+    except ThumbnailTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidThumbnailError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    labels = [file.filename or f"image_{i + 1}" for i, file in enumerate(files)]
+    result = await get_ai_service().compare_thumbnails([
+        (label, thumbnail.data, thumbnail.mime_type, thumbnail.sha256)
+        for label, thumbnail in zip(labels, thumbnails)
+    ])
+    if not result["ranking"]:
+        raise HTTPException(status_code=500, detail=result["failed"][0]["error"])
+    return result
+
 class ScriptRequest(BaseModel):
     topic: str
     tone: str
 
+class ScriptResponse(BaseModel):
+    hook: str
+    intro: str
+    body: List[str]
+    cta: str
+
 @router.post("/generate-script")
 async def generate_script(request: ScriptRequest):
     """
@@ -59,9 +138,20 @@ async def generate_script(request: ScriptRequest):
     if len(request.topic.split()) < 3:
         raise HTTPException(status_code=400, detail="Topic is too short. Please be more descriptive.")
     
-    result = await ai_service.generate_script(request.topic, request.tone)
+    result = await get_ai_service().generate_script(request.topic, request.tone)
     
     if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
             
     return result
+
+@router.post("/generate-script/stream")
+async def generate_script_stream(request: ScriptRequest):
+    """
+    Streaming variant of /generate-script (text/event-stream).
+    """
+    if len(request.topic.split()) < 3:
+        raise HTTPException(status_code=400, detail="Topic is too short. Please be more descriptive.")
+    
+    key, events = get_ai_service().stream_script(request.topic, request.tone)
+    return StreamingResponse(stream_generation(key, events, ScriptResponse), media_type="text/event-stream", headers=SSE_HEADERS)
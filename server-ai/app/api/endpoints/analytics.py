@@ -1,9 +1,14 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Header, Query, Response
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+import asyncio
 import logging
 from app.services.processor import AnalyticsProcessor
-from app.core.db import supabase
+from app.core.config import settings
+from app.core.db import get_db
+from app.services.insight_reader import CACHE_CONTROL, etag_matches, insight_reader
+from app.services.metrics_store import metrics_store
+from app.services.jobs import Job, job_queue
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -11,38 +16,64 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+class BatchProcessRequest(BaseModel):
+    account_ids: Optional[List[str]] = None  # Defaults to every YouTube account
+
+class MetricsStoreMaintenanceRequest(BaseModel):
+    account_ids: Optional[List[str]] = None  # Defaults to every account in the store
+    repair: bool = True  # Rebuild accounts that differ from Supabase
+
 class ProcessRequest(BaseModel):
     account_id: str
     user_id: Optional[str] = None  # Can provide user_id as alternative
     # history/videos removed as we now fetch them internally
 
-async def run_processing(payload: ProcessRequest):
-    try:
-        logger.info(f"Starting analytics processing for account: {payload.account_id}")
-        processor = AnalyticsProcessor(payload.account_id)
-        
-        # 1. Fetch Data
-        history = processor.fetch_history()
-        videos = processor.fetch_video_stats()
-        
-        # 2. Process History
-        history_insights = processor.process_daily_metrics(history)
-        
-        # 3. Process Videos
-        video_insights = processor.process_video_stats(videos)
-        
-        # 4. Save Results
-        await processor.save_insights("weekly_trend", history_insights)
-        await processor.save_insights("engagement_summary", video_insights)
-        
-        logger.info(f"Successfully processed analytics for account: {payload.account_id}")
-    except Exception as e:
-        logger.error(f"Error processing analytics for {payload.account_id}: {str(e)}")
+async def run_processing(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: compute and save insights for one account."""
+    account_id = payload["account_id"]
+    logger.info(f"Starting analytics processing for account: {account_id}")
+    insights = await AnalyticsProcessor(account_id).run()
+    logger.info(f"Successfully processed analytics for account: {account_id}")
+    return {"account_id": account_id, "insight_types": list(insights.keys())}
+
+job_queue.register("analytics.process", run_processing)
+
+async def run_batch_processing(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: recompute insights for many accounts in bulk."""
+    account_ids = payload.get("account_ids")
+    if not account_ids:
+        db = await get_db()
+        resp = await db.table("connected_accounts").select("id").eq("platform", "youtube").execute()
+        account_ids = [row["id"] for row in resp.data or []]
+    logger.info(f"Starting batch analytics processing for {len(account_ids)} accounts")
+    results = await AnalyticsProcessor.run_batch(account_ids)
+    return {"accounts_processed": len(results)}
+
+job_queue.register("analytics.process_batch", run_batch_processing)
+
+async def run_metrics_store_maintenance(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: compact the local metrics store and check it against Supabase."""
+    account_ids = payload.get("account_ids") or await asyncio.to_thread(metrics_store.accounts)
+    reports = []
+    for account_id in account_ids:
+        compacted = await metrics_store.compact(account_id)
+        report = await metrics_store.verify(account_id, repair=payload.get("repair", True))
+        reports.append({**report, "compacted_rows": compacted})
+    statuses = [report["status"] for report in reports]
+    logger.info(f"Metrics store maintenance: {len(reports)} accounts, {statuses.count('consistent')} consistent")
+    return {"accounts": reports}
+
+job_queue.register("analytics.metrics_store_maintenance", run_metrics_store_maintenance)
+
+async def enqueue_processing(account_id: str) -> Job:
+    """Queue insight computation; concurrent requests for one account share a job."""
+    return await job_queue.enqueue("analytics.process", {"account_id": account_id}, key=f"analytics.process:{account_id}")
 
 @router.post("/process")
 async def process_analytics(request: ProcessRequest):
     """
-    Endpoint to trigger data processing synchronously.
+    Queue data processing and return the job id immediately.
+    Poll /api/v1/jobs/{job_id} for the result.
     Can provide either account_id directly OR user_id to lookup the YouTube account.
     """
     try:
@@ -51,14 +82,15 @@ async def process_analytics(request: ProcessRequest):
         # If user_id provided but no account_id, look it up
         if not account_id and request.user_id:
             logger.info(f"Looking up YouTube account for user: {request.user_id}")
-            account_resp = supabase.table("connected_accounts") \
+            db = await get_db()
+            account_resp = await db.table("connected_accounts") \
                 .select("id") \
                 .eq("user_id", request.user_id) \
                 .eq("platform", "youtube") \
-                .maybeSingle() \
+                .maybe_single() \
                 .execute()
             
-            if not account_resp.data:
+            if not account_resp or not account_resp.data:
                 raise HTTPException(status_code=404, detail="No YouTube account found for user")
             account_id = account_resp.data["id"]
         
@@ -66,10 +98,11 @@ async def process_analytics(request: ProcessRequest):
             raise HTTPException(status_code=400, detail="Must provide account_id or user_id")
         
         logger.info(f"Received processing request for account: {account_id}")
-        await run_processing(ProcessRequest(account_id=account_id))
+        job = await enqueue_processing(account_id)
         return {
-            "message": "Analytics processing completed successfully", 
-            "status": "completed",
+            "message": "Analytics processing queued",
+            "status": job.status,
+            "job_id": job.id,
             "account_id": account_id
         }
     except HTTPException:
@@ -77,3 +110,66 @@ async def process_analytics(request: ProcessRequest):
     except Exception as e:
         logger.error(f"Failed to process analytics: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/process-batch")
+async def process_analytics_batch(request: BatchProcessRequest):
+    """
+    Queue insight recomputation for many accounts at once (all YouTube
+    accounts when account_ids is omitted). Poll /api/v1/jobs/{job_id}.
+    """
+    job = await job_queue.enqueue(
+        "analytics.process_batch",
+        {"account_ids": request.account_ids},
+        key=None if request.account_ids else "analytics.process_batch:all"
+    )
+    return {
+        "message": "Batch analytics processing queued",
+        "status": job.status,
+        "job_id": job.id
+    }
+
+@router.get("/insights/{account_id}")
+async def get_insights(account_id: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Latest insight of each type for an account. Send the returned ETag as
+    If-None-Match when polling: an unchanged result is answered with 304.
+    """
+    try:
+        etag, body = await insight_reader.get(account_id)
+    except Exception as e:
+        logger.error(f"Failed to read insights: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/long-range/{account_id}")
+async def long_range_trend(account_id: str, years: int = Query(1, ge=1, le=settings.LONG_RANGE_MAX_YEARS)):
+    """
+    Monthly/yearly totals and trend over the last `years` years of daily
+    metrics, read from the local columnar store when METRICS_STORE_PATH is set.
+    """
+    try:
+        return await AnalyticsProcessor(account_id).long_range(years)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/metrics-store/maintenance")
+async def metrics_store_maintenance(request: MetricsStoreMaintenanceRequest):
+    """
+    Queue compaction and a consistency check of the local metrics store
+    against Supabase. Poll /api/v1/jobs/{job_id} for the per-account report.
+    """
+    if metrics_store is None:
+        raise HTTPException(status_code=409, detail="Local metrics store is disabled (set METRICS_STORE_PATH)")
+    job = await job_queue.enqueue(
+        "analytics.metrics_store_maintenance",
+        {"account_ids": request.account_ids, "repair": request.repair},
+        key=None if request.account_ids else "analytics.metrics_store_maintenance:all"
+    )
+    return {
+        "message": "Metrics store maintenance queued",
+        "status": job.status,
+        "job_id": job.id
+    }
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, HTTPException
+from app.services.jobs import job_queue
+
+router = APIRouter()
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """
+    Return status (queued, running, completed, failed) and result of a background job.
+    """
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
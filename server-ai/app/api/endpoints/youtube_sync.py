@@ -2,17 +2,28 @@
 YouTube Sync Service
 Handles YouTube OAuth token refresh and data synchronization
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Tuple
 import httpx
-import json
+import asyncio
 import os
 from datetime import datetime, timedelta
 import logging
-from app.core.db import supabase
+from app.core.db import get_db
 from app.core.config import settings
-from app.services.processor import AnalyticsProcessor
+from app.core.http import get_google_client
+from app.core.metrics import db_rows_written, stage_timer
+from app.services.jobs import job_queue
+from app.api.endpoints.analytics import enqueue_processing
+from app.services.insight_cache import insight_cache
+from app.services.metrics_store import metrics_store
+from app.services.rolling_metrics import rolling_metrics
+from app.services.token_cache import parse_timestamp, token_cache, utcnow
+from app.services.youtube_quota import (
+    BACKFILL, INTERACTIVE, QuotaBudgetExceeded, YouTubeAPIError,
+    youtube_call_context, youtube_error_reason, youtube_scheduler
+)
 
 # Configure logging
 logging.basicConfig(
@@ -36,6 +47,10 @@ class YouTubeSyncRequest(BaseModel):
     user_id: str
     access_token: Optional[str] = None
     refresh_token: Optional[str] = None
+    full_resync: bool = False  # Ignore stored watermarks and re-fetch everything
+    # Backfill budgets; default to YOUTUBE_MAX_VIDEOS / YOUTUBE_MAX_COMMENTS_PER_VIDEO
+    max_videos: Optional[int] = Field(None, ge=1, le=5000)
+    max_comments_per_video: Optional[int] = Field(None, ge=1, le=10000)
 
 class YouTubeSyncResponse(BaseModel):
     success: bool
@@ -44,216 +59,585 @@ class YouTubeSyncResponse(BaseModel):
     videos_processed: int = 0
     comments_synced: int = 0
     comments_debug: Optional[List[str]] = None
+    insights_job_id: Optional[str] = None
+
+class YouTubeSyncJobResponse(BaseModel):
+    job_id: str
+    status: str
 
-async def fetch_token_info(access_token: str) -> Optional[dict]:
+async def fetch_token_info(access_token: str, client: Optional[httpx.AsyncClient] = None) -> Optional[dict]:
     """Fetch token info to inspect granted scopes."""
+    client = client or get_google_client()
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://oauth2.googleapis.com/tokeninfo",
-                params={"access_token": access_token},
-                timeout=10.0
-            )
-            if response.status_code != 200:
-                logger.warning(f"Tokeninfo failed: {response.status_code}")
-                return None
-            return response.json()
+        response = await youtube_scheduler.request(
+            client, "GET", "https://oauth2.googleapis.com/tokeninfo", endpoint="tokeninfo",
+            params={"access_token": access_token}
+        )
+        if response.status_code != 200:
+            logger.warning(f"Tokeninfo failed: {response.status_code}")
+            return None
+        return response.json()
     except Exception as e:
         logger.warning(f"Tokeninfo error: {str(e)}")
         return None
 
-async def refresh_youtube_token(client_id: str, client_secret: str, refresh_token: str):
+async def refresh_youtube_token(client_id: str, client_secret: str, refresh_token: str, client: Optional[httpx.AsyncClient] = None):
     """Refresh expired YouTube access token"""
+    client = client or get_google_client()
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://oauth2.googleapis.com/token",
-                data={
-                    "client_id": client_id,
-                    "client_secret": client_secret,
-                    "refresh_token": refresh_token,
-                    "grant_type": "refresh_token"
-                }
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data.get("access_token"), data.get("expires_in", 3600)
+        response = await youtube_scheduler.request(
+            client, "POST", "https://oauth2.googleapis.com/token", endpoint="token",
+            data={
+                "client_id": client_id,
+                "client_secret": client_secret,
+                "refresh_token": refresh_token,
+                "grant_type": "refresh_token"
+            }
+        )
+        response.raise_for_status()
+        data = response.json()
+        return data.get("access_token"), data.get("expires_in", 3600)
     except Exception as e:
         logger.error(f"Token refresh failed: {str(e)}")
         raise
 
-async def fetch_youtube_channel(access_token: str):
+async def fetch_youtube_channel(access_token: str, client: Optional[httpx.AsyncClient] = None):
     """Fetch current YouTube channel info"""
+    client = client or get_google_client()
     headers = {"Authorization": f"Bearer {access_token}"}
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            "https://www.googleapis.com/youtube/v3/channels",
-            params={
-                "part": "snippet,statistics,contentDetails",
-                "mine": "true"
-            },
-            headers=headers
-        )
-        response.raise_for_status()
-        data = response.json()
-        return data["items"][0] if data.get("items") else None
+    response = await youtube_scheduler.request(
+        client, "GET", "https://www.googleapis.com/youtube/v3/channels", endpoint="channels",
+        params={
+            "part": "snippet,statistics,contentDetails",
+            "mine": "true"
+        },
+        headers=headers
+    )
+    response.raise_for_status()
+    data = response.json()
+    return data["items"][0] if data.get("items") else None
 
-async def fetch_youtube_analytics(access_token: str, start_date: str, end_date: str):
+async def fetch_youtube_analytics(access_token: str, start_date: str, end_date: str, client: Optional[httpx.AsyncClient] = None):
     """Fetch YouTube Analytics data"""
+    client = client or get_google_client()
+    headers = {"Authorization": f"Bearer {access_token}"}
+    response = await youtube_scheduler.request(
+        client, "GET", "https://youtubeanalytics.googleapis.com/v2/reports", endpoint="reports",
+        params={
+            "ids": "channel==MINE",
+            "startDate": start_date,
+            "endDate": end_date,
+            "metrics": "views,estimatedMinutesWatched,subscribersGained",
+            "dimensions": "day",
+            "sort": "day"
+        },
+        headers=headers
+    )
+    
+    if response.status_code != 200:
+        logger.warning(f"Analytics API failed: {response.status_code}")
+        return None
+    
+    return response.json()
+
+# Maximum ids per videos.list call and items per playlistItems/commentThreads page
+YOUTUBE_PAGE_SIZE = 50
+YOUTUBE_COMMENTS_PAGE_SIZE = 100
+
+async def fetch_upload_video_ids(access_token: str, uploads_playlist_id: str, etag: Optional[str] = None, client: Optional[httpx.AsyncClient] = None, page_token: Optional[str] = None, max_results: int = 10):
+    """
+    Fetch one page of video ids from the uploads playlist.
+    Sends If-None-Match when an ETag is known. Returns (video_ids, etag, next_page_token);
+    video_ids is None when the page is unchanged (304).
+    """
+    client = client or get_google_client()
     headers = {"Authorization": f"Bearer {access_token}"}
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            "https://youtubeanalytics.googleapis.com/v2/reports",
+    if etag:
+        headers["If-None-Match"] = etag
+    
+    params = {
+        "part": "snippet,contentDetails",
+        "playlistId": uploads_playlist_id,
+        "maxResults": min(max_results, YOUTUBE_PAGE_SIZE)
+    }
+    if page_token:
+        params["pageToken"] = page_token
+    response = await youtube_scheduler.request(
+        client, "GET", "https://www.googleapis.com/youtube/v3/playlistItems", endpoint="playlistItems",
+        params=params,
+        headers=headers
+    )
+    if response.status_code == 304:
+        return None, etag, None
+    response.raise_for_status()
+    
+    playlist_data = response.json()
+    video_ids = [item["contentDetails"]["videoId"] for item in playlist_data.get("items", [])]
+    return video_ids, playlist_data.get("etag"), playlist_data.get("nextPageToken")
+
+async def iter_upload_video_ids(access_token: str, uploads_playlist_id: str, max_items: int, client: Optional[httpx.AsyncClient] = None, etag: Optional[str] = None):
+    """
+    Stream the uploads playlist page by page, following nextPageToken until
+    `max_items` ids have been yielded. Yields (video_ids, etag) per page.
+    If the first page matches `etag`, yields (None, etag) once and stops.
+    """
+    page_token = None
+    remaining = max_items
+    while remaining > 0:
+        video_ids, page_etag, page_token = await fetch_upload_video_ids(
+            access_token, uploads_playlist_id, etag=etag, client=client,
+            page_token=page_token, max_results=remaining
+        )
+        if video_ids is None:
+            yield None, page_etag
+            return
+        video_ids = video_ids[:remaining]
+        remaining -= len(video_ids)
+        if video_ids:
+            yield video_ids, page_etag
+        if not page_token or not video_ids:
+            return
+        etag = None  # ETag only applies to the first page
+
+async def fetch_videos_by_id(access_token: str, video_ids: List[str], client: Optional[httpx.AsyncClient] = None):
+    """Fetch snippet and statistics for the given video ids (50 ids per videos.list call)"""
+    if not video_ids:
+        return []
+    client = client or get_google_client()
+    headers = {"Authorization": f"Bearer {access_token}"}
+    videos = []
+    for batch in chunked(video_ids, YOUTUBE_PAGE_SIZE):
+        response = await youtube_scheduler.request(
+            client, "GET", "https://www.googleapis.com/youtube/v3/videos", endpoint="videos",
             params={
-                "ids": "channel==MINE",
-                "startDate": start_date,
-                "endDate": end_date,
-                "metrics": "views,estimatedMinutesWatched,subscribersGained",
-                "dimensions": "day",
-                "sort": "day"
+                "part": "statistics,snippet",
+                "id": ",".join(batch)
             },
             headers=headers
         )
-        
-        if response.status_code != 200:
-            logger.warning(f"Analytics API failed: {response.status_code}")
-            return None
-        
-        return response.json()
+        response.raise_for_status()
+        videos.extend(response.json().get("items", []))
+    return videos
+
+async def iter_latest_videos(access_token: str, uploads_playlist_id: str, max_items: int, client: Optional[httpx.AsyncClient] = None):
+    """Stream videos (with statistics) from the uploads playlist, one page at a time."""
+    async for video_ids, _ in iter_upload_video_ids(access_token, uploads_playlist_id, max_items, client):
+        yield await fetch_videos_by_id(access_token, video_ids, client)
 
-async def fetch_latest_videos(access_token: str, uploads_playlist_id: str):
+async def fetch_latest_videos(access_token: str, uploads_playlist_id: str, client: Optional[httpx.AsyncClient] = None, max_items: int = 10):
     """Fetch latest videos from channel"""
+    videos = []
+    async for page in iter_latest_videos(access_token, uploads_playlist_id, max_items, client):
+        videos.extend(page)
+    return videos
+
+def parse_comment_thread(thread: dict) -> dict:
+    """Flatten a commentThreads item into a video_comments row."""
+    top_comment = thread["snippet"]["topLevelComment"]
+    snippet = top_comment["snippet"]
+    return {
+        "id": top_comment["id"],
+        "author_name": snippet["authorDisplayName"],
+        "author_avatar": snippet["authorProfileImageUrl"],
+        "text_display": snippet["textDisplay"],
+        "like_count": snippet["likeCount"],
+        "published_at": snippet["publishedAt"]
+    }
+
+async def iter_video_comments(access_token: str, video_id: str, max_items: int, client: Optional[httpx.AsyncClient] = None, since: Optional[str] = None, page_token: Optional[str] = None):
+    """
+    Stream comment threads for a video, newest first, one page at a time.
+    Follows nextPageToken until `max_items` comments have been read or a
+    comment at or before `since` (a published_at watermark) is reached.
+    Yields (comments, next_page_token); next_page_token is None once the
+    listing is complete, so a non-None token after the last page means the
+    budget ran out and paging can resume from it.
+    Raises YouTubeAPIError on a non-200 response.
+    """
+    client = client or get_google_client()
     headers = {"Authorization": f"Bearer {access_token}"}
-    
-    async with httpx.AsyncClient() as client:
-        # Get playlist items
-        response = await client.get(
-            "https://www.googleapis.com/youtube/v3/playlistItems",
-            params={
-                "part": "snippet,contentDetails",
-                "playlistId": uploads_playlist_id,
-                "maxResults": 10
-            },
+    remaining = max_items
+    while remaining > 0:
+        params = {
+            "part": "snippet",
+            "videoId": video_id,
+            "maxResults": min(remaining, YOUTUBE_COMMENTS_PAGE_SIZE),
+            "order": "time",
+            "textFormat": "plainText"
+        }
+        if page_token:
+            params["pageToken"] = page_token
+        response = await youtube_scheduler.request(
+            client, "GET", "https://www.googleapis.com/youtube/v3/commentThreads", endpoint="commentThreads",
+            params=params,
             headers=headers
         )
-        response.raise_for_status()
         
-        playlist_data = response.json()
-        video_ids = [item["contentDetails"]["videoId"] for item in playlist_data.get("items", [])]
+        logger.info(f"📊 YouTube API Response Status: {response.status_code} for video {video_id}")
         
-        if not video_ids:
-            return []
+        if response.status_code != 200:
+            logger.warning(f"⚠️ Comments API failed for video {video_id}: {response.status_code}")
+            logger.warning(f"Response body: {response.text[:800]}")
+            raise YouTubeAPIError(response.status_code, youtube_error_reason(response))
         
-        # Get video statistics
-        response = await client.get(
-            "https://www.googleapis.com/youtube/v3/videos",
-            params={
-                "part": "statistics,snippet",
-                "id": ",".join(video_ids)
-            },
-            headers=headers
-        )
-        response.raise_for_status()
-        return response.json().get("items", [])
+        data = response.json()
+        items = data.get("items", [])
+        comments = []
+        reached_watermark = False
+        for idx, thread in enumerate(items):
+            try:
+                comment = parse_comment_thread(thread)
+            except (KeyError, TypeError) as e:
+                logger.warning(f"❌ Failed to parse comment {idx}: {str(e)}")
+                continue
+            if since and comment["published_at"] <= since:
+                reached_watermark = True
+                break
+            comments.append(comment)
+        
+        # maxResults never exceeds the remaining budget, so pages are never truncated
+        remaining -= len(items)
+        page_token = None if reached_watermark or not items else data.get("nextPageToken")
+        yield comments, page_token
+        if not page_token:
+            return
+
+def comment_fetch_error(e: Exception) -> str:
+    """Format a comment fetch failure for comments_debug."""
+    if isinstance(e, YouTubeAPIError):
+        if e.reason:
+            return f"api_error={e.status_code};reason={e.reason}"
+        return f"api_error={e.status_code}"
+    return f"exception={type(e).__name__}"
 
-async def fetch_video_comments(access_token: str, video_id: str):
-    """Fetch comments for a specific video"""
+async def fetch_video_comments(access_token: str, video_id: str, client: Optional[httpx.AsyncClient] = None, since: Optional[str] = None, max_items: int = 100):
+    """
+    Fetch comments for a specific video.
+    When `since` (a published_at watermark) is given, only newer comments are returned.
+    """
+    comments = {}
     try:
         logger.debug(f"🔍 Starting comment fetch for video_id: {video_id}")
-        logger.debug(f"🔐 Token preview: {access_token[:20]}...{access_token[-20:]}")
+        async for page, _ in iter_video_comments(access_token, video_id, max_items, client, since=since):
+            for comment in page:
+                comments.setdefault(comment["id"], comment)
         
-        headers = {"Authorization": f"Bearer {access_token}"}
-        async with httpx.AsyncClient() as client:
-            logger.debug(f"📡 Making API call to YouTube commentThreads endpoint...")
-            response = await client.get(
-                "https://www.googleapis.com/youtube/v3/commentThreads",
-                params={
-                    "part": "snippet",
-                    "videoId": video_id,
-                    "maxResults": 100,
-                    "order": "time",
-                    "textFormat": "plainText"
-                },
-                headers=headers,
-                timeout=10.0
-            )
-            
-            logger.info(f"📊 YouTube API Response Status: {response.status_code} for video {video_id}")
-            
-            if response.status_code != 200:
-                logger.warning(f"⚠️ Comments API failed for video {video_id}: {response.status_code}")
-                response_text = response.text[:800]
-                logger.warning(f"Response body: {response_text}")
-                
-                # Log the actual JSON error if available
-                try:
-                    error_json = response.json()
-                    logger.warning(f"API Error JSON: {json.dumps(error_json, indent=2)}")
-                except:
-                    pass
-                
-                try:
-                    error_json = response.json()
-                    reason = error_json.get("error", {}).get("errors", [{}])[0].get("reason")
-                    return [], f"api_error={response.status_code};reason={reason or 'unknown'}"
-                except Exception:
-                    return [], f"api_error={response.status_code}"
-            
-            data = response.json()
-            items_count = len(data.get('items', []))
-            logger.info(f"✅ API Response received: {items_count} comment threads for video {video_id}")
-            
-            # Log the full response for debugging
-            if items_count == 0:
-                logger.warning(f"⚠️ YouTube returned 0 comments for video {video_id}")
-                logger.debug(f"Full API response: {json.dumps(data, indent=2)[:500]}")
-            
-            comments = []
-            
-            for idx, thread in enumerate(data.get("items", [])):
-                try:
-                    top_comment = thread["snippet"]["topLevelComment"]
-                    snippet = top_comment["snippet"]
-                    comment_obj = {
-                        "id": top_comment["id"],
-                        "author_name": snippet["authorDisplayName"],
-                        "author_avatar": snippet["authorProfileImageUrl"],
-                        "text_display": snippet["textDisplay"],
-                        "like_count": snippet["likeCount"],
-                        "published_at": snippet["publishedAt"]
-                    }
-                    comments.append(comment_obj)
-                    logger.debug(f"  ✓ Parsed comment {idx + 1}: {snippet['authorDisplayName']}")
-                except (KeyError, TypeError) as e:
-                    logger.warning(f"❌ Failed to parse comment {idx}: {str(e)}")
-                    continue
-            
-            logger.info(f"✅ Fetched {len(comments)} comments for video {video_id}")
-            
-            return comments, f"api_ok={items_count}"
+        if not comments and not since:
+            logger.warning(f"⚠️ YouTube returned 0 comments for video {video_id}")
+        logger.info(f"✅ Fetched {len(comments)} comments for video {video_id}")
+        return list(comments.values()), f"api_ok={len(comments)}"
     except Exception as e:
-        logger.error(f"❌ Exception in fetch_video_comments for video {video_id}: {str(e)}", exc_info=True)
-        return [], f"exception={type(e).__name__}"
+        if not isinstance(e, YouTubeAPIError):
+            logger.error(f"❌ Exception in fetch_video_comments for video {video_id}: {str(e)}", exc_info=True)
+        return [], comment_fetch_error(e)
 
-@router.post("/sync", response_model=YouTubeSyncResponse)
-async def sync_youtube(request: YouTubeSyncRequest, background_tasks: BackgroundTasks):
+def chunked(rows: List[dict], size: int):
+    """Yield successive slices of at most `size` rows."""
+    size = max(1, size)
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+async def bulk_write(table: str, rows: List[dict], on_conflict: Optional[str] = None) -> List[dict]:
+    """
+    Insert (or upsert when on_conflict is given) rows in batches of
+    SUPABASE_MAX_BATCH_SIZE. Returns the rows echoed back by PostgREST.
+    """
+    db = await get_db()
+    written: List[dict] = []
+    for batch in chunked(rows, settings.SUPABASE_MAX_BATCH_SIZE):
+        if on_conflict:
+            query = db.table(table).upsert(batch, on_conflict=on_conflict)
+        else:
+            query = db.table(table).insert(batch)
+        result = await query.execute()
+        db_rows_written.inc(len(batch), table=table)
+        written.extend(result.data or [])
+    return written
+
+async def upsert_content_items(account_id: str, videos: List[dict]) -> dict:
+    """Upsert all videos in bulk. Returns content item ids keyed by external_id."""
+    if not videos:
+        return {}
+    rows = [
+        {
+            "account_id": account_id,
+            "external_id": video["id"],
+            "title": video["snippet"]["title"],
+            "thumbnail_url": (video["snippet"]["thumbnails"].get("high") or video["snippet"]["thumbnails"]["default"])["url"],
+            "published_at": video["snippet"]["publishedAt"],
+            "type": "video",
+            "url": f"https://youtube.com/watch?v={video['id']}"
+        }
+        for video in videos
+    ]
+    written = await bulk_write("content_items", rows, on_conflict="account_id,external_id")
+    return {item["external_id"]: item["id"] for item in written}
+
+async def insert_content_snapshots(videos: List[dict], content_ids: dict) -> int:
+    """Record one snapshot per synced video in bulk."""
+    recorded_at = datetime.utcnow().isoformat()
+    rows = [
+        {
+            "content_id": content_ids[video["id"]],
+            "views": int(video["statistics"].get("viewCount", 0)),
+            "likes": int(video["statistics"].get("likeCount", 0)),
+            "comments": int(video["statistics"].get("commentCount", 0)),
+            "recorded_at": recorded_at
+        }
+        for video in videos
+        if video["id"] in content_ids
+    ]
+    if rows:
+        await bulk_write("content_snapshots", rows)
+    return len(rows)
+
+async def load_watermarks(account_id: str) -> dict:
+    """Load the incremental sync state for an account (empty dict if none)."""
+    db = await get_db()
+    resp = await db.table("sync_watermarks").select("*").eq("account_id", account_id).maybe_single().execute()
+    return dict(resp.data) if resp and resp.data else {}
+
+async def save_watermarks(account_id: str, watermarks: dict):
+    """Persist the incremental sync state for an account."""
+    db = await get_db()
+    await db.table("sync_watermarks").upsert({
+        "account_id": account_id,
+        "analytics_synced_through": watermarks.get("analytics_synced_through"),
+        "uploads_etag": watermarks.get("uploads_etag"),
+        "uploads_video_ids": watermarks.get("uploads_video_ids") or [],
+        "content_ids": watermarks.get("content_ids") or {},
+        "comment_watermarks": watermarks.get("comment_watermarks") or {},
+        "updated_at": datetime.utcnow().isoformat()
+    }, on_conflict="account_id").execute()
+
+class CommentWriter:
+    """
+    Upserts comment rows collected from every video of a sync_videos call in
+    shared SUPABASE_MAX_BATCH_SIZE chunks, so DB round trips scale with the
+    number of comments rather than videos x pages. Chunks are written one at
+    a time in the background while the fetchers keep going; at most
+    `max_pending` full chunks wait, which bounds memory. Per-video saved
+    counts and the first write error are tracked for the watermarks.
+    """
+    def __init__(self, batch_size: int, max_pending: int = 2):
+        self.batch_size = max(1, batch_size)
+        self.max_pending = max(1, max_pending)
+        self.saved: Dict[str, int] = {}
+        self.errors: Dict[str, str] = {}
+        self._buffer: List[Tuple[str, dict]] = []
+        self._writes: List[asyncio.Task] = []
+        self._lock = asyncio.Lock()
+
+    async def add(self, video_id: str, rows: List[dict]):
+        self._buffer.extend((video_id, row) for row in rows)
+        while len(self._buffer) >= self.batch_size:
+            self._schedule(self._buffer[:self.batch_size])
+            self._buffer = self._buffer[self.batch_size:]
+        pending = [task for task in self._writes if not task.done()]
+        if len(pending) > self.max_pending:
+            await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+    async def close(self):
+        """Write the remaining rows and wait for every chunk."""
+        if self._buffer:
+            self._schedule(self._buffer)
+            self._buffer = []
+        await asyncio.gather(*self._writes)
+
+    def _schedule(self, chunk: List[Tuple[str, dict]]):
+        self._writes.append(asyncio.ensure_future(self._write(chunk)))
+
+    async def _write(self, chunk: List[Tuple[str, dict]]):
+        async with self._lock:
+            try:
+                await bulk_write("video_comments", [row for _, row in chunk], on_conflict="id")
+            except Exception as e:
+                logger.error(f"❌ Failed to save {len(chunk)} comments: {str(e)}", exc_info=True)
+                for video_id, _ in chunk:
+                    self.errors.setdefault(video_id, type(e).__name__)
+                return
+            for video_id, _ in chunk:
+                self.saved[video_id] = self.saved.get(video_id, 0) + 1
+
+async def sync_video_comments(video: dict, content_id: str, access_token: str, semaphore: asyncio.Semaphore, writer: CommentWriter, client: Optional[httpx.AsyncClient] = None, since: Optional[str] = None, max_items: int = 100, page_token: Optional[str] = None) -> dict:
+    """
+    Stream comments for one video into the shared CommentWriter. Rows are
+    de-duplicated by comment id: a thread can reappear on the next order=time
+    page when new comments are posted while paging, and Postgres rejects an
+    upsert batch that touches the same row twice. Paging starts at
+    `page_token` when resuming an unfinished pass and stops early once a
+    chunk holding this video's rows failed to save. The semaphore bounds how
+    many videos are fetched at once.
+    Returns fetch_debug, fetched, newest (published_at) and next_page_token
+    (set when the budget ran out before the listing ended); saved and
+    save_error are filled in from the writer once it is closed.
+    """
+    result = {"fetch_debug": None, "fetched": 0, "saved": 0, "save_error": None, "newest": None, "next_page_token": None}
+    seen = set()
+    async with semaphore:
+        logger.info(f"📝 Fetching comments for video {video['id']}...")
+        try:
+            async for comments, next_page_token in iter_video_comments(access_token, video["id"], max_items, client, since=since, page_token=page_token):
+                result["next_page_token"] = next_page_token
+                page = []
+                for comment in comments:
+                    if comment["id"] not in seen:
+                        seen.add(comment["id"])
+                        page.append(comment)
+                if not page:
+                    continue
+                result["fetched"] += len(page)
+                result["newest"] = max([result["newest"] or ""] + [comment["published_at"] for comment in page])
+                
+                updated_at = datetime.utcnow().isoformat()
+                await writer.add(video["id"], [{**comment, "video_id": content_id, "updated_at": updated_at} for comment in page])
+                if video["id"] in writer.errors:
+                    break
+            result["fetch_debug"] = f"api_ok={result['fetched']}"
+        except Exception as e:
+            if not isinstance(e, YouTubeAPIError):
+                logger.error(f"❌ Exception while syncing comments for video {video['id']}: {str(e)}", exc_info=True)
+            result["fetch_debug"] = comment_fetch_error(e)
+    return result
+
+def next_comment_watermark(previous_mark: dict, result: dict) -> dict:
+    """
+    Compute a video's comment watermark after a sync_video_comments pass.
+    `published_at` only moves once a pass has read everything down to the old
+    watermark; until then `resume_page_token` and `pending_newest` carry the
+    unfinished pass over to the next sync, so no comments are skipped.
+    """
+    if not result["fetch_debug"].startswith("api_ok") or result["save_error"]:
+        if previous_mark.get("resume_page_token") and not result["save_error"]:
+            # The stored page token may have expired; restart from the top next time
+            return {"published_at": previous_mark.get("published_at")}
+        return previous_mark
+    
+    newest = max(result["newest"] or "", previous_mark.get("pending_newest") or "", previous_mark.get("published_at") or "")
+    if result["next_page_token"]:
+        return {
+            "published_at": previous_mark.get("published_at"),
+            "pending_newest": newest or None,
+            "resume_page_token": result["next_page_token"]
+        }
+    return {"published_at": newest or None}
+
+async def sync_videos(videos: List[dict], account_id: str, access_token: str, client: Optional[httpx.AsyncClient] = None, watermarks: Optional[dict] = None, max_comments: Optional[int] = None):
+    """
+    Sync videos in stages: bulk upsert content items, bulk insert snapshots,
+    then stream comments for all videos concurrently, upserting them in
+    chunks shared across videos.
+    
+    With watermarks, only videos without a known content id are upserted and
+    only comments newer than each video's published_at watermark are read.
+    The watermark advances only once a pass reaches it (or the last page);
+    when the comment budget runs out first, the page token is kept and the
+    next sync resumes from there. The watermarks dict is updated in place,
+    so it can be called once per page of a large channel.
+    Returns (comments_synced, debug_lines) with debug lines in playlist order.
+    """
+    watermarks = watermarks if watermarks is not None else {}
+    known_ids = watermarks.setdefault("content_ids", {})
+    comment_marks = watermarks.setdefault("comment_watermarks", {})
+    max_comments = max_comments or settings.YOUTUBE_MAX_COMMENTS_PER_VIDEO
+    
+    debug: List[str] = []
+    with stage_timer("video_upsert"):
+        content_ids = {video["id"]: known_ids[video["id"]] for video in videos if video["id"] in known_ids}
+        content_ids.update(await upsert_content_items(account_id, [video for video in videos if video["id"] not in known_ids]))
+        try:
+            await insert_content_snapshots(videos, content_ids)
+        except Exception as e:
+            # A cached content id may point at a deleted row; re-upsert to get fresh ids
+            logger.warning(f"Snapshot insert failed ({str(e)}), re-upserting content items")
+            content_ids = await upsert_content_items(account_id, videos)
+            await insert_content_snapshots(videos, content_ids)
+    
+    synced = [video for video in videos if video["id"] in content_ids]
+    for video in videos:
+        if video["id"] not in content_ids:
+            logger.warning(f"⚠️ content_items upsert returned no data for video {video['id']}")
+    
+    # Stream comments concurrently; gather() keeps results in playlist order
+    concurrency = max(1, settings.YOUTUBE_SYNC_CONCURRENCY)
+    semaphore = asyncio.Semaphore(concurrency)
+    logger.info(f"Fetching comments for {len(synced)} videos with concurrency={concurrency}")
+    # Only the YouTube fetches run in parallel; writes are coalesced across videos
+    writer = CommentWriter(settings.SUPABASE_MAX_BATCH_SIZE)
+    with stage_timer("comment_sync"):
+        results = await asyncio.gather(*[
+            sync_video_comments(
+                video, content_ids[video["id"]], access_token, semaphore, writer, client,
+                since=(comment_marks.get(video["id"]) or {}).get("published_at"),
+                max_items=max_comments,
+                page_token=(comment_marks.get(video["id"]) or {}).get("resume_page_token")
+            )
+            for video in synced
+        ])
+        await writer.close()
+    results_by_video = {video["id"]: result for video, result in zip(synced, results)}
+    for video_id, result in results_by_video.items():
+        result["saved"] = writer.saved.get(video_id, 0)
+        result["save_error"] = writer.errors.get(video_id)
+        logger.info(f"💾 Saved {result['saved']}/{result['fetched']} comments for video {video_id}")
+    
+    comments_synced = 0
+    new_marks = {}
+    for video in videos:
+        if video["id"] not in content_ids:
+            debug.append(f"{video['id']}: content_item_upsert_no_data")
+            continue
+        video_comment_count = int(video["statistics"].get("commentCount", 0))
+        previous_mark = comment_marks.get(video["id"]) or {}
+        debug.append(f"{video['id']}: commentCount={video_comment_count}")
+        result = results_by_video[video["id"]]
+        debug.append(f"{video['id']}: {result['fetch_debug']}")
+        comments_synced += result["saved"]
+        if result["save_error"]:
+            debug.append(f"{video['id']}: exception={result['save_error']}")
+        elif result["fetched"]:
+            debug.append(f"{video['id']}: fetched={result['fetched']} saved={result['saved']}")
+        elif video_comment_count > 0 and not previous_mark:
+            debug.append(f"{video['id']}: warning=commentCount>0 but fetched=0")
+        
+        new_marks[video["id"]] = next_comment_watermark(previous_mark, result)
+        if new_marks[video["id"]].get("resume_page_token"):
+            debug.append(f"{video['id']}: resume_pending")
+    
+    known_ids.update(content_ids)
+    comment_marks.update({video_id: mark for video_id, mark in new_marks.items() if mark})
+    return comments_synced, debug
+
+async def run_youtube_sync(request: YouTubeSyncRequest, priority: str = INTERACTIVE) -> YouTubeSyncResponse:
+    """
+    Run a sync with its Google API calls attributed to the user's quota
+    budget at the given scheduler priority (interactive or backfill).
+    """
+    with youtube_call_context(request.user_id, priority), stage_timer("youtube_sync"):
+        return await _run_youtube_sync(request)
+
+async def _run_youtube_sync(request: YouTubeSyncRequest) -> YouTubeSyncResponse:
     """
     Sync YouTube data for a user
     - Refreshes expired tokens
     - Fetches channel statistics
     - Syncs videos and comments
     - Stores data in Supabase
+    - Queues insight computation as a background job
     """
     try:
         user_id = request.user_id
         logger.info(f"Processing YouTube sync for user: {user_id}")
+        client = get_google_client()
         
         if not user_id:
             raise HTTPException(status_code=400, detail="Missing user_id")
         
+        db = await get_db()
+        
         # Fetch existing account from database
-        account_resp = supabase.table("connected_accounts").select("*").eq("user_id", user_id).eq("platform", "youtube").maybeSingle().execute()
-        account = account_resp.data if account_resp.data else None
+        account_resp = await db.table("connected_accounts").select("*").eq("user_id", user_id).eq("platform", "youtube").maybe_single().execute()
+        account = account_resp.data if account_resp and account_resp.data else None
         
         access_token = request.access_token or (account.get("access_token") if account else None)
         refresh_token = request.refresh_token or (account.get("refresh_token") if account else None)
@@ -261,7 +645,7 @@ async def sync_youtube(request: YouTubeSyncRequest, background_tasks: Background
         # If no account but we have token, perform initial link
         if not account and request.access_token:
             logger.info("No account found, performing initial link...")
-            channel = await fetch_youtube_channel(request.access_token)
+            channel = await fetch_youtube_channel(request.access_token, client)
             
             if not channel:
                 raise HTTPException(status_code=400, detail="No YouTube channel found")
@@ -275,66 +659,85 @@ async def sync_youtube(request: YouTubeSyncRequest, background_tasks: Background
                 "avatar_url": (channel["snippet"]["thumbnails"].get("high") or channel["snippet"]["thumbnails"]["default"])["url"],
                 "access_token": request.access_token,
                 "refresh_token": request.refresh_token,
-                "token_expires_at": (datetime.utcnow() + timedelta(hours=1)).isoformat(),
+                "token_expires_at": (utcnow() + timedelta(hours=1)).isoformat(),
                 "is_active": True
             }
             
-            account_resp = supabase.table("connected_accounts").upsert(account_data).execute()
+            account_resp = await db.table("connected_accounts").upsert(account_data).execute()
             account = account_resp.data[0] if account_resp.data else None
         
         if not account:
             raise HTTPException(status_code=400, detail="No YouTube account connected")
         
-        # Check if token needs refresh
-        expires_at = account.get("token_expires_at")
-        needs_refresh = False
-        
-        if expires_at:
-            expires_dt = datetime.fromisoformat(expires_at.replace("Z", "+00:00"))
-            needs_refresh = expires_dt < (datetime.utcnow() + timedelta(minutes=5))
+        # Use the cached token while it is fresh; otherwise check the stored
+        # expiry and refresh (one refresh per account, shared by concurrent syncs)
+        cached_token = None if request.access_token else token_cache.get(account["id"])
+        if cached_token:
+            access_token = cached_token
         else:
-            needs_refresh = True
-        
-        if needs_refresh and refresh_token:
-            logger.info("Refreshing YouTube access token...")
-            try:
-                new_access_token, expires_in = await refresh_youtube_token(
-                    settings.GOOGLE_CLIENT_ID,
-                    settings.GOOGLE_CLIENT_SECRET,
-                    refresh_token
-                )
-                access_token = new_access_token
-                new_expires_at = (datetime.utcnow() + timedelta(seconds=expires_in)).isoformat()
+            expires_dt = parse_timestamp(account.get("token_expires_at"))
+            needs_refresh = not token_cache.is_fresh(expires_dt)
+            
+            if not needs_refresh and access_token and not request.access_token:
+                token_cache.put(account["id"], access_token, expires_dt)
+            
+            if needs_refresh and refresh_token:
+                logger.info("Refreshing YouTube access token...")
                 
-                supabase.table("connected_accounts").update({
-                    "access_token": access_token,
-                    "token_expires_at": new_expires_at
-                }).eq("id", account["id"]).execute()
+                async def do_refresh():
+                    with stage_timer("token_refresh"):
+                        new_access_token, expires_in = await refresh_youtube_token(
+                            settings.GOOGLE_CLIENT_ID,
+                            settings.GOOGLE_CLIENT_SECRET,
+                            refresh_token,
+                            client
+                        )
+                        new_expires_at = utcnow() + timedelta(seconds=expires_in)
+                        await db.table("connected_accounts").update({
+                            "access_token": new_access_token,
+                            "token_expires_at": new_expires_at.isoformat()
+                        }).eq("id", account["id"]).execute()
+                        return new_access_token, new_expires_at
                 
-                logger.info("Token refreshed successfully")
-            except Exception as e:
-                logger.error(f"Token refresh failed: {str(e)}")
-                raise HTTPException(status_code=401, detail="YouTube session expired. Please sign in again.")
+                try:
+                    access_token = await token_cache.refresh(account["id"], do_refresh)
+                    logger.info("Token refreshed successfully")
+                except Exception as e:
+                    logger.error(f"Token refresh failed: {str(e)}")
+                    raise HTTPException(status_code=401, detail="YouTube session expired. Please sign in again.")
         
         if not access_token:
             raise HTTPException(status_code=401, detail="No valid YouTube access token")
 
         comments_debug: List[str] = []
-        token_info = await fetch_token_info(access_token)
-        if token_info:
-            scopes = token_info.get("scope", "")
+        scopes = token_cache.get_scopes(access_token)
+        if scopes is None:
+            token_info = await fetch_token_info(access_token, client)
+            if token_info:
+                scopes = token_info.get("scope", "")
+                expires_in = int(token_info.get("expires_in", 0) or 0)
+                token_cache.put_scopes(access_token, scopes, utcnow() + timedelta(seconds=expires_in))
+                logger.info(f"Token scopes: {scopes}")
+        if scopes is not None:
             comments_debug.append(f"token_scopes={scopes}")
-            logger.info(f"Token scopes: {scopes}")
         
         # Fetch channel info
         logger.info("Fetching YouTube channel information...")
-        channel = await fetch_youtube_channel(access_token)
+        try:
+            with stage_timer("channel_fetch"):
+                channel = await fetch_youtube_channel(access_token, client)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 401:
+                # Revoked or otherwise rejected: don't keep serving it from the cache
+                token_cache.invalidate(account["id"])
+                raise HTTPException(status_code=401, detail="YouTube session expired. Please sign in again.")
+            raise
         
         if not channel:
             raise HTTPException(status_code=400, detail="Could not fetch YouTube channel")
         
         # Record account snapshot
-        supabase.table("account_snapshots").insert({
+        await db.table("account_snapshots").insert({
             "account_id": account["id"],
             "follower_count": int(channel["statistics"].get("subscriberCount", 0)),
             "total_views": int(channel["statistics"].get("viewCount", 0)),
@@ -342,15 +745,27 @@ async def sync_youtube(request: YouTubeSyncRequest, background_tasks: Background
             "recorded_at": datetime.utcnow().isoformat()
         }).execute()
         
-        # Fetch analytics data (last 30 days)
+        # Load incremental sync state; a full resync starts from scratch
+        watermarks = {} if request.full_resync else await load_watermarks(account["id"])
+        if request.full_resync:
+            logger.info("Full resync requested, ignoring stored watermarks")
+        
+        # Fetch analytics data: full window, or only the days since the watermark
         logger.info("Fetching YouTube analytics...")
-        end_date = datetime.utcnow().date().isoformat()
-        start_date = (datetime.utcnow() - timedelta(days=30)).date().isoformat()
+        today = datetime.utcnow().date()
+        window_start = today - timedelta(days=settings.YOUTUBE_ANALYTICS_WINDOW_DAYS)
+        synced_through = watermarks.get("analytics_synced_through")
+        if synced_through:
+            resume_from = datetime.fromisoformat(str(synced_through)).date() - timedelta(days=settings.YOUTUBE_ANALYTICS_LOOKBACK_DAYS)
+            window_start = max(window_start, resume_from)
+        end_date = today.isoformat()
+        start_date = window_start.isoformat()
         
-        analytics_data = await fetch_youtube_analytics(access_token, start_date, end_date)
+        with stage_timer("analytics_fetch"):
+            analytics_data = await fetch_youtube_analytics(access_token, start_date, end_date, client)
         
         if analytics_data and analytics_data.get("rows"):
-            logger.info(f"Processing {len(analytics_data['rows'])} days of analytics")
+            logger.info(f"Processing {len(analytics_data['rows'])} days of analytics ({start_date} to {end_date})")
             daily_metrics = []
             for row in analytics_data["rows"]:
                 daily_metrics.append({
@@ -362,123 +777,121 @@ async def sync_youtube(request: YouTubeSyncRequest, background_tasks: Background
                 })
             
             if daily_metrics:
-                supabase.table("channel_daily_metrics").upsert(daily_metrics).execute()
+                await bulk_write("channel_daily_metrics", daily_metrics, on_conflict="account_id,date")
+                rolling_metrics.apply(account["id"], daily_metrics)
+                if metrics_store is not None:
+                    await metrics_store.append(account["id"], daily_metrics)
+                watermarks["analytics_synced_through"] = max(row["date"] for row in daily_metrics)
         
-        # Fetch and sync videos
+        # Stream the uploads playlist page by page and write each page as it arrives.
+        # An unchanged first page (304) reuses the stored ids; the ETag is only sent
+        # when the stored ids already cover the requested budget, so a larger
+        # backfill keeps paging instead of stopping at the cached window.
         logger.info("Syncing latest videos...")
         uploads_playlist_id = channel["contentDetails"]["relatedPlaylists"]["uploads"]
-        videos = await fetch_latest_videos(access_token, uploads_playlist_id)
+        max_videos = request.max_videos or settings.YOUTUBE_MAX_VIDEOS
+        known_ids = watermarks.get("content_ids") or {}
+        stored_ids = [video_id for video_id in watermarks.get("uploads_video_ids") or [] if video_id in known_ids]
         
+        video_ids: List[str] = []
+        videos_processed = 0
         comments_synced = 0
-        
-        for video in videos:
-            video_data = {
-                "account_id": account["id"],
-                "external_id": video["id"],
-                "title": video["snippet"]["title"],
-                "thumbnail_url": (video["snippet"]["thumbnails"].get("high") or video["snippet"]["thumbnails"]["default"])["url"],
-                "published_at": video["snippet"]["publishedAt"],
-                "type": "video",
-                "url": f"https://youtube.com/watch?v={video['id']}"
-            }
+        async for page_ids, page_etag in iter_upload_video_ids(
+            access_token, uploads_playlist_id, max_videos, client,
+            etag=watermarks.get("uploads_etag") if stored_ids and max_videos <= len(stored_ids) else None
+        ):
+            if page_ids is None:
+                logger.info("Uploads playlist unchanged (ETag match)")
+                page_ids = stored_ids[:max_videos]
+            elif not video_ids:
+                # Playlist changed: re-upsert its items so metadata edits are picked up
+                watermarks["content_ids"] = {}
+                watermarks["uploads_etag"] = page_etag
             
-            content_resp = supabase.table("content_items").upsert(video_data).select("*").execute()
-            
-            if content_resp.data:
-                content_item = content_resp.data[0]
-                
-                # Record snapshot
-                supabase.table("content_snapshots").insert({
-                    "content_id": content_item["id"],
-                    "views": int(video["statistics"].get("viewCount", 0)),
-                    "likes": int(video["statistics"].get("likeCount", 0)),
-                    "comments": int(video["statistics"].get("commentCount", 0)),
-                    "recorded_at": datetime.utcnow().isoformat()
-                }).execute()
-                
-                video_comment_count = int(video["statistics"].get("commentCount", 0))
-                comments_debug.append(f"{video['id']}: commentCount={video_comment_count}")
-
-                # Fetch and sync comments
-                logger.info(f"📝 Fetching comments for video {video['id']}...")
-                comments, comments_fetch_debug = await fetch_video_comments(access_token, video["id"])
-                logger.info(f"📊 Comments fetch returned: {len(comments) if comments else 0} comments")
-                if comments_fetch_debug:
-                    comments_debug.append(f"{video['id']}: {comments_fetch_debug}")
-                if comments:
-                    try:
-                        comment_records = [
-                            {
-                                **comment,
-                                "video_id": content_item["id"],
-                                "updated_at": datetime.utcnow().isoformat()
-                            }
-                            for comment in comments
-                        ]
-                        logger.debug(f"Attempting to UPSERT {len(comment_records)} comments to DB")
-                        logger.debug(f"Comment record structure: {comment_records[0] if comment_records else 'N/A'}")
-                        
-                        result = supabase.table("video_comments").upsert(comment_records).execute()
-                        result_error = getattr(result, "error", None)
-                        if result_error:
-                            logger.error(f"❌ DB error while saving comments for video {video['id']}: {result_error}")
-                            comments_debug.append(f"{video['id']}: db_error={result_error}")
-                        
-                        if result.data:
-                            logger.info(f"💾 Successfully saved {len(comment_records)} comments for video {video['id']}")
-                        else:
-                            logger.warning(f"⚠️ UPSERT returned no data for video {video['id']}")
-                        
-                        comments_synced += len(comments)
-                        comments_debug.append(f"{video['id']}: fetched={len(comments)} saved={len(comment_records)}")
-                    except Exception as e:
-                        logger.error(f"❌ Failed to save comments for video {video['id']}: {str(e)}")
-                        logger.error(f"Exception type: {type(e).__name__}")
-                        import traceback
-                        logger.error(f"Traceback: {traceback.format_exc()}")
-                        comments_debug.append(f"{video['id']}: exception={type(e).__name__}")
-                else:
-                    logger.info(f"ℹ️ No comments to save for video {video['id']}")
-                    if video_comment_count > 0:
-                        comments_debug.append(f"{video['id']}: warning=commentCount>0 but fetched=0")
-            else:
-                logger.warning(f"⚠️ content_items upsert returned no data for video {video['id']}")
-                comments_debug.append(f"{video['id']}: content_item_upsert_no_data")
+            videos = await fetch_videos_by_id(access_token, page_ids, client)
+            page_comments, page_debug = await sync_videos(
+                videos, account["id"], access_token, client,
+                watermarks=watermarks, max_comments=request.max_comments_per_video
+            )
+            videos_processed += len(videos)
+            comments_synced += page_comments
+            comments_debug.extend(page_debug)
+            video_ids.extend(page_ids)
         
-        logger.info(f"YouTube sync completed. Videos: {len(videos)}, Comments: {comments_synced}")
+        # Keep state only for videos still in the synced window
+        watermarks["uploads_video_ids"] = video_ids
+        watermarks["content_ids"] = {video_id: content_id for video_id, content_id in (watermarks.get("content_ids") or {}).items() if video_id in video_ids}
+        watermarks["comment_watermarks"] = {video_id: mark for video_id, mark in (watermarks.get("comment_watermarks") or {}).items() if video_id in video_ids}
         
-        # 4. Calculate Analytics Insights (linear regression, trends, etc.)
-        logger.info(f"Calculating analytics insights for account...")
         try:
-            processor = AnalyticsProcessor(account["id"])
-            
-            # Fetch data and calculate insights
-            history = processor.fetch_history()
-            videos_data = processor.fetch_video_stats()
-            
-            # Calculate trends
-            history_insights = processor.process_daily_metrics(history)
-            video_insights = processor.process_video_stats(videos_data)
-            
-            # Save insights to database
-            await processor.save_insights("weekly_trend", history_insights)
-            await processor.save_insights("engagement_summary", video_insights)
-            
-            logger.info(f"Analytics insights calculated and saved successfully")
+            await save_watermarks(account["id"], watermarks)
+        except Exception as e:
+            logger.warning(f"Failed to save sync watermarks: {str(e)}")
+        
+        logger.info(f"YouTube sync completed. Videos: {videos_processed}, Comments: {comments_synced}")
+        
+        try:
+            await db.table("connected_accounts").update({"last_synced_at": utcnow().isoformat()}).eq("id", account["id"]).execute()
         except Exception as e:
-            logger.warning(f"Failed to calculate analytics insights: {str(e)}")
+            logger.warning(f"Failed to record last_synced_at: {str(e)}")
+        
+        # 4. Queue Analytics Insights (linear regression, trends, etc.) off the request path
+        # New metrics were written, so cached insights must be re-validated
+        insight_cache.invalidate(account["id"])
+        insights_job_id = None
+        try:
+            insights_job = await enqueue_processing(account["id"])
+            insights_job_id = insights_job.id
+            logger.info(f"Analytics insights queued as job {insights_job_id}")
+        except Exception as e:
+            logger.warning(f"Failed to queue analytics insights: {str(e)}")
             # Don't fail the entire sync if insights calculation fails
         
         return YouTubeSyncResponse(
             success=True,
             message="YouTube sync completed successfully",
             channel=channel["snippet"]["title"],
-            videos_processed=len(videos),
+            videos_processed=videos_processed,
             comments_synced=comments_synced,
-            comments_debug=comments_debug
+            comments_debug=comments_debug,
+            insights_job_id=insights_job_id
         )
         
+    except HTTPException:
+        raise
+    except QuotaBudgetExceeded as e:
+        logger.error(f"YouTube sync stopped by quota budget: {e.reason}")
+        raise HTTPException(status_code=429, detail=f"YouTube API quota budget exhausted ({e.reason}), try again later")
     except Exception as e:
         logger.error(f"YouTube sync error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"YouTube sync error: {str(e)}")
 
+async def run_sync_job(payload: dict) -> dict:
+    """
+    Job handler for queued syncs. Full resyncs (and jobs enqueued with
+    priority="backfill") yield YouTube quota to interactive syncs.
+    """
+    payload = dict(payload)
+    priority = payload.pop("priority", None) or (BACKFILL if payload.get("full_resync") else INTERACTIVE)
+    result = await run_youtube_sync(YouTubeSyncRequest(**payload), priority)
+    return result.model_dump()
+
+job_queue.register("youtube.sync", run_sync_job)
+
+@router.post("/sync", response_model=YouTubeSyncResponse)
+async def sync_youtube(request: YouTubeSyncRequest):
+    """
+    Sync YouTube data for a user and wait for the result.
+    Insight computation runs afterwards as a background job (insights_job_id).
+    """
+    return await run_youtube_sync(request)
+
+@router.post("/sync/jobs", response_model=YouTubeSyncJobResponse)
+async def queue_youtube_sync(request: YouTubeSyncRequest):
+    """
+    Queue a YouTube sync and return immediately.
+    Poll /api/v1/jobs/{job_id}; concurrent requests for one user share a job.
+    """
+    job = await job_queue.enqueue("youtube.sync", request.model_dump(), key=f"youtube.sync:{request.user_id}")
+    return YouTubeSyncJobResponse(job_id=job.id, status=job.status)
+
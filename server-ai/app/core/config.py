@@ -9,10 +9,83 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_SERVICE_KEY: str
     SUPABASE_SERVICE_ROLE_KEY: str | None = None
+    SUPABASE_MAX_CONNECTIONS: int = 20
+    SUPABASE_MAX_KEEPALIVE: int = 10
+    SUPABASE_TIMEOUT: float = 30.0
     
     # Google OAuth
     GOOGLE_CLIENT_ID: str | None = None
     GOOGLE_CLIENT_SECRET: str | None = None
+    TOKEN_REFRESH_MARGIN_SECONDS: int = 300  # Refresh access tokens this long before they expire
+    
+    # Google API HTTP client (shared, pooled)
+    GOOGLE_HTTP2: bool = True
+    GOOGLE_HTTP_MAX_CONNECTIONS: int = 20
+    GOOGLE_HTTP_MAX_KEEPALIVE: int = 10
+    GOOGLE_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    GOOGLE_OAUTH_TIMEOUT: float = 10.0       # oauth2.googleapis.com
+    GOOGLE_DATA_API_TIMEOUT: float = 15.0    # www.googleapis.com (YouTube Data API)
+    GOOGLE_ANALYTICS_TIMEOUT: float = 30.0   # youtubeanalytics.googleapis.com
+    
+    # YouTube sync
+    YOUTUBE_SYNC_CONCURRENCY: int = 4  # Videos whose comments are fetched in parallel per sync (writes are coalesced)
+    SUPABASE_MAX_BATCH_SIZE: int = 500  # Max rows per bulk insert/upsert request
+    YOUTUBE_MAX_VIDEOS: int = 10              # Latest uploads synced per run (paged, 50 per request)
+    YOUTUBE_MAX_COMMENTS_PER_VIDEO: int = 100 # Comment threads fetched per video (paged, 100 per request)
+    YOUTUBE_ANALYTICS_WINDOW_DAYS: int = 30   # Days fetched on a full sync
+    YOUTUBE_ANALYTICS_LOOKBACK_DAYS: int = 3  # Days re-fetched behind the watermark (YouTube revises recent days)
+    
+    # YouTube API quota & rate limiting (per process)
+    YOUTUBE_DAILY_QUOTA: int = 10000          # Data API units per day (project quota)
+    YOUTUBE_ACCOUNT_DAILY_QUOTA: int = 2000   # Units one account may spend per day
+    YOUTUBE_BACKFILL_QUOTA_SHARE: float = 0.8 # Share of the daily quota backfill syncs may use
+    YOUTUBE_REQUESTS_PER_SECOND: float = 10.0 # Token bucket refill rate for all Google API calls
+    YOUTUBE_BURST: int = 20                   # Token bucket capacity
+    YOUTUBE_MAX_RETRIES: int = 4              # Retries on 429/5xx/rate-limit 403/transport errors
+    YOUTUBE_BACKOFF_BASE: float = 0.5         # Seconds; exponential backoff with full jitter
+    YOUTUBE_BACKOFF_MAX: float = 30.0
+    
+    # Scheduled sync (opt-in)
+    SYNC_SCHEDULER_ENABLED: bool = False
+    SYNC_INTERVAL_SECONDS: float = 6 * 3600   # Target age between syncs of one account
+    SYNC_SCHEDULER_TICK_SECONDS: float = 60   # How often due accounts are dispatched
+    SYNC_SCHEDULER_JITTER: float = 0.1        # +/- fraction applied to intervals and ticks
+    SYNC_SCHEDULER_CONCURRENCY: int = 2       # Scheduled syncs in flight at once
+    
+    # Analytics
+    ANALYTICS_BATCH_ACCOUNTS: int = 100   # Accounts loaded and processed per batch chunk
+    INSIGHT_CACHE_SIZE: int = 1024        # (account, insight type) results kept in memory
+    ROLLING_METRICS_ACCOUNTS: int = 1024  # Accounts whose incremental daily-metrics window is kept in memory
+    ROLLING_METRICS_REFRESH_SECONDS: float = 3600  # Max age of a window before it is rebuilt from a full fetch
+    ANALYTICS_FAST_PATH_MAX_ROWS: int = 500  # Per-account inputs up to this size skip pandas (pure Python)
+    LONG_RANGE_MAX_YEARS: int = 5         # Longest window served by /analytics/long-range
+    INSIGHTS_READ_CACHE_TTL: float = 5.0  # Seconds a rendered /analytics/insights response is reused
+    INSIGHTS_READ_CACHE_SIZE: int = 1024  # Accounts whose rendered insights are kept in memory
+    
+    # Local columnar daily-metrics store (opt-in)
+    METRICS_STORE_PATH: str | None = None # Directory for per-account memory-mapped daily metrics
+    METRICS_STORE_COMPACT_ROWS: int = 256 # Appended records per account before the log is compacted
+    
+    # Background jobs
+    JOB_WORKERS: int = 2                  # In-process asyncio workers
+    JOB_STORE_PATH: str | None = None     # Optional SQLite file to persist jobs across restarts
+    JOB_HISTORY_LIMIT: int = 1000         # Finished jobs kept in memory for status lookups
+    
+    # Gemini
+    GEMINI_MAX_CONCURRENCY: int = 8       # In-flight Gemini requests per process
+    GEMINI_TIMEOUT: float = 60.0          # Seconds per generate call
+    GEMINI_JSON_MODE: bool = True         # Send response schemas so Gemini emits JSON directly
+    AI_CACHE_SIZE: int = 512              # Cached AI responses kept in memory
+    AI_CACHE_TTL: float = 3600.0          # Seconds a cached AI response stays valid
+    AI_CACHE_PATH: str | None = None      # Optional SQLite file to persist the AI response cache
+    
+    # Thumbnail analysis
+    THUMBNAIL_MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024  # Uploads above this are rejected (413)
+    THUMBNAIL_MAX_WIDTH: int = 1280       # Images are downscaled to fit YouTube's display size
+    THUMBNAIL_MAX_HEIGHT: int = 720
+    THUMBNAIL_JPEG_QUALITY: int = 85
+    THUMBNAIL_BATCH_MAX_FILES: int = 6    # Variants accepted per /analyze-thumbnails request
+    THUMBNAIL_BATCH_CONCURRENCY: int = 6  # Variants scored in parallel per request
     
     # OpenAI
     OPENAI_API_KEY: str | None = None
@@ -1,9 +1,59 @@
-from supabase import create_client, Client
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+import httpx
 from app.core.config import settings
 
-def get_supabase_client() -> Client:
-    url: str = settings.SUPABASE_URL
-    key: str = settings.SUPABASE_SERVICE_KEY
-    return create_client(url, key)
+if TYPE_CHECKING:
+    from supabase import AsyncClient
 
-supabase: Client = get_supabase_client()
+# PostgREST caps responses (1000 rows by default), so bulk reads are paged
+POSTGREST_PAGE_SIZE = 1000
+
+_client: Optional["AsyncClient"] = None
+_client_lock = asyncio.Lock()
+
+async def get_db() -> "AsyncClient":
+    """
+    Return the shared async Supabase client, creating it on first use.
+    All PostgREST calls go through one pooled httpx.AsyncClient so DB
+    round trips never block the event loop. The supabase package is
+    imported here rather than at startup.
+    """
+    global _client
+    if _client is None:
+        async with _client_lock:
+            if _client is None:
+                from supabase import acreate_client, AsyncClientOptions
+                http_client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+                        max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE,
+                    ),
+                    timeout=settings.SUPABASE_TIMEOUT,
+                    follow_redirects=True,
+                )
+                _client = await acreate_client(
+                    settings.SUPABASE_URL,
+                    settings.SUPABASE_SERVICE_KEY,
+                    options=AsyncClientOptions(httpx_client=http_client),
+                )
+    return _client
+
+async def close_db():
+    """Close the pooled Supabase connection (called on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.options.httpx_client.aclose()
+    _client = None
+
+async def fetch_all_pages(build_query) -> List[Dict[str, Any]]:
+    """Run a PostgREST query page by page with .range() until exhausted."""
+    rows: List[Dict[str, Any]] = []
+    start = 0
+    while True:
+        response = await build_query().range(start, start + POSTGREST_PAGE_SIZE - 1).execute()
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < POSTGREST_PAGE_SIZE:
+            return rows
+        start += POSTGREST_PAGE_SIZE
@@ -0,0 +1,58 @@
+"""
+Shared HTTP client for Google APIs
+A single pooled httpx.AsyncClient is reused for every call to googleapis.com
+so a sync pays the TCP+TLS handshake once instead of once per request.
+The client is created on first use and closed by the app lifespan.
+"""
+import logging
+from typing import Optional
+import httpx
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_google_client: Optional[httpx.AsyncClient] = None
+
+def _host_timeouts() -> dict:
+    return {
+        "oauth2.googleapis.com": settings.GOOGLE_OAUTH_TIMEOUT,
+        "www.googleapis.com": settings.GOOGLE_DATA_API_TIMEOUT,
+        "youtubeanalytics.googleapis.com": settings.GOOGLE_ANALYTICS_TIMEOUT,
+    }
+
+async def _apply_host_timeout(request: httpx.Request):
+    """Request hook: pick the timeout configured for the target host."""
+    timeout = _host_timeouts().get(request.url.host)
+    if timeout is not None:
+        request.extensions["timeout"] = httpx.Timeout(timeout).as_dict()
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("h2 package not installed, Google API client falls back to HTTP/1.1")
+        return False
+
+def get_google_client() -> httpx.AsyncClient:
+    """Return the process-wide Google API client, creating it on first use."""
+    global _google_client
+    if _google_client is None or _google_client.is_closed:
+        _google_client = httpx.AsyncClient(
+            http2=settings.GOOGLE_HTTP2 and _http2_available(),
+            limits=httpx.Limits(
+                max_connections=settings.GOOGLE_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GOOGLE_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.GOOGLE_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=settings.GOOGLE_DATA_API_TIMEOUT,
+            event_hooks={"request": [_apply_host_timeout]},
+        )
+    return _google_client
+
+async def close_google_client():
+    """Close the shared client (called on app shutdown)."""
+    global _google_client
+    if _google_client is not None and not _google_client.is_closed:
+        await _google_client.aclose()
+    _google_client = None
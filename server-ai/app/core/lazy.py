@@ -0,0 +1,27 @@
+"""
+Lazy imports
+Heavy optional-at-startup dependencies (pandas, numpy) are bound through
+LazyModule so importing the app does not pay for them: the real module is
+imported on first attribute access, i.e. on the first request that needs it.
+"""
+import importlib
+from types import ModuleType
+from typing import Any, Optional
+
+class LazyModule:
+    """Stand-in for `import name` that imports the module on first use."""
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
@@ -0,0 +1,60 @@
+"""
+Request Body Limits
+ASGI middleware capping the body of selected routes before the app reads
+it. FastAPI parses (and Starlette spools) a whole multipart form before the
+endpoint runs, so a cap checked in the endpoint bounds nothing.
+
+- A Content-Length above the cap is answered with 413 before any of the
+  body is received.
+- Bodies without one (chunked) are counted as they stream in; once the cap
+  is passed, reading stops with a 413 raised from inside form parsing.
+"""
+from typing import Dict, Optional
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+class RequestBodyTooLarge(HTTPException):
+    # An HTTPException so FastAPI re-raises it from body parsing instead of turning it into a 400
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=f"Request body exceeds the {limit} byte limit")
+
+class RequestBodyLimitMiddleware:
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits  # path -> max body bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = self._content_length(scope)
+        if content_length is not None and content_length > limit:
+            error = RequestBodyTooLarge(limit)
+            await JSONResponse({"detail": error.detail}, status_code=error.status_code)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise RequestBodyTooLarge(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    def _content_length(scope: Scope) -> Optional[int]:
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    return int(value)
+                except ValueError:
+                    return None
+        return None
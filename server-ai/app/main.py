@@ -1,8 +1,29 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.db import close_db
+from app.core.http import close_google_client
+from app.core.limits import RequestBodyLimitMiddleware
+from app.core.metrics import REGISTRY
+from app.services.jobs import job_queue
+from app.services.sync_scheduler import sync_scheduler
+from app.services.thumbnails import upload_body_limit
 
-app = FastAPI(title="SocialManager AI Service")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await job_queue.start()
+    if settings.SYNC_SCHEDULER_ENABLED:
+        await sync_scheduler.start()
+    yield
+    await sync_scheduler.stop()
+    await job_queue.stop()
+    # Release pooled connections to Google APIs and Supabase
+    await close_google_client()
+    await close_db()
+
+app = FastAPI(title="SocialManager AI Service", lifespan=lifespan)
 
 # Configure CORS
 origins = [
@@ -12,6 +33,15 @@ origins = [
     "http://127.0.0.1:5174",
 ]
 
+# Thumbnail uploads are capped before the multipart body is parsed or spooled
+app.add_middleware(
+    RequestBodyLimitMiddleware,
+    limits={
+        f"{settings.API_V1_STR}/ai/analyze-thumbnail": upload_body_limit(1),
+        f"{settings.API_V1_STR}/ai/analyze-thumbnails": upload_body_limit(settings.THUMBNAIL_BATCH_MAX_FILES),
+    },
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -24,11 +54,17 @@ app.add_middleware(
 def read_root():
     return {"message": "SocialManager AI Service Running"}
 
-from app.api.endpoints import analytics, ai, youtube_sync
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (stage latencies, Google API calls, quota, jobs)."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+from app.api.endpoints import analytics, ai, youtube_sync, jobs
 
 app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["analytics"])
 app.include_router(ai.router, prefix="/api/v1/ai", tags=["ai"])
 app.include_router(youtube_sync.router, prefix="/api/v1/youtube", tags=["youtube"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["jobs"])
 
 # Alias app to main to allow 'uvicorn app.main:main' to work
 main = app
@@ -0,0 +1,139 @@
+"""
+AI Response Cache
+Content-addressed cache for Gemini generation results. Keys are SHA-256
+digests of the normalized request (prompt inputs, image bytes) plus the model
+name. Entries live in a size-bounded LRU with a TTL and can optionally be
+persisted to a local SQLite file (AI_CACHE_PATH) to survive restarts.
+
+Concurrent identical requests are de-duplicated (single-flight): the first
+caller starts the upstream call and the others await the same result.
+Error results ({"error": ...}) are shared with concurrent waiters but never
+cached.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def normalize_prompt(text: str) -> str:
+    """Collapse whitespace so trivially different submissions share a key."""
+    return re.sub(r"\s+", " ", text).strip()
+
+def cache_key(kind: str, *parts: Any) -> str:
+    """SHA-256 over the request kind and its inputs (bytes are hashed as-is)."""
+    digest = hashlib.sha256(kind.encode())
+    for part in parts:
+        digest.update(b"\0")
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+    return digest.hexdigest()
+
+class SQLiteResponseStore:
+    """Optional disk tier. Reads and writes run in a worker thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ai_responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def _load(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, expires_at FROM ai_responses WHERE key = ?", (key,)).fetchone()
+        return (row[1], json.loads(row[0])) if row else None
+
+    def _save(self, key: str, value: Dict[str, Any], expires_at: float):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM ai_responses WHERE expires_at < ?", (time.time(),))
+            conn.execute("INSERT OR REPLACE INTO ai_responses VALUES (?, ?, ?)", (key, json.dumps(value), expires_at))
+
+    async def load(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        return await asyncio.to_thread(self._load, key)
+
+    async def save(self, key: str, value: Dict[str, Any], expires_at: float):
+        await asyncio.to_thread(self._save, key, value, expires_at)
+
+class AIResponseCache:
+    def __init__(self, max_entries: int = 512, ttl: float = 3600, store: Optional[SQLiteResponseStore] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.store = store
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None and self.store:
+            try:
+                entry = await self.store.load(key)
+            except Exception as e:
+                logger.warning(f"AI cache disk read failed: {str(e)}")
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            self._entries.pop(key, None)
+            return None
+        self._remember(key, expires_at, value)
+        return value
+
+    async def put(self, key: str, value: Dict[str, Any]):
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, value)
+        if self.store:
+            try:
+                await self.store.save(key, value, expires_at)
+            except Exception as e:
+                logger.warning(f"AI cache disk write failed: {str(e)}")
+
+    def _remember(self, key: str, expires_at: float, value: Dict[str, Any]):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Return the cached result for key, or run compute() once no matter how
+        many callers ask for the same key concurrently.
+        """
+        cached = await self.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute(key, compute))
+            self._inflight[key] = task
+        # A disconnecting caller must not cancel the call other callers share
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        try:
+            result = await compute()
+            if "error" not in result:
+                await self.put(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+ai_response_cache = AIResponseCache(
+    max_entries=settings.AI_CACHE_SIZE,
+    ttl=settings.AI_CACHE_TTL,
+    store=SQLiteResponseStore(settings.AI_CACHE_PATH) if settings.AI_CACHE_PATH else None,
+)
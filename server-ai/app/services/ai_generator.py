@@ -1,19 +1,154 @@
 import os
-import google.generativeai as genai
-import json
-from typing import List, Dict, Any
+import asyncio
+import hashlib
+from functools import lru_cache
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from dotenv import load_dotenv
+from app.core.config import settings
+from app.core.metrics import stage_timer
+from app.services.ai_cache import ai_response_cache, cache_key, normalize_prompt
+from app.services.ai_parsing import (
+    METADATA_SCHEMA, SCRIPT_SCHEMA, THUMBNAIL_SCHEMA,
+    JSONParseError, extract_json, parse_counters, repair_prompt
+)
 
 load_dotenv()
 
+MODEL_NAME = 'gemini-flash-latest'
+
 class AIGenerator:
     def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
+        # Bounds in-flight Gemini requests across all AI endpoints
+        self._semaphore = asyncio.Semaphore(max(1, settings.GEMINI_MAX_CONCURRENCY))
+        self._model = None
+        if not os.getenv("GEMINI_API_KEY"):
             print("Warning: GEMINI_API_KEY not found in environment variables.")
-        else:
+
+    @property
+    def model(self):
+        """
+        The Gemini model, created on first use: importing google.generativeai
+        takes about a second, which startup should not pay for.
+        """
+        if self._model is None:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise RuntimeError("GEMINI_API_KEY is not configured")
+            import google.generativeai as genai
             genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-flash-latest')
+            self._model = genai.GenerativeModel(MODEL_NAME)
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+
+    @staticmethod
+    def _generation_config(schema: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Constrain output to JSON matching schema (GEMINI_JSON_MODE)."""
+        if schema is None or not settings.GEMINI_JSON_MODE:
+            return None
+        return {"response_mime_type": "application/json", "response_schema": schema}
+
+    async def _generate(self, contents, schema: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Run one Gemini request on the async API (the event loop keeps serving
+        other requests meanwhile), bounded by GEMINI_MAX_CONCURRENCY and
+        GEMINI_TIMEOUT. Returns the stripped response text.
+        """
+        async with self._semaphore:
+            try:
+                with stage_timer("gemini_generate"):
+                    response = await asyncio.wait_for(
+                        self.model.generate_content_async(
+                            contents,
+                            generation_config=self._generation_config(schema),
+                            request_options={"timeout": settings.GEMINI_TIMEOUT}
+                        ),
+                        timeout=settings.GEMINI_TIMEOUT
+                    )
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Gemini request timed out after {settings.GEMINI_TIMEOUT:g}s")
+        return response.text.strip()
+
+    async def _stream(self, contents, schema: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Stream one Gemini request, yielding text chunks as they arrive.
+        GEMINI_TIMEOUT bounds the wait for each chunk.
+        """
+        async with self._semaphore:
+            try:
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(
+                        contents,
+                        stream=True,
+                        generation_config=self._generation_config(schema),
+                        request_options={"timeout": settings.GEMINI_TIMEOUT}
+                    ),
+                    timeout=settings.GEMINI_TIMEOUT
+                )
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=settings.GEMINI_TIMEOUT)
+                    except StopAsyncIteration:
+                        return
+                    if chunk.text:
+                        yield chunk.text
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Gemini request timed out after {settings.GEMINI_TIMEOUT:g}s")
+
+    async def _stream_json(self, key: str, contents, schema: Dict[str, Any]) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Yield ("delta", text) events while the model generates, then a final
+        ("result", parsed_json) or ("error", message). A cached result is
+        emitted straight away, and a successful one is added to the cache.
+        """
+        if not os.getenv("GEMINI_API_KEY"):
+            yield "error", "API Key not configured"
+            return
+
+        cached = await ai_response_cache.get(key)
+        if cached is not None:
+            yield "result", cached
+            return
+
+        parts = []
+        try:
+            async for text in self._stream(contents, schema):
+                parts.append(text)
+                yield "delta", text
+            result = await self._parse_or_repair("".join(parts).strip(), schema)
+        except Exception as e:
+            print(f"Error streaming generation: {e}")
+            yield "error", str(e)
+            return
+        yield "result", result
+
+    async def cache_result(self, key: str, result: Dict[str, Any]):
+        """Store a streamed result once the caller has validated it."""
+        await ai_response_cache.put(key, result)
+
+    async def _parse_or_repair(self, text: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Parse model output; if that fails, ask the model once to repair its
+        own text (text-only, so images are not re-sent) and parse again.
+        """
+        try:
+            return extract_json(text, schema["required"])
+        except JSONParseError as e:
+            print(f"Unparseable model output, attempting repair: {e}")
+        parse_counters["repair_attempts"] += 1
+        try:
+            repaired = extract_json(await self._generate(repair_prompt(text, schema), schema), schema["required"])
+        except JSONParseError:
+            parse_counters["failed"] += 1
+            raise
+        parse_counters["repaired"] += 1
+        return repaired
+
+    async def _generate_json(self, contents, schema: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._parse_or_repair(await self._generate(contents, schema), schema)
 
     async def generate_video_metadata(self, description: str) -> Dict[str, Any]:
         """
@@ -22,7 +157,13 @@ class AIGenerator:
         if not os.getenv("GEMINI_API_KEY"):
             return {"error": "API Key not configured"}
 
-        prompt = f"""
+        description = normalize_prompt(description)
+        key = cache_key("metadata", MODEL_NAME, description)
+        return await ai_response_cache.get_or_compute(key, lambda: self._generate_video_metadata(description))
+
+    @staticmethod
+    def _metadata_prompt(description: str) -> str:
+        return f"""
         You are an expert YouTube strategist. 
         I have a video with the following rough description/topic:
         "{description}"
@@ -41,30 +182,65 @@ class AIGenerator:
         Do not include markdown formatting like ```json.
         """
 
+    async def _generate_video_metadata(self, description: str) -> Dict[str, Any]:
         try:
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
-            
-            # Clean up potential markdown
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
-            
-            return json.loads(text.strip())
+            return await self._generate_json(self._metadata_prompt(description), METADATA_SCHEMA)
         except Exception as e:
             print(f"Error generating metadata: {e}")
             return {"error": str(e)}
 
-    async def analyze_thumbnail(self, image_data: bytes, mime_type: str) -> Dict[str, Any]:
+    def stream_video_metadata(self, description: str) -> Tuple[str, AsyncIterator[Tuple[str, Any]]]:
+        """
+        Streaming variant of generate_video_metadata. Returns the cache key
+        and an event iterator (see _stream_json).
+        """
+        description = normalize_prompt(description)
+        key = cache_key("metadata", MODEL_NAME, description)
+        return key, self._stream_json(key, self._metadata_prompt(description), METADATA_SCHEMA)
+
+    async def analyze_thumbnail(self, image_data: bytes, mime_type: str, image_sha256: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze a YouTube thumbnail image and return valid JSON feedback.
+        Pass image_sha256 when the digest is already known (see services.thumbnails).
         """
         if not os.getenv("GEMINI_API_KEY"):
             return {"error": "API Key not configured"}
 
+        key = cache_key("thumbnail", MODEL_NAME, mime_type, image_sha256 or hashlib.sha256(image_data).hexdigest())
+        return await ai_response_cache.get_or_compute(key, lambda: self._analyze_thumbnail(image_data, mime_type))
+
+    async def compare_thumbnails(self, variants: List[Tuple[str, bytes, str, str]]) -> Dict[str, Any]:
+        """
+        Score several thumbnail variants concurrently and rank them.
+        variants: (label, image_data, mime_type, image_sha256) per image.
+        At most THUMBNAIL_BATCH_CONCURRENCY run at once for this batch (the
+        GEMINI_MAX_CONCURRENCY limit still applies across requests).
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.THUMBNAIL_BATCH_CONCURRENCY))
+
+        async def score(data: bytes, mime_type: str, sha256: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.analyze_thumbnail(data, mime_type, sha256)
+
+        results = await asyncio.gather(*[score(data, mime_type, sha256) for _, data, mime_type, sha256 in variants])
+
+        ranked, failed = [], []
+        for (label, _, _, _), result in zip(variants, results):
+            if "error" in result or not isinstance(result.get("score"), (int, float)):
+                failed.append({"label": label, "error": result.get("error", "Missing score")})
+            else:
+                ranked.append({"label": label, **result})
+        # Stable sort keeps upload order for ties
+        ranked.sort(key=lambda item: item["score"], reverse=True)
+        for rank, item in enumerate(ranked, start=1):
+            item["rank"] = rank
+        return {
+            "winner": ranked[0]["label"] if ranked else None,
+            "ranking": ranked,
+            "failed": failed
+        }
+
+    async def _analyze_thumbnail(self, image_data: bytes, mime_type: str) -> Dict[str, Any]:
         prompt = """
         Analyze this YouTube thumbnail image as an expert content strategist.
         Rate it on a scale of 0-10 based on clickability, clarity, and emotional impact.
@@ -86,18 +262,7 @@ class AIGenerator:
                 "data": image_data
             }
             
-            response = self.model.generate_content([prompt, image_part])
-            text = response.text.strip()
-            
-            # Clean up potential markdown
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
-                
-            return json.loads(text.strip())
+            return await self._generate_json([prompt, image_part], THUMBNAIL_SCHEMA)
         except Exception as e:
             print(f"Error analyzing thumbnail: {e}")
             return {"error": str(e)}
@@ -109,7 +274,13 @@ class AIGenerator:
         if not os.getenv("GEMINI_API_KEY"):
             return {"error": "API Key not configured"}
 
-        prompt = f"""
+        topic, tone = normalize_prompt(topic), normalize_prompt(tone)
+        key = cache_key("script", MODEL_NAME, topic, tone)
+        return await ai_response_cache.get_or_compute(key, lambda: self._generate_script(topic, tone))
+
+    @staticmethod
+    def _script_prompt(topic: str, tone: str) -> str:
+        return f"""
         Write a YouTube video script for the following topic:
         Topic: "{topic}"
         Tone: {tone}
@@ -130,21 +301,23 @@ class AIGenerator:
         Do not include markdown formatting like ```json.
         """
 
+    def stream_script(self, topic: str, tone: str) -> Tuple[str, AsyncIterator[Tuple[str, Any]]]:
+        """
+        Streaming variant of generate_script. Returns the cache key and an
+        event iterator (see _stream_json).
+        """
+        topic, tone = normalize_prompt(topic), normalize_prompt(tone)
+        key = cache_key("script", MODEL_NAME, topic, tone)
+        return key, self._stream_json(key, self._script_prompt(topic, tone), SCRIPT_SCHEMA)
+
+    async def _generate_script(self, topic: str, tone: str) -> Dict[str, Any]:
         try:
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
-            
-            # Clean up potential markdown
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.startswith("```"):
-                text = text[3:]
-            if text.endswith("```"):
-                text = text[:-3]
-                
-            return json.loads(text.strip())
+            return await self._generate_json(self._script_prompt(topic, tone), SCRIPT_SCHEMA)
         except Exception as e:
             print(f"Error generating script: {e}")
             return {"error": str(e)}
 
-ai_service = AIGenerator()
+@lru_cache(maxsize=1)
+def get_ai_service() -> AIGenerator:
+    """The shared AIGenerator, created on first use rather than at import."""
+    return AIGenerator()
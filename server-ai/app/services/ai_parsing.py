@@ -0,0 +1,137 @@
+"""
+AI Response Parsing
+Shared JSON handling for Gemini output:
+
+- Response schemas for each generation type, sent as `response_schema` so
+  the model is constrained to emit JSON (GEMINI_JSON_MODE).
+- Tolerant extraction for free-form output: markdown fences, prose around
+  the object and trailing commas are handled before giving up.
+- Counters of how each response was parsed, so wasted generations are visible.
+
+The single repair retry lives in AIGenerator, which owns the model.
+"""
+import json
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional
+from app.core.metrics import Gauge
+
+METADATA_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "titles": {"type": "array", "items": {"type": "string"}},
+        "description": {"type": "string"},
+        "hashtags": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["titles", "description", "hashtags"],
+}
+
+SCRIPT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "hook": {"type": "string"},
+        "intro": {"type": "string"},
+        "body": {"type": "array", "items": {"type": "string"}},
+        "cta": {"type": "string"},
+    },
+    "required": ["hook", "intro", "body", "cta"],
+}
+
+THUMBNAIL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "number"},
+        "pros": {"type": "array", "items": {"type": "string"}},
+        "cons": {"type": "array", "items": {"type": "string"}},
+        "suggestions": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["score", "pros", "cons", "suggestions"],
+}
+
+# Per model response: clean (parsed as-is), extracted (needed tolerant
+# extraction), invalid (no usable object). Per request: repair_attempts,
+# repaired (fixed by the retry) and failed (still unusable after it).
+parse_counters: Counter = Counter()
+Gauge(
+    "ai_json_parse_outcomes", "Gemini JSON parse outcomes since start", ["outcome"],
+    lambda: {(outcome,): count for outcome, count in parse_counters.items()}
+)
+
+FENCE_PATTERN = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+
+class JSONParseError(ValueError):
+    pass
+
+def _first_object(text: str) -> Optional[str]:
+    """Return the first balanced {...} span, respecting string literals."""
+    start = text.find("{")
+    if start < 0:
+        return None
+    depth, in_string, escaped = 0, False, False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+def _loads_object(text: str) -> Optional[Dict[str, Any]]:
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+def _check_required(value: Dict[str, Any], required: Optional[Iterable[str]]) -> Dict[str, Any]:
+    missing = [key for key in required or () if key not in value]
+    if missing:
+        parse_counters["invalid"] += 1
+        raise JSONParseError(f"Response is missing fields: {', '.join(missing)}")
+    return value
+
+def extract_json(text: str, required: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Parse a JSON object out of model output.
+    Raises JSONParseError when no usable object (with the required keys) is found.
+    """
+    value = _loads_object(text.strip())
+    if value is not None:
+        result = _check_required(value, required)
+        parse_counters["clean"] += 1
+        return result
+
+    candidates = [FENCE_PATTERN.sub("", text)]
+    span = _first_object(text)
+    if span:
+        candidates.append(span)
+    for candidate in candidates:
+        for attempt in (candidate, TRAILING_COMMA_PATTERN.sub(r"\1", candidate)):
+            value = _loads_object(attempt.strip())
+            if value is not None:
+                result = _check_required(value, required)
+                parse_counters["extracted"] += 1
+                return result
+    parse_counters["invalid"] += 1
+    raise JSONParseError("Model response did not contain a valid JSON object")
+
+def repair_prompt(text: str, schema: Dict[str, Any]) -> str:
+    return (
+        "The following output was supposed to be a single JSON object matching this schema:\n"
+        f"{json.dumps(schema)}\n\n"
+        "Output:\n"
+        f"{text}\n\n"
+        "Return ONLY the corrected JSON object, with no markdown or commentary."
+    )
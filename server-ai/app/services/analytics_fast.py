@@ -0,0 +1,121 @@
+"""
+Pandas-free Analytics
+Pure-Python, single-pass versions of the per-account insight math. A typical
+account has at most 90 days of history and 50 videos; at that size building
+DataFrames, to_datetime/strftime and to_dict round trips cost far more than
+the arithmetic. AnalyticsProcessor uses these functions for inputs up to
+ANALYTICS_FAST_PATH_MAX_ROWS rows and keeps pandas for anything larger.
+
+Outputs match the pandas implementations (same keys, order and values, up to
+float rounding in the last digit); benchmarks/analytics_fast_path.py checks
+equivalence on random inputs and reports per-call latency.
+"""
+from datetime import date
+from typing import Any, Dict, List, Sequence, Tuple
+
+ROLLING_DAYS = 7
+ROLLING_POINTS = 30
+
+DAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+def trend_summary(n_rows: int, dates: Sequence[str], views: Sequence[Any], totals: Sequence[Any],
+                  weekday_views: Sequence[Any], weekday_counts: Sequence[int], peak: Tuple[str, Any]) -> Dict[str, Any]:
+    """
+    Build the weekly_trend structure from aggregates over n_rows days.
+    dates/views are the newest days in order (at least the last 36 when
+    available), totals are (views, watch_time_hours, subscribers_gained) and
+    peak is the (date, views) of the first day with the most views.
+    """
+    # Least-squares slope over the last 7 days from sufficient statistics
+    recent = views[-ROLLING_DAYS:]
+    if len(recent) > 1:
+        n = len(recent)
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        sum_y = float(sum(recent))
+        sum_xy = float(sum(x * y for x, y in enumerate(recent)))
+        slope = (n * sum_xy - sum_x * sum_y) / (n * sum_xx - sum_x ** 2)
+        trend_direction = "up" if slope > 0 else "down"
+    else:
+        slope = 0
+        trend_direction = "flat"
+
+    total_views, total_watch_hours, total_subs_gained = totals
+    avd_minutes = float(total_watch_hours * 60 / total_views) if total_views > 0 else 0
+    sub_conversion_rate = float(total_subs_gained / total_views * 100) if total_views > 0 else 0
+
+    # Week over week: last 7 days vs the 7 before
+    if n_rows >= 2 * ROLLING_DAYS:
+        curr_week_views = sum(views[-ROLLING_DAYS:])
+        prev_week_views = sum(views[-2 * ROLLING_DAYS:-ROLLING_DAYS])
+        momentum = ((curr_week_views - prev_week_views) / prev_week_views * 100) if prev_week_views > 0 else 0
+    else:
+        momentum = 0
+
+    # 7-day rolling mean of the last 30 days; 0 until a window has 7 days
+    offset = n_rows - len(views)
+    rolling_averages = []
+    for i in range(max(0, len(views) - ROLLING_POINTS), len(views)):
+        if offset + i >= ROLLING_DAYS - 1:
+            average = float(sum(views[i - ROLLING_DAYS + 1:i + 1])) / ROLLING_DAYS
+        else:
+            average = 0.0
+        rolling_averages.append({"date": dates[i], "views_7d_avg": average})
+
+    return {
+        "summary": {
+            "trend_direction": trend_direction,
+            "trend_slope": round(float(slope), 2),
+            "peak_date": peak[0],
+            "peak_views": int(peak[1]),
+            "avd_minutes": round(float(avd_minutes), 2),
+            "sub_conversion_rate": round(float(sub_conversion_rate), 4),
+            "momentum_percent": round(float(momentum), 2)
+        },
+        "rolling_averages": rolling_averages,
+        "day_of_week_analysis": [
+            {"day_name": DAY_NAMES[weekday], "views": float(weekday_views[weekday] / count)}
+            for weekday, count in enumerate(weekday_counts) if count
+        ]
+    }
+
+def daily_metrics_summary(history: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Single-pass equivalent of AnalyticsProcessor.process_daily_metrics."""
+    if not history:
+        return {}
+    rows = sorted(history, key=lambda row: str(row["date"]))
+    dates: List[str] = []
+    views: List[Any] = []
+    total_watch_hours = 0
+    total_subs_gained = 0
+    weekday_views = [0] * 7
+    weekday_counts = [0] * 7
+    peak = None
+    for row in rows:
+        day = str(row["date"])[:10]
+        day_views = row["views"]
+        dates.append(day)
+        views.append(day_views)
+        total_watch_hours += row.get("watch_time_hours") or 0
+        total_subs_gained += row.get("subscribers_gained") or 0
+        weekday = date.fromisoformat(day).weekday()
+        weekday_views[weekday] += day_views
+        weekday_counts[weekday] += 1
+        if peak is None or day_views > peak[1]:
+            peak = (day, day_views)
+    totals = (sum(views), total_watch_hours, total_subs_gained)
+    return trend_summary(len(rows), dates, views, totals, weekday_views, weekday_counts, peak)
+
+def engagement_rates(videos: List[Dict[str, Any]]) -> Tuple[float, List[Dict[str, Any]]]:
+    """
+    Average engagement rate and the top 3 videos by it, as computed by
+    AnalyticsProcessor.process_video_stats ((likes + comments) / views * 100,
+    zero views counted as one).
+    """
+    rates = [((video["likes"] + video["comments"]) / (video["views"] or 1)) * 100 for video in videos]
+    # Stable sort: ties keep input order, like DataFrame.nlargest
+    top = sorted(range(len(videos)), key=lambda i: -rates[i])[:3]
+    return (
+        round(float(sum(rates) / len(rates)), 2),
+        [{"id": videos[i]["id"], "title": videos[i]["title"], "engagement_rate": rates[i]} for i in top]
+    )
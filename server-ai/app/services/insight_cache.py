@@ -0,0 +1,111 @@
+"""
+Insight Result Cache
+Two-tier cache for computed analytics insights, keyed by
+(account_id, insight_type) and validated by an input fingerprint:
+
+1. In-process LRU of the last computed result per key.
+2. The latest analytics_insights row per key (latest_analytics_insights view),
+   which stores the fingerprint of the inputs it was computed from.
+
+When the fingerprint of freshly fetched source data matches, the processor
+skips both the pandas work and the insert. A sync that writes new metrics
+calls invalidate() so the next run re-checks against the database.
+"""
+import hashlib
+import json
+import logging
+import numbers
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.core.db import get_db
+
+logger = logging.getLogger(__name__)
+
+LATEST_INSIGHTS_VIEW = "latest_analytics_insights"
+
+CacheKey = Tuple[str, str]
+
+def _canonical(value: Any) -> Any:
+    # Rows may come straight from PostgREST or out of a DataFrame (numpy
+    # scalars, ints widened to floats); normalize so both hash the same
+    if isinstance(value, numbers.Number) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+def fingerprint_rows(rows: List[Dict[str, Any]], fields: Iterable[str], date_field: Optional[str] = None) -> str:
+    """
+    Fingerprint of the source rows an insight is computed from:
+    row count, newest date and a digest of the relevant fields.
+    """
+    fields = list(fields)
+    canonical = json.dumps([[_canonical(row.get(f)) for f in fields] for row in rows], default=str, separators=(",", ":"))
+    digest = hashlib.sha256(canonical.encode()).hexdigest()[:16]
+    newest = max((str(row.get(date_field)) for row in rows), default="") if date_field else ""
+    return f"{len(rows)}:{newest}:{digest}"
+
+class InsightCache:
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+
+    def _get_local(self, key: CacheKey, fingerprint: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry and entry[0] == fingerprint:
+            self._entries.move_to_end(key)
+            return entry[1]
+        return None
+
+    def put(self, account_id: str, insight_type: str, fingerprint: str, data: Dict[str, Any]):
+        key = (account_id, insight_type)
+        self._entries[key] = (fingerprint, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, account_id: str):
+        """Drop every cached insight of an account (called after a sync writes new data)."""
+        for key in [k for k in self._entries if k[0] == account_id]:
+            del self._entries[key]
+
+    async def get(self, account_id: str, insight_type: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Cached insight computed from identical inputs, or None."""
+        hits = await self.get_many({(account_id, insight_type): fingerprint})
+        return hits.get((account_id, insight_type))
+
+    async def get_many(self, fingerprints: Dict[CacheKey, str]) -> Dict[CacheKey, Dict[str, Any]]:
+        """
+        Resolve many keys at once: LRU first, then one query for the misses
+        against the latest stored insight of each key.
+        """
+        hits: Dict[CacheKey, Dict[str, Any]] = {}
+        misses: Dict[CacheKey, str] = {}
+        for key, fingerprint in fingerprints.items():
+            data = self._get_local(key, fingerprint)
+            if data is not None:
+                hits[key] = data
+            else:
+                misses[key] = fingerprint
+        if not misses:
+            return hits
+
+        try:
+            db = await get_db()
+            response = await db.table(LATEST_INSIGHTS_VIEW) \
+                .select("account_id, insight_type, input_fingerprint, data") \
+                .in_("account_id", sorted({account_id for account_id, _ in misses})) \
+                .in_("insight_type", sorted({insight_type for _, insight_type in misses})) \
+                .execute()
+        except Exception as e:
+            logger.warning(f"Insight cache lookup failed, recomputing: {str(e)}")
+            return hits
+
+        for row in response.data or []:
+            key = (row["account_id"], row["insight_type"])
+            fingerprint = misses.get(key)
+            if fingerprint and row.get("input_fingerprint") == fingerprint:
+                self.put(key[0], key[1], fingerprint, row["data"])
+                hits[key] = row["data"]
+        return hits
+
+insight_cache = InsightCache(max_entries=settings.INSIGHT_CACHE_SIZE)
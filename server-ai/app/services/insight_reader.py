@@ -0,0 +1,117 @@
+"""
+Insight Read Cache
+Backs GET /api/v1/analytics/insights/{account_id}: the latest insight per
+type of an account, read with one query against the latest_analytics_insights
+view (DISTINCT ON over idx_insights_account_type_time).
+
+Each response has a strong ETag derived from the (type, id, created_at) of
+the rows it contains. Insights are insert-only, so the tag changes exactly
+when a newer insight lands and polling clients get a 304 otherwise. Rendered
+responses are kept in memory for INSIGHTS_READ_CACHE_TTL seconds and
+concurrent misses for one account share one query. The processor
+invalidates an account when it saves insights, so this process never serves
+its own stale writes; writes from other processes show up within the TTL.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.db import get_db
+from app.core.metrics import Counter
+from app.services.insight_cache import LATEST_INSIGHTS_VIEW
+
+# Clients may keep the response but must revalidate (cheap 304) before reuse
+CACHE_CONTROL = "private, no-cache"
+
+insight_reads = Counter(
+    "insight_read_cache_total", "Insight read API lookups by server-side cache result", ["result"]
+)
+
+# (etag, rendered JSON body)
+RenderedInsights = Tuple[str, bytes]
+
+def insights_etag(account_id: str, rows: List[Dict[str, Any]]) -> str:
+    versions = sorted(f"{row['insight_type']}:{row['id']}:{row['created_at']}" for row in rows)
+    digest = hashlib.sha256("\n".join([account_id, *versions]).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison: a W/ prefix on either side is ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/") for tag in if_none_match.split(","))
+
+def render(account_id: str, rows: List[Dict[str, Any]]) -> RenderedInsights:
+    insights = {
+        row["insight_type"]: {
+            "id": row["id"],
+            "start_date": row.get("start_date"),
+            "end_date": row.get("end_date"),
+            "created_at": row["created_at"],
+            "data": row["data"]
+        }
+        for row in sorted(rows, key=lambda row: row["insight_type"])
+    }
+    body = {
+        "account_id": account_id,
+        "insights": insights,
+        "updated_at": max((str(row["created_at"]) for row in rows), default=None)
+    }
+    return insights_etag(account_id, rows), json.dumps(body, default=str, separators=(",", ":")).encode()
+
+class InsightReadCache:
+    def __init__(self, ttl: float = 5.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, RenderedInsights]]" = OrderedDict()
+        self._inflight: Dict[str, "asyncio.Task[RenderedInsights]"] = {}
+
+    async def get(self, account_id: str) -> RenderedInsights:
+        """(etag, body) of an account's latest insights."""
+        entry = self._entries.get(account_id)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(account_id)
+            insight_reads.inc(result="hit")
+            return entry[1]
+
+        task = self._inflight.get(account_id)
+        if task is None:
+            insight_reads.inc(result="miss")
+            task = asyncio.ensure_future(self._load(account_id))
+            self._inflight[account_id] = task
+        else:
+            insight_reads.inc(result="shared")
+        # A disconnecting caller must not cancel the query other callers share
+        return await asyncio.shield(task)
+
+    async def _load(self, account_id: str) -> RenderedInsights:
+        task = asyncio.current_task()
+        try:
+            db = await get_db()
+            response = await db.table(LATEST_INSIGHTS_VIEW) \
+                .select("id, insight_type, start_date, end_date, data, created_at") \
+                .eq("account_id", account_id) \
+                .execute()
+            rendered = render(account_id, response.data or [])
+            # Invalidated while querying: the result may predate the write, do not keep it
+            if self._inflight.get(account_id) is task:
+                self._entries[account_id] = (time.monotonic() + self.ttl, rendered)
+                self._entries.move_to_end(account_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return rendered
+        finally:
+            if self._inflight.get(account_id) is task:
+                del self._inflight[account_id]
+
+    def invalidate(self, account_id: str):
+        """Called after new insights are saved for an account."""
+        self._entries.pop(account_id, None)
+        self._inflight.pop(account_id, None)
+
+insight_reader = InsightReadCache(ttl=settings.INSIGHTS_READ_CACHE_TTL, max_entries=settings.INSIGHTS_READ_CACHE_SIZE)
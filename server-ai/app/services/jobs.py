@@ -0,0 +1,243 @@
+"""
+Background Job Queue
+In-process asyncio workers for long-running pipelines (YouTube sync,
+analytics processing). Enqueueing returns a job id immediately; clients poll
+/api/v1/jobs/{job_id} for the result. Jobs for the same key (e.g. the same
+account) are de-duplicated while one is queued or running.
+
+Jobs can optionally be persisted to a local SQLite file (JOB_STORE_PATH) so
+queued work and job status survive a worker restart.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.core.metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+# Never written to disk; recovered jobs fall back to the tokens stored in Supabase
+REDACTED_PAYLOAD_FIELDS = ("access_token", "refresh_token")
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+class Job:
+    def __init__(self, kind: str, payload: Dict[str, Any], key: Optional[str] = None, job_id: Optional[str] = None):
+        self.id = job_id or str(uuid.uuid4())
+        self.kind = kind
+        self.key = key
+        self.payload = payload
+        self.status = QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "key": self.key,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+class SQLiteJobStore:
+    """Minimal durable job log. Writes run in a worker thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    key TEXT,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def _save(self, job: Job):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.kind, job.key,
+                 json.dumps({k: v for k, v in job.payload.items() if k not in REDACTED_PAYLOAD_FIELDS}),
+                 job.status,
+                 json.dumps(job.result, default=str), job.error,
+                 job.created_at, job.started_at, job.finished_at)
+            )
+
+    async def save(self, job: Job):
+        await asyncio.to_thread(self._save, job)
+
+    def load(self, job_id: str) -> Optional[Job]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._from_row(row) if row else None
+
+    def load_pending(self) -> List[Job]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    @staticmethod
+    def _from_row(row) -> Job:
+        job = Job(row[1], json.loads(row[3]), key=row[2], job_id=row[0])
+        job.status = row[4]
+        job.result = json.loads(row[5]) if row[5] else None
+        job.error = row[6]
+        job.created_at, job.started_at, job.finished_at = row[7], row[8], row[9]
+        return job
+
+class JobQueue:
+    def __init__(self, workers: int = 2, store: Optional[SQLiteJobStore] = None, history_limit: int = 1000):
+        self.workers = max(1, workers)
+        self.store = store
+        self.history_limit = history_limit
+        self._handlers: Dict[str, JobHandler] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._active_by_key: Dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, kind: str, handler: JobHandler):
+        """Register the coroutine that executes jobs of `kind`."""
+        self._handlers[kind] = handler
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        if self.store:
+            # Re-queue work interrupted by the last shutdown
+            for job in await asyncio.to_thread(self.store.load_pending):
+                job.status = QUEUED
+                self._track(job)
+                self._queue.put_nowait(job.id)
+                logger.info(f"Recovered job {job.id} ({job.kind})")
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any], key: Optional[str] = None) -> Job:
+        """
+        Queue a job and return it immediately. If a job with the same key is
+        already queued or running, that job is returned instead.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        if key and key in self._active_by_key:
+            existing = self._jobs.get(self._active_by_key[key])
+            if existing and existing.active:
+                logger.info(f"Job for {key} already {existing.status}: {existing.id}")
+                return existing
+        if self._queue is None:
+            await self.start()
+
+        job = Job(kind, payload, key=key)
+        self._track(job)
+        if self.store:
+            await self.store.save(job)
+        self._queue.put_nowait(job.id)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None and self.store:
+            job = self.store.load(job_id)
+        return job
+
+    def counts(self) -> Dict[str, int]:
+        """Number of tracked jobs per status."""
+        counts = {status: 0 for status in (QUEUED, RUNNING, COMPLETED, FAILED)}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
+
+    def _track(self, job: Job):
+        self._jobs[job.id] = job
+        if job.key:
+            self._active_by_key[job.key] = job.id
+        # Forget the oldest finished jobs beyond the history limit
+        if len(self._jobs) > self.history_limit:
+            for job_id in [j.id for j in self._jobs.values() if not j.active][:len(self._jobs) - self.history_limit]:
+                del self._jobs[job_id]
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            try:
+                if job is not None:
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = RUNNING
+        job.started_at = datetime.utcnow().isoformat()
+        if self.store:
+            await self.store.save(job)
+        logger.info(f"Running job {job.id} ({job.kind})")
+        try:
+            job.result = await self._handlers[job.kind](job.payload)
+            job.status = COMPLETED
+        except asyncio.CancelledError:
+            job.status = QUEUED
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            job.status = FAILED
+            job.error = str(getattr(e, "detail", None) or e)
+        finally:
+            job.finished_at = datetime.utcnow().isoformat() if job.status != QUEUED else None
+            if job.key and self._active_by_key.get(job.key) == job.id and not job.active:
+                del self._active_by_key[job.key]
+            if self.store:
+                await self.store.save(job)
+
+job_queue = JobQueue(
+    workers=settings.JOB_WORKERS,
+    store=SQLiteJobStore(settings.JOB_STORE_PATH) if settings.JOB_STORE_PATH else None,
+    history_limit=settings.JOB_HISTORY_LIMIT,
+)
+
+Gauge(
+    "jobs", "Tracked background jobs by status", ["status"],
+    lambda: {(status,): count for status, count in job_queue.counts().items()}
+)
@@ -0,0 +1,241 @@
+"""
+Columnar Daily Metrics Store
+Optional local copy of channel_daily_metrics for long-range (multi-year)
+analyses, which would otherwise page thousands of rows of PostgREST JSON per
+request. Enabled by METRICS_STORE_PATH.
+
+Per account the store keeps two files in METRICS_STORE_PATH/<account_id>/:
+
+- base.npy: a sorted record array (day, views, watch_time_hours,
+  subscribers_gained), one record per date, read memory-mapped so slicing a
+  date range is zero-copy.
+- log.bin: the same records appended raw on each sync. Later records win
+  over earlier ones and over the base (YouTube revises recent days).
+
+compact() merges the log into a new base (written to a temp file and swapped
+in with os.replace) once it holds METRICS_STORE_COMPACT_ROWS records, or from
+the maintenance job. verify() compares the store with Supabase and, when
+asked, rebuilds it from the database. An account is only served from the
+store after it has been seeded that way; syncs of unseeded accounts are not
+recorded.
+
+File reads and writes (and the merges around them) run in worker threads
+via asyncio.to_thread, so syncs, long-range reads and the maintenance job
+never block the event loop. They are serialized per account with an
+asyncio.Lock, so a compaction cannot remove a log that an append is
+writing to.
+"""
+import asyncio
+import logging
+import os
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+from app.core.config import settings
+from app.core.db import fetch_all_pages, get_db
+from app.core.lazy import LazyModule
+
+np = LazyModule("numpy")
+
+logger = logging.getLogger(__name__)
+
+METRIC_COLUMNS = ("views", "watch_time_hours", "subscribers_gained")
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+BASE_FILE = "base.npy"
+LOG_FILE = "log.bin"
+# Account ids become directory names
+ACCOUNT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+@lru_cache(maxsize=1)
+def record_dtype():
+    """day is days since 1970-01-01 (datetime64[D] compatible)."""
+    return np.dtype([("day", "<i4"), ("views", "<i8"), ("watch_time_hours", "<f8"), ("subscribers_gained", "<i8")])
+
+def to_day(value: Any) -> int:
+    return date.fromisoformat(str(value)[:10]).toordinal() - EPOCH_ORDINAL
+
+def to_date(day: int) -> str:
+    return date.fromordinal(int(day) + EPOCH_ORDINAL).isoformat()
+
+def to_records(rows: Iterable[Dict[str, Any]]):
+    """channel_daily_metrics rows -> record array in input order."""
+    return np.array(
+        [(to_day(row["date"]), row.get("views") or 0, row.get("watch_time_hours") or 0, row.get("subscribers_gained") or 0) for row in rows],
+        dtype=record_dtype()
+    )
+
+def merge_records(*parts):
+    """Concatenate, sort by day and keep the last record per day."""
+    combined = np.concatenate(parts)
+    combined = combined[np.argsort(combined["day"], kind="stable")]
+    if len(combined) < 2:
+        return combined
+    last = np.append(combined["day"][1:] != combined["day"][:-1], True)
+    return combined[last]
+
+async def fetch_daily_metrics(account_id: str, since: Optional[date] = None) -> List[Dict[str, Any]]:
+    """An account's channel_daily_metrics from Supabase, oldest first, paged."""
+    db = await get_db()
+    def build_query():
+        query = db.table("channel_daily_metrics") \
+            .select("date, views, watch_time_hours, subscribers_gained") \
+            .eq("account_id", account_id)
+        if since is not None:
+            query = query.gte("date", since.isoformat())
+        return query.order("date")
+    return await fetch_all_pages(build_query)
+
+class ColumnarMetricsStore:
+    def __init__(self, root: str, compact_rows: int = 256):
+        self.root = root
+        self.compact_rows = compact_rows
+        # Bumped on every change so verify() can tell a sync raced its fetch
+        self._versions: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, account_id: str, name: str) -> str:
+        if not ACCOUNT_ID_PATTERN.match(account_id):
+            raise ValueError(f"Invalid account id for metrics store: {account_id!r}")
+        return os.path.join(self.root, account_id, name)
+
+    def _lock(self, account_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(account_id, asyncio.Lock())
+
+    def has(self, account_id: str) -> bool:
+        """True once the account has been seeded from Supabase."""
+        return os.path.exists(self._path(account_id, BASE_FILE))
+
+    def accounts(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.root) if ACCOUNT_ID_PATTERN.match(name) and self.has(name))
+
+    def _load_base(self, account_id: str):
+        path = self._path(account_id, BASE_FILE)
+        try:
+            return np.load(path, mmap_mode="r")
+        except ValueError:
+            # Zero-length arrays cannot be mapped
+            return np.load(path)
+
+    def _load_log(self, account_id: str):
+        path = self._path(account_id, LOG_FILE)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=record_dtype())
+        # A crash mid-append can leave a partial trailing record; ignore it
+        count = os.path.getsize(path) // record_dtype().itemsize
+        return np.fromfile(path, dtype=record_dtype(), count=count)
+
+    async def read(self, account_id: str, since: Optional[date] = None):
+        """
+        Records from `since` on (all when None), sorted by day. Without
+        pending log records this is a zero-copy slice of the memory-mapped
+        base. Returns None for accounts that have not been seeded.
+        """
+        async with self._lock(account_id):
+            return await asyncio.to_thread(self._read, account_id, since)
+
+    def _read(self, account_id: str, since: Optional[date] = None):
+        if not self.has(account_id):
+            return None
+        records = self._load_base(account_id)
+        pending = self._load_log(account_id)
+        if len(pending):
+            records = merge_records(records, pending)
+        if since is not None:
+            records = records[np.searchsorted(records["day"], to_day(since)):]
+        return records
+
+    async def append(self, account_id: str, rows: List[Dict[str, Any]]):
+        """Record upserted channel_daily_metrics rows; compacts when the log is long."""
+        self._versions[account_id] = self._versions.get(account_id, 0) + 1
+        if not rows or not self.has(account_id):
+            return
+        async with self._lock(account_id):
+            await asyncio.to_thread(self._append, account_id, rows)
+
+    def _append(self, account_id: str, rows: List[Dict[str, Any]]):
+        path = self._path(account_id, LOG_FILE)
+        with open(path, "ab") as f:
+            f.write(to_records(rows).tobytes())
+        if os.path.getsize(path) // record_dtype().itemsize >= self.compact_rows:
+            self._compact(account_id)
+
+    async def compact(self, account_id: str) -> int:
+        """Merge the log into the base file. Returns the number of records."""
+        async with self._lock(account_id):
+            return await asyncio.to_thread(self._compact, account_id)
+
+    def _compact(self, account_id: str) -> int:
+        records = self._read(account_id)
+        if records is None:
+            return 0
+        self._write_base(account_id, records)
+        return len(records)
+
+    def _write_base(self, account_id: str, records):
+        path = self._path(account_id, BASE_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(records))
+        # Readers holding the old map keep the old inode; a crash before the
+        # log is removed only replays records already in the base
+        os.replace(tmp, path)
+        try:
+            os.remove(self._path(account_id, LOG_FILE))
+        except FileNotFoundError:
+            pass
+
+    async def verify(self, account_id: str, repair: bool = True) -> Dict[str, Any]:
+        """
+        Compare the store with channel_daily_metrics in Supabase. With
+        `repair`, a differing (or unseeded) account is rebuilt from Supabase.
+        """
+        version = self._versions.get(account_id, 0)
+        rows = await fetch_daily_metrics(account_id)
+        async with self._lock(account_id):
+            if self._versions.get(account_id, 0) != version:
+                # A sync wrote this account while we were fetching; check again later
+                return {"account_id": account_id, "status": "changed_during_check"}
+            report = await asyncio.to_thread(self._check, account_id, rows, repair)
+            if report["status"] == "repaired":
+                self._versions[account_id] = self._versions.get(account_id, 0) + 1
+        if report["status"] != "consistent":
+            logger.info(f"Metrics store for {account_id}: {report}")
+        return report
+
+    def _check(self, account_id: str, rows: List[Dict[str, Any]], repair: bool) -> Dict[str, Any]:
+        """verify() against fetched rows, off the event loop."""
+        expected = merge_records(to_records(rows))
+        actual = self._read(account_id)
+        report = {"account_id": account_id, "rows": len(expected), "seeded": actual is not None}
+        if actual is None:
+            actual = np.empty(0, dtype=record_dtype())
+        expected_days = {int(day): i for i, day in enumerate(expected["day"])}
+        actual_days = {int(day): i for i, day in enumerate(actual["day"])}
+        report["missing"] = len(expected_days.keys() - actual_days.keys())
+        report["extra"] = len(actual_days.keys() - expected_days.keys())
+        report["different"] = sum(
+            1 for day in expected_days.keys() & actual_days.keys()
+            if any(not np.isclose(expected[column][expected_days[day]], actual[column][actual_days[day]]) for column in METRIC_COLUMNS)
+        )
+        consistent = report["seeded"] and not (report["missing"] or report["extra"] or report["different"])
+        report["status"] = "consistent" if consistent else "inconsistent"
+        if not consistent and repair:
+            os.makedirs(os.path.dirname(self._path(account_id, BASE_FILE)), exist_ok=True)
+            self._write_base(account_id, expected)
+            report["status"] = "repaired"
+        return report
+
+    async def ensure_seeded(self, account_id: str, attempts: int = 3) -> bool:
+        """Seed an account from Supabase if needed; False if syncs kept racing it."""
+        for _ in range(attempts):
+            if self.has(account_id):
+                return True
+            await self.verify(account_id, repair=True)
+        return self.has(account_id)
+
+metrics_store: Optional[ColumnarMetricsStore] = (
+    ColumnarMetricsStore(settings.METRICS_STORE_PATH, compact_rows=settings.METRICS_STORE_COMPACT_ROWS)
+    if settings.METRICS_STORE_PATH else None
+)
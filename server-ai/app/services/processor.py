@@ -1,16 +1,48 @@
-import pandas as pd
-import numpy as np
-from typing import List, Dict, Any
-from app.core.db import supabase
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional
+from app.core.config import settings
+from app.core.db import fetch_all_pages, get_db
+from app.core.lazy import LazyModule
+from app.core.metrics import db_rows_written, stage_timer
+from app.services.analytics_fast import daily_metrics_summary, engagement_rates
+from app.services.insight_cache import insight_cache, fingerprint_rows
+from app.services.insight_reader import insight_reader
+from app.services.metrics_store import METRIC_COLUMNS, fetch_daily_metrics, metrics_store, to_date, to_records
+from app.services.rolling_metrics import HISTORY_WINDOW_DAYS, DailyMetricsWindow, history_fingerprint, rolling_metrics
+
+# Imported on first use: only the DataFrame paths (large inputs, batch mode) need them
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+
+# View with the newest content_snapshots row per content item (see migrations)
+LATEST_SNAPSHOTS_VIEW = "latest_content_snapshots"
+# channel_daily_metrics numbered newest first per account (see migrations)
+RECENT_METRICS_VIEW = "recent_channel_daily_metrics"
+
+# Source columns each insight depends on (weekly_trend is fingerprinted by rolling_metrics)
+HISTORY_FIELDS = ("date", "views", "watch_time_hours", "subscribers_gained")
+VIDEO_FIELDS = ("id", "title", "views", "likes", "comments")
+
+def latest_snapshot_row(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": item["id"],
+        "title": item["title"],
+        "views": item.get("views") or 0,
+        "likes": item.get("likes") or 0,
+        "comments": item.get("comments") or 0
+    }
 
 class AnalyticsProcessor:
     def __init__(self, account_id: str):
         self.account_id = account_id
 
-    def fetch_history(self, days: int = 90) -> List[Dict[str, Any]]:
+    async def fetch_history(self, days: int = HISTORY_WINDOW_DAYS) -> List[Dict[str, Any]]:
         """Fetch daily metrics from Supabase."""
         try:
-            response = supabase.table("channel_daily_metrics") \
+            db = await get_db()
+            response = await db.table("channel_daily_metrics") \
                 .select("*") \
                 .eq("account_id", self.account_id) \
                 .order("date", desc=True) \
@@ -23,11 +55,56 @@ class AnalyticsProcessor:
             print(f"Error fetching history: {e}")
             return []
 
-    def fetch_video_stats(self, limit: int = 50) -> List[Dict[str, Any]]:
+    async def fetch_history_since(self, since: str) -> Optional[List[Dict[str, Any]]]:
+        """Fetch the daily metrics from `since` on (None on error)."""
+        try:
+            db = await get_db()
+            response = await db.table("channel_daily_metrics") \
+                .select(", ".join(HISTORY_FIELDS)) \
+                .eq("account_id", self.account_id) \
+                .gte("date", since) \
+                .order("date") \
+                .execute()
+            return response.data or []
+        except Exception as e:
+            print(f"Error fetching recent history: {e}")
+            return None
+
+    async def fetch_trend_window(self) -> DailyMetricsWindow:
+        """
+        The weekly_trend window for this account. With an in-process window
+        only the days from its high-water date minus the revision lookback
+        are read and folded in, O(new days). No window, a gap, a checksum
+        mismatch or a window due a refresh means a full fetch_history.
+        """
+        window = rolling_metrics.get(self.account_id)
+        if window is not None:
+            version = window.version
+            since = (date.fromisoformat(window.newest) - timedelta(days=settings.YOUTUBE_ANALYTICS_LOOKBACK_DAYS)).isoformat()
+            rows = await self.fetch_history_since(since)
+            if rows is not None and rolling_metrics.advance(self.account_id, window, version, rows, since):
+                return window
+        return rolling_metrics.rebuild(self.account_id, await self.fetch_history())
+
+    async def fetch_video_stats(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Fetch video stats from Supabase."""
         try:
-            # Fetch videos with their latest snapshot
-            response = supabase.table("content_items") \
+            db = await get_db()
+            try:
+                # Newest snapshot per video resolved server-side (one row per video)
+                response = await db.table(LATEST_SNAPSHOTS_VIEW) \
+                    .select("id, title, views, likes, comments, recorded_at") \
+                    .eq("account_id", self.account_id) \
+                    .eq("type", "video") \
+                    .order("published_at", desc=True) \
+                    .limit(limit) \
+                    .execute()
+                return [latest_snapshot_row(item) for item in response.data or [] if item.get("recorded_at")]
+            except Exception as e:
+                print(f"{LATEST_SNAPSHOTS_VIEW} unavailable, falling back to embedded snapshots: {e}")
+
+            # Fetch videos with all of their snapshots (pre-migration databases)
+            response = await db.table("content_items") \
                 .select("id, title, content_snapshots(views, likes, comments, recorded_at)") \
                 .eq("account_id", self.account_id) \
                 .eq("type", "video") \
@@ -40,15 +117,8 @@ class AnalyticsProcessor:
                 for item in response.data:
                     snapshots = item.get("content_snapshots", [])
                     if snapshots:
-                        # Sort by recorded_at desc to get latest
-                        latest = sorted(snapshots, key=lambda x: x['recorded_at'], reverse=True)[0]
-                        videos.append({
-                            "id": item["id"],
-                            "title": item["title"],
-                            "views": latest.get("views", 0),
-                            "likes": latest.get("likes", 0),
-                            "comments": latest.get("comments", 0)
-                        })
+                        latest = max(snapshots, key=lambda x: x['recorded_at'])
+                        videos.append(latest_snapshot_row({**item, **latest}))
             return videos
         except Exception as e:
             print(f"Error fetching videos: {e}")
@@ -61,7 +131,12 @@ class AnalyticsProcessor:
         """
         if not history:
             return {}
+        if len(history) <= settings.ANALYTICS_FAST_PATH_MAX_ROWS:
+            return daily_metrics_summary(history)
+        return self.process_daily_metrics_pandas(history)
 
+    def process_daily_metrics_pandas(self, history: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """DataFrame implementation of process_daily_metrics (large inputs)."""
         df = pd.DataFrame(history)
         df['date'] = pd.to_datetime(df['date'])
         df = df.sort_values('date')
@@ -127,7 +202,17 @@ class AnalyticsProcessor:
         """
         if not videos:
             return {}
-            
+        if len(videos) <= settings.ANALYTICS_FAST_PATH_MAX_ROWS:
+            avg_engagement, top_engaged = engagement_rates(videos)
+            return {
+                "average_engagement_rate": avg_engagement,
+                "top_engaged_videos": top_engaged,
+                "engagement_quality": self.analyze_engagement_quality(videos)
+            }
+        return self.process_video_stats_pandas(videos)
+
+    def process_video_stats_pandas(self, videos: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """DataFrame implementation of process_video_stats (large inputs)."""
         df = pd.DataFrame(videos)
         
         # Avoid division by zero
@@ -190,7 +275,43 @@ class AnalyticsProcessor:
         # Return top 20 most viewed to avoid clutter
         return sorted(processed, key=lambda x: x['views'], reverse=True)[:20]
 
-    async def save_insights(self, insight_type: str, data: Dict[str, Any], start_date: str = None, end_date: str = None):
+    async def run(self) -> Dict[str, Any]:
+        """
+        Full pipeline for one account: fetch data, compute and save insights.
+        Insights whose inputs are unchanged since the last run are served from
+        the insight cache without recomputing or inserting a new row. Daily
+        metrics come from the incremental window (fetch_trend_window).
+        """
+        with stage_timer("insight_fetch"):
+            trend = await self.fetch_trend_window()
+            videos = await self.fetch_video_stats()
+        
+        pipeline = {
+            "weekly_trend": (trend.fingerprint(), trend.summary),
+            "engagement_summary": (fingerprint_rows(videos, VIDEO_FIELDS), lambda: self.process_video_stats(videos)),
+        }
+        # Nothing to compute from: keep the last saved insight rather than saving {}
+        if not trend.dates:
+            del pipeline["weekly_trend"]
+        if not videos:
+            del pipeline["engagement_summary"]
+        cached = await insight_cache.get_many({
+            (self.account_id, insight_type): fingerprint for insight_type, (fingerprint, _) in pipeline.items()
+        })
+        
+        results = {}
+        for insight_type, (fingerprint, compute) in pipeline.items():
+            data = cached.get((self.account_id, insight_type))
+            if data is None:
+                with stage_timer("insight_compute"):
+                    data = compute()
+                with stage_timer("insight_save"):
+                    await self.save_insights(insight_type, data, input_fingerprint=fingerprint)
+                insight_cache.put(self.account_id, insight_type, fingerprint, data)
+            results[insight_type] = data
+        return results
+
+    async def save_insights(self, insight_type: str, data: Dict[str, Any], start_date: str = None, end_date: str = None, input_fingerprint: str = None):
         """
         Save calculated insights to Supabase
         """
@@ -199,14 +320,18 @@ class AnalyticsProcessor:
             "insight_type": insight_type,
             "data": data,
             "start_date": start_date,
-            "end_date": end_date
+            "end_date": end_date,
+            "input_fingerprint": input_fingerprint
         }
         
         # Use simple insert
         try:
             print(f"--- SAVING INSIGHT: {insight_type} ---")
             print(f"Data: {data}")
-            response = supabase.table("analytics_insights").insert(payload).execute()
+            db = await get_db()
+            response = await db.table("analytics_insights").insert(payload).execute()
+            db_rows_written.inc(table="analytics_insights")
+            insight_reader.invalidate(self.account_id)
             print(f"Supabase Response: {response}")
             print(f"Saved {insight_type} insight for {self.account_id}")
         except Exception as e:
@@ -219,3 +344,293 @@ class AnalyticsProcessor:
             if hasattr(e, 'code'):
                  print(f"Code: {e.code}")
 
+    # --- Long-range analysis: years of daily metrics as columns ---
+
+    async def fetch_history_records(self, days: int):
+        """
+        The last `days` days of daily metrics as a record array (day, views,
+        watch_time_hours, subscribers_gained), oldest first. Served from the
+        local columnar store when it is enabled (seeding the account from
+        Supabase on first use), otherwise paged from Supabase.
+        """
+        since = datetime.utcnow().date() - timedelta(days=days)
+        if metrics_store is not None and await metrics_store.ensure_seeded(self.account_id):
+            return await metrics_store.read(self.account_id, since=since)
+        return to_records(await fetch_daily_metrics(self.account_id, since=since))
+
+    @staticmethod
+    def process_long_range(records) -> Dict[str, Any]:
+        """Monthly and yearly totals, monthly trend and year-over-year growth."""
+        if len(records) == 0:
+            return {}
+        days = records["day"].astype("datetime64[D]")
+        columns = {column: records[column].astype("float64") for column in METRIC_COLUMNS}
+
+        def totals(periods):
+            keys, index = np.unique(periods, return_inverse=True)
+            sums = {column: np.bincount(index, weights=values, minlength=len(keys)) for column, values in columns.items()}
+            counts = np.bincount(index, minlength=len(keys))
+            return keys, sums, counts
+
+        months, monthly, month_days = totals(days.astype("datetime64[M]"))
+        years, yearly, year_days = totals(days.astype("datetime64[Y]"))
+
+        # Slope of daily-average views per month, so partial months do not skew it
+        monthly_avg = monthly["views"] / month_days
+        slope = np.polyfit(np.arange(len(months)), monthly_avg, 1)[0] if len(months) > 1 else 0
+
+        # Last 365 days vs the 365 before, when the history covers both
+        last_day = int(records["day"][-1])
+        yoy_growth = None
+        if last_day - int(records["day"][0]) >= 2 * 365 - 1:
+            day_numbers = records["day"]
+            current = columns["views"][day_numbers > last_day - 365].sum()
+            previous = columns["views"][(day_numbers > last_day - 730) & (day_numbers <= last_day - 365)].sum()
+            yoy_growth = round(float((current - previous) / previous * 100), 2) if previous > 0 else None
+
+        def periods(keys, sums, counts, label):
+            return [
+                {
+                    label: str(key),
+                    "days": int(counts[i]),
+                    "views": int(sums["views"][i]),
+                    "watch_time_hours": round(float(sums["watch_time_hours"][i]), 1),
+                    "subscribers_gained": int(sums["subscribers_gained"][i])
+                }
+                for i, key in enumerate(keys)
+            ]
+
+        total_views = float(columns["views"].sum())
+        return {
+            "summary": {
+                "start_date": to_date(records["day"][0]),
+                "end_date": to_date(last_day),
+                "days": len(records),
+                "total_views": int(total_views),
+                "avg_daily_views": round(total_views / len(records), 2),
+                "monthly_trend_slope": round(float(slope), 2),
+                "trend_direction": "up" if slope > 0 else "down" if slope < 0 else "flat",
+                "yoy_growth_percent": yoy_growth
+            },
+            "monthly": periods(months, monthly, month_days, "month"),
+            "yearly": periods(years, yearly, year_days, "year")
+        }
+
+    async def long_range(self, years: int) -> Dict[str, Any]:
+        """Long-range trend over the last `years` years (computed on request, not saved)."""
+        with stage_timer("long_range_fetch"):
+            records = await self.fetch_history_records(years * 365)
+        with stage_timer("long_range_compute"):
+            return self.process_long_range(records)
+
+    # --- Batch mode: many accounts per query, vectorized across accounts ---
+
+    @classmethod
+    async def run_batch(cls, account_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Recompute insights for many accounts with a few bulk queries and one
+        vectorized pass per chunk of ANALYTICS_BATCH_ACCOUNTS accounts.
+        Returns {account_id: {"weekly_trend": ..., "engagement_summary": ...}}.
+        Only accounts whose inputs changed are recomputed and saved; like
+        run(), insight types without source rows are skipped.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        size = max(1, settings.ANALYTICS_BATCH_ACCOUNTS)
+        for i in range(0, len(account_ids), size):
+            chunk = account_ids[i:i + size]
+            with stage_timer("insight_fetch"):
+                history = await cls.fetch_history_batch(chunk)
+                videos = await cls.fetch_video_stats_batch(chunk)
+            
+            # Accounts without source rows for an insight type get no insight of
+            # that type: saving {} would replace their last valid one
+            fingerprints = {}
+            for account_id, group in history.groupby("account_id", sort=False):
+                fingerprints[(account_id, "weekly_trend")] = history_fingerprint(group.to_dict(orient="records"))
+            for account_id, group in videos.groupby("account_id", sort=False):
+                fingerprints[(account_id, "engagement_summary")] = fingerprint_rows(group.to_dict(orient="records"), VIDEO_FIELDS)
+            for account_id in chunk:
+                results.setdefault(account_id, {})
+            cached = await insight_cache.get_many(fingerprints)
+            
+            stale = {account_id for account_id, insight_type in fingerprints if (account_id, insight_type) not in cached}
+            with stage_timer("insight_compute"):
+                trends = cls.process_daily_metrics_batch(history[history["account_id"].isin(stale)])
+                engagement = cls.process_video_stats_batch(videos[videos["account_id"].isin(stale)])
+            computed = {"weekly_trend": trends, "engagement_summary": engagement}
+            
+            fresh: Dict[str, Dict[str, Any]] = {}
+            for (account_id, insight_type), fingerprint in fingerprints.items():
+                key = (account_id, insight_type)
+                if key in cached:
+                    results.setdefault(account_id, {})[insight_type] = cached[key]
+                    continue
+                data = computed[insight_type].get(account_id)
+                if data is None:
+                    continue
+                results.setdefault(account_id, {})[insight_type] = data
+                fresh.setdefault(account_id, {})[insight_type] = data
+                insight_cache.put(account_id, insight_type, fingerprint, data)
+            with stage_timer("insight_save"):
+                await cls.save_insights_batch(fresh, fingerprints)
+        return results
+
+    @staticmethod
+    async def fetch_history_batch(account_ids: List[str], days: int = HISTORY_WINDOW_DAYS) -> pd.DataFrame:
+        """
+        Fetch the newest `days` rows of channel_daily_metrics per account in one
+        paged query: the same rows fetch_history reads for each account, with no
+        date cutoff, so stale or gappy accounts get the same trend either way.
+        """
+        db = await get_db()
+        rows = await fetch_all_pages(lambda: db.table(RECENT_METRICS_VIEW)
+            .select("account_id, date, views, watch_time_hours, subscribers_gained")
+            .in_("account_id", account_ids)
+            .lte("recency", days)
+            .order("account_id")
+            .order("date"))
+        return pd.DataFrame(rows, columns=["account_id", "date", "views", "watch_time_hours", "subscribers_gained"])
+
+    @staticmethod
+    async def fetch_video_stats_batch(account_ids: List[str], limit: int = 50) -> pd.DataFrame:
+        """Fetch the latest snapshot of the newest `limit` videos of many accounts."""
+        db = await get_db()
+        rows = await fetch_all_pages(lambda: db.table(LATEST_SNAPSHOTS_VIEW)
+            .select("id, account_id, title, views, likes, comments, recorded_at")
+            .in_("account_id", account_ids)
+            .eq("type", "video")
+            .order("account_id")
+            .order("published_at", desc=True)
+            .order("id"))
+        df = pd.DataFrame(rows, columns=["account_id", "id", "title", "views", "likes", "comments", "recorded_at"])
+        if df.empty:
+            return df.drop(columns="recorded_at")
+        df = df.groupby("account_id", sort=False).head(limit)
+        df = df[df["recorded_at"].notna()].drop(columns="recorded_at")
+        counts = ["views", "likes", "comments"]
+        df[counts] = df[counts].fillna(0).astype("int64")
+        return df
+
+    @staticmethod
+    def process_daily_metrics_batch(history: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        """
+        Vectorized equivalent of process_daily_metrics over many accounts.
+        Input: DataFrame with account_id, date, views, watch_time_hours, subscribers_gained.
+        """
+        if history.empty:
+            return {}
+        df = history.copy()
+        df["date"] = pd.to_datetime(df["date"])
+        for column in ("views", "watch_time_hours", "subscribers_gained"):
+            df[column] = pd.to_numeric(df[column]).fillna(0)
+        df = df.sort_values(["account_id", "date"], kind="stable").reset_index(drop=True)
+        groups = df.groupby("account_id", sort=False)
+
+        df["views_7d_avg"] = groups["views"].transform(lambda s: s.rolling(window=7).mean()).fillna(0)
+        df["from_end"] = groups.cumcount(ascending=False)
+        n_rows = groups.size()
+
+        # Least-squares slope over the last 7 points from sufficient statistics
+        recent = df[df["from_end"] < 7].copy()
+        recent["x"] = recent.groupby("account_id", sort=False).cumcount().astype(float)
+        recent["xy"] = recent["x"] * recent["views"]
+        recent["xx"] = recent["x"] ** 2
+        sums = recent.groupby("account_id", sort=False)[["x", "views", "xy", "xx"]].sum()
+        n = recent.groupby("account_id", sort=False).size()
+        denominator = n * sums["xx"] - sums["x"] ** 2
+        slope = ((n * sums["xy"] - sums["x"] * sums["views"]) / denominator.where(denominator != 0)).fillna(0)
+
+        peak = df.loc[groups["views"].idxmax()].set_index("account_id")
+        totals = groups[["views", "watch_time_hours", "subscribers_gained"]].sum()
+        curr_week = df[df["from_end"] < 7].groupby("account_id", sort=False)["views"].sum()
+        prev_week = df[(df["from_end"] >= 7) & (df["from_end"] < 14)].groupby("account_id", sort=False)["views"].sum()
+
+        df["day_index"] = df["date"].dt.dayofweek
+        df["day_name"] = df["date"].dt.day_name()
+        day_stats = df.groupby(["account_id", "day_index", "day_name"], sort=True)["views"].mean().reset_index()
+        df["date_str"] = df["date"].dt.strftime("%Y-%m-%d")
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for account_id, count in n_rows.items():
+            total_views = totals.at[account_id, "views"]
+            avd_minutes = (totals.at[account_id, "watch_time_hours"] * 60) / total_views if total_views > 0 else 0
+            sub_conversion_rate = (totals.at[account_id, "subscribers_gained"] / total_views * 100) if total_views > 0 else 0
+            if count >= 14:
+                prev = prev_week.get(account_id, 0)
+                momentum = ((curr_week[account_id] - prev) / prev * 100) if prev > 0 else 0
+            else:
+                momentum = 0
+            account_slope = slope.get(account_id, 0) if count > 1 else 0
+            trend_direction = ("up" if account_slope > 0 else "down") if count > 1 else "flat"
+            account_rows = df[df["account_id"] == account_id]
+            account_days = day_stats[day_stats["account_id"] == account_id]
+            results[account_id] = {
+                "summary": {
+                    "trend_direction": trend_direction,
+                    "trend_slope": round(float(account_slope), 2),
+                    "peak_date": peak.at[account_id, "date"].strftime("%Y-%m-%d"),
+                    "peak_views": int(peak.at[account_id, "views"]),
+                    "avd_minutes": round(float(avd_minutes), 2),
+                    "sub_conversion_rate": round(float(sub_conversion_rate), 4),
+                    "momentum_percent": round(float(momentum), 2)
+                },
+                "rolling_averages": account_rows[["date_str", "views_7d_avg"]].tail(30)
+                    .rename(columns={"date_str": "date"}).to_dict(orient="records"),
+                "day_of_week_analysis": account_days[["day_name", "views"]].to_dict(orient="records")
+            }
+        return results
+
+    @staticmethod
+    def process_video_stats_batch(videos: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        """Vectorized equivalent of process_video_stats over many accounts."""
+        if videos.empty:
+            return {}
+        df = videos.copy()
+        df["engagement_rate"] = ((df["likes"] + df["comments"]) / df["views"].replace(0, 1)) * 100
+        groups = df.groupby("account_id", sort=False)
+        avg_engagement = groups["engagement_rate"].mean()
+
+        # Engagement matrix: videos over 100 views, per 1k views, top 20 by views
+        quality = df[df["views"] > 100].copy()
+        quality["likability"] = (quality["likes"] / quality["views"] * 1000).round(2)
+        quality["discussability"] = (quality["comments"] / quality["views"] * 1000).round(2)
+        quality = quality.sort_values(["account_id", "views"], ascending=[True, False], kind="stable")
+        quality = quality.groupby("account_id", sort=False).head(20)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for account_id, group in groups:
+            top_engaged = group.nlargest(3, "engagement_rate")
+            account_quality = quality[quality["account_id"] == account_id]
+            results[account_id] = {
+                "average_engagement_rate": round(float(avg_engagement[account_id]), 2),
+                "top_engaged_videos": top_engaged[["id", "title", "engagement_rate"]].to_dict(orient="records"),
+                "engagement_quality": account_quality[["id", "title", "views", "likability", "discussability"]].to_dict(orient="records")
+            }
+        return results
+
+    @staticmethod
+    async def save_insights_batch(results: Dict[str, Dict[str, Any]], fingerprints: Dict[tuple, str] = None):
+        """Insert all computed insights in bulk."""
+        fingerprints = fingerprints or {}
+        rows = [
+            {
+                "account_id": account_id,
+                "insight_type": insight_type,
+                "data": data,
+                "start_date": None,
+                "end_date": None,
+                "input_fingerprint": fingerprints.get((account_id, insight_type))
+            }
+            for account_id, insights in results.items()
+            for insight_type, data in insights.items()
+        ]
+        if not rows:
+            return
+        db = await get_db()
+        for i in range(0, len(rows), settings.SUPABASE_MAX_BATCH_SIZE):
+            chunk = rows[i:i + settings.SUPABASE_MAX_BATCH_SIZE]
+            await db.table("analytics_insights").insert(chunk).execute()
+            db_rows_written.inc(len(chunk), table="analytics_insights")
+            for account_id in {row["account_id"] for row in chunk}:
+                insight_reader.invalidate(account_id)
+        print(f"Saved {len(rows)} insights for {len(results)} accounts")
@@ -0,0 +1,230 @@
+"""
+Incremental Daily Metrics
+Running aggregates behind the weekly_trend insight, kept per account so a
+run only reads and folds in the days that changed, O(new days), instead of
+re-reading and rebuilding the whole history.
+
+The window matches AnalyticsProcessor.fetch_history: the newest
+HISTORY_WINDOW_DAYS rows. Per account the engine keeps the window's rows,
+running totals (views, watch time, subscribers), per-weekday sums/counts,
+the peak day and an order-independent checksum of the rows (a sum of
+per-day digests, which is also the weekly_trend input fingerprint). Totals
+are exact (Fraction) so adding and evicting days never drifts. Everything
+else in the summary (7-day slope, week-over-week momentum, the last 30
+rolling means) only looks at the newest 36 rows and is built by
+analytics_fast.trend_summary, shared with the stateless path.
+
+The processor re-reads the days from the window's high-water date minus
+YOUTUBE_ANALYTICS_LOOKBACK_DAYS and advance()s the window with them. It
+falls back to a full fetch when there is no window yet or when the re-read
+shows a gap or a checksum mismatch. It also falls back when the window is
+older than ROLLING_METRICS_REFRESH_SECONDS, because the state is per
+process and other writers may have revised older days.
+"""
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from fractions import Fraction
+from itertools import takewhile
+from datetime import date
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.services.analytics_fast import ROLLING_DAYS, ROLLING_POINTS, trend_summary
+
+logger = logging.getLogger(__name__)
+
+HISTORY_WINDOW_DAYS = 90
+CHECKSUM_MODULUS = 2 ** 64
+# (views, watch_time_hours, subscribers_gained)
+DayValues = Tuple[Any, Any, Any]
+
+def _day_values(row: Dict[str, Any]) -> DayValues:
+    return (row.get("views") or 0, row.get("watch_time_hours") or 0, row.get("subscribers_gained") or 0)
+
+def _day(row: Dict[str, Any]) -> str:
+    return str(row["date"])[:10]
+
+def _digest(day: str, values: DayValues) -> int:
+    # NaN (a missing value out of a DataFrame) counts as 0, like None
+    canonical = json.dumps([day] + [float(value) if value == value else 0.0 for value in values])
+    return int.from_bytes(hashlib.sha256(canonical.encode()).digest()[:8], "big")
+
+def _fingerprint(count: int, newest: Optional[str], checksum: int) -> str:
+    return f"{count}:{newest or ''}:{checksum:016x}"
+
+def history_fingerprint(history: Iterable[Dict[str, Any]]) -> str:
+    """weekly_trend input fingerprint of fetched rows; equals the window's fingerprint()."""
+    days = {_day(row): _day_values(row) for row in history}
+    checksum = sum(_digest(day, values) for day, values in days.items()) % CHECKSUM_MODULUS
+    return _fingerprint(len(days), max(days, default=None), checksum)
+
+class DailyMetricsWindow:
+    """Rolling aggregates over one account's newest `size` days."""
+    def __init__(self, size: int = HISTORY_WINDOW_DAYS):
+        self.size = size
+        self.dates: Deque[str] = deque()
+        self.values: Dict[str, DayValues] = {}
+        self.totals = [Fraction(0), Fraction(0), Fraction(0)]
+        self.weekday_views = [Fraction(0)] * 7
+        self.weekday_counts = [0] * 7
+        self.peak: Optional[str] = None
+        self.checksum = 0
+        self.built_at = time.monotonic()
+        # Bumped on every change, so a reader can tell the window moved under its fetch
+        self.version = 0
+
+    @classmethod
+    def from_history(cls, history: Iterable[Dict[str, Any]], size: int = HISTORY_WINDOW_DAYS) -> "DailyMetricsWindow":
+        window = cls(size)
+        for day, values in sorted((_day(row), _day_values(row)) for row in history):
+            window._append(day, values)
+        return window
+
+    @property
+    def newest(self) -> Optional[str]:
+        return self.dates[-1] if self.dates else None
+
+    def fingerprint(self) -> str:
+        return _fingerprint(len(self.dates), self.newest, self.checksum)
+
+    def _count(self, day: str, values: DayValues, sign: int):
+        for i in range(3):
+            self.totals[i] += sign * Fraction(values[i])
+        weekday = date.fromisoformat(day).weekday()
+        self.weekday_views[weekday] += sign * Fraction(values[0])
+        self.weekday_counts[weekday] += sign
+        self.checksum = (self.checksum + sign * _digest(day, values)) % CHECKSUM_MODULUS
+        self.version += 1
+
+    def _rescan_peak(self):
+        # First (oldest) day with the most views, like DataFrame.idxmax
+        self.peak = None
+        for day in self.dates:
+            if self.peak is None or self.values[day][0] > self.values[self.peak][0]:
+                self.peak = day
+
+    def _append(self, day: str, values: DayValues):
+        self.dates.append(day)
+        self.values[day] = values
+        self._count(day, values, 1)
+        if self.peak is None or values[0] > self.values[self.peak][0]:
+            self.peak = day
+        if len(self.dates) > self.size:
+            oldest = self.dates.popleft()
+            self._count(oldest, self.values.pop(oldest), -1)
+            if oldest == self.peak:
+                self._rescan_peak()
+
+    def _replace(self, day: str, values: DayValues):
+        previous = self.values[day]
+        self._count(day, previous, -1)
+        self._count(day, values, 1)
+        self.values[day] = values
+        if day == self.peak:
+            if values[0] < previous[0]:
+                self._rescan_peak()
+        elif values[0] > self.values[self.peak][0] or (values[0] == self.values[self.peak][0] and day < self.peak):
+            self.peak = day
+
+    def apply(self, rows: Iterable[Dict[str, Any]]) -> bool:
+        """
+        Fold upserted rows into the window. New days after the newest one are
+        appended (evicting the oldest), known days are replaced in place and
+        days older than a full window are ignored. Returns False when a row
+        falls inside the window but is missing from it (a gap was backfilled);
+        the window must then be rebuilt from the database.
+        """
+        for day, values in sorted((_day(row), _day_values(row)) for row in rows):
+            if day in self.values:
+                self._replace(day, values)
+            elif not self.dates or day > self.dates[-1]:
+                self._append(day, values)
+            elif len(self.dates) >= self.size and day < self.dates[0]:
+                continue
+            else:
+                return False
+        return True
+
+    def advance(self, rows: List[Dict[str, Any]], since: str) -> bool:
+        """
+        Fold in rows re-read from the database for every day from `since` on.
+        Each known day in that range must come back, or the stored rows no
+        longer match the database (checksum mismatch), and new days must
+        not open a gap. Returns False when the window has to be rebuilt.
+        """
+        returned = {_day(row) for row in rows}
+        if any(day not in returned for day in takewhile(lambda day: day >= since, reversed(self.dates))):
+            return False
+        return self.apply(rows)
+
+    def summary(self) -> Dict[str, Any]:
+        """Same structure as AnalyticsProcessor.process_daily_metrics."""
+        if not self.dates:
+            return {}
+        # Slope, momentum and rolling means only need the newest 36 days
+        start = max(0, len(self.dates) - (ROLLING_POINTS + ROLLING_DAYS - 1))
+        dates = [self.dates[i] for i in range(start, len(self.dates))]
+        return trend_summary(
+            len(self.dates), dates, [self.values[day][0] for day in dates], self.totals,
+            self.weekday_views, self.weekday_counts, (self.peak, self.values[self.peak][0])
+        )
+
+class RollingMetricsEngine:
+    """Per-account DailyMetricsWindow, least recently used accounts evicted."""
+    def __init__(self, max_accounts: int = 1024, window_days: int = HISTORY_WINDOW_DAYS, refresh_seconds: float = 3600):
+        self.max_accounts = max_accounts
+        self.window_days = window_days
+        self.refresh_seconds = refresh_seconds
+        self._windows: "OrderedDict[str, DailyMetricsWindow]" = OrderedDict()
+
+    def _store(self, account_id: str, window: DailyMetricsWindow):
+        self._windows[account_id] = window
+        self._windows.move_to_end(account_id)
+        while len(self._windows) > self.max_accounts:
+            self._windows.popitem(last=False)
+
+    def get(self, account_id: str) -> Optional[DailyMetricsWindow]:
+        """The account's window, or None when there is none or it is due a full refresh."""
+        window = self._windows.get(account_id)
+        if window is None or not window.dates or time.monotonic() - window.built_at > self.refresh_seconds:
+            return None
+        self._windows.move_to_end(account_id)
+        return window
+
+    def apply(self, account_id: str, rows: List[Dict[str, Any]]):
+        """
+        Called after a sync upserts channel_daily_metrics rows. Accounts
+        without a window are left alone; it is built on the next run.
+        """
+        window = self._windows.get(account_id)
+        if window is not None and not window.apply(rows):
+            logger.debug(f"Daily metrics for {account_id} changed inside the window, rebuilding on next run")
+            self.invalidate(account_id)
+
+    def advance(self, account_id: str, window: DailyMetricsWindow, version: int, rows: List[Dict[str, Any]], since: str) -> bool:
+        """
+        Fold rows re-read from `since` on into a window obtained with get()
+        at `version`. False (and the window dropped) when it moved during the
+        read, or on a gap or checksum mismatch; the caller then rebuilds.
+        """
+        if self._windows.get(account_id) is window and window.version == version and window.advance(rows, since):
+            return True
+        logger.debug(f"Daily metrics window for {account_id} out of date, rebuilding")
+        self.invalidate(account_id)
+        return False
+
+    def rebuild(self, account_id: str, history: List[Dict[str, Any]]) -> DailyMetricsWindow:
+        """Replace the account's window with one built from fetch_history rows."""
+        window = DailyMetricsWindow.from_history(history, self.window_days)
+        self._store(account_id, window)
+        return window
+
+    def invalidate(self, account_id: str):
+        self._windows.pop(account_id, None)
+
+rolling_metrics = RollingMetricsEngine(
+    max_accounts=settings.ROLLING_METRICS_ACCOUNTS,
+    refresh_seconds=settings.ROLLING_METRICS_REFRESH_SECONDS
+)
@@ -0,0 +1,129 @@
+"""
+Scheduled YouTube Sync
+Keeps every active connected account fresh without waiting for a user to
+open the dashboard. Every SYNC_SCHEDULER_TICK_SECONDS (with jitter) the
+scheduler loads active YouTube accounts stalest-first by last_synced_at and
+queues the ones due (last sync older than SYNC_INTERVAL_SECONDS, jittered
+per account) as regular "youtube.sync" jobs at backfill priority.
+
+Dispatch is paced so a full rotation over all accounts takes one interval
+(about accounts * tick / interval jobs per tick) and at most
+SYNC_SCHEDULER_CONCURRENCY scheduled syncs are in flight, which spreads
+Google API and Supabase load evenly instead of clustering it at login times.
+Accounts whose scheduled sync failed back off exponentially (up to one
+interval) so a broken account cannot take a slot every tick.
+"""
+import asyncio
+import logging
+import math
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.core.db import fetch_all_pages, get_db
+from app.services.jobs import FAILED, Job, job_queue
+from app.services.token_cache import parse_timestamp, utcnow
+from app.services.youtube_quota import BACKFILL
+
+logger = logging.getLogger(__name__)
+
+class SyncScheduler:
+    def __init__(self, interval: float, tick: float, jitter: float, concurrency: int):
+        self.interval = interval
+        self.tick = tick
+        self.jitter = jitter
+        self.concurrency = max(1, concurrency)
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: Dict[str, Job] = {}
+        self._failures: Dict[str, int] = {}
+        self._retry_after: Dict[str, datetime] = {}
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Sync scheduler started (interval {self.interval:g}s, concurrency {self.concurrency})")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def load_accounts(self) -> List[Dict[str, Any]]:
+        """Active YouTube accounts, never-synced first, then oldest last_synced_at."""
+        db = await get_db()
+        return await fetch_all_pages(lambda: db.table("connected_accounts")
+            .select("id, user_id, last_synced_at")
+            .eq("platform", "youtube")
+            .eq("is_active", True)
+            .order("last_synced_at", nullsfirst=True)
+            .order("id"))
+
+    def due(self, accounts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        now = utcnow()
+        return [
+            account for account in accounts
+            if account["user_id"] not in self._in_flight
+            and self._retry_after.get(account["user_id"], now) <= now
+            and (not account.get("last_synced_at")
+                 or parse_timestamp(account["last_synced_at"]) + timedelta(seconds=self._jittered(self.interval)) <= now)
+        ]
+
+    def _reap(self):
+        """Forget finished jobs and schedule retries for failed ones."""
+        for user_id, job in list(self._in_flight.items()):
+            if job.active:
+                continue
+            del self._in_flight[user_id]
+            if job.status == FAILED:
+                failures = self._failures.get(user_id, 0) + 1
+                self._failures[user_id] = failures
+                delay = min(self.interval, self.tick * 2 ** failures)
+                self._retry_after[user_id] = utcnow() + timedelta(seconds=delay)
+                logger.warning(f"Scheduled sync for {user_id} failed ({job.error}); retrying in {delay:g}s")
+            else:
+                self._failures.pop(user_id, None)
+                self._retry_after.pop(user_id, None)
+
+    async def run_once(self) -> List[Job]:
+        """Queue the next batch of due accounts; returns the jobs queued."""
+        self._reap()
+        slots = self.concurrency - len(self._in_flight)
+        if slots <= 0:
+            return []
+
+        accounts = await self.load_accounts()
+        if not accounts:
+            return []
+        # Pace dispatch so every account is visited once per interval
+        per_tick = max(1, math.ceil(len(accounts) * self.tick / self.interval))
+        queued = []
+        for account in self.due(accounts)[:min(slots, per_tick)]:
+            job = await job_queue.enqueue(
+                "youtube.sync",
+                {"user_id": account["user_id"], "priority": BACKFILL},
+                key=f"youtube.sync:{account['user_id']}"
+            )
+            self._in_flight[account["user_id"]] = job
+            queued.append(job)
+        if queued:
+            logger.info(f"Scheduled {len(queued)} of {len(accounts)} accounts for sync")
+        return queued
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Sync scheduler tick failed: {str(e)}")
+            await asyncio.sleep(self._jittered(self.tick))
+
+sync_scheduler = SyncScheduler(
+    interval=settings.SYNC_INTERVAL_SECONDS,
+    tick=settings.SYNC_SCHEDULER_TICK_SECONDS,
+    jitter=settings.SYNC_SCHEDULER_JITTER,
+    concurrency=settings.SYNC_SCHEDULER_CONCURRENCY,
+)
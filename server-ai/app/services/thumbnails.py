@@ -0,0 +1,95 @@
+"""
+Thumbnail Pre-processing
+Request bodies are capped by RequestBodyLimitMiddleware (upload_body_limit)
+before FastAPI parses the multipart form, and each file is read in chunks
+under THUMBNAIL_MAX_UPLOAD_BYTES. Images are then decoded, downscaled
+to the resolution YouTube displays (THUMBNAIL_MAX_WIDTH x THUMBNAIL_MAX_HEIGHT)
+and re-encoded as JPEG in a worker thread. The SHA-256 of the normalized
+bytes is the cache identity, so re-uploads of the same picture at a
+different size or encoding share one analysis.
+
+Pillow is optional and imported on the first upload, not at startup:
+without it the raw upload is passed through unchanged.
+"""
+import asyncio
+import hashlib
+import io
+import logging
+from typing import NamedTuple
+from fastapi import UploadFile
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Allowance per multipart part for boundaries and part headers
+MULTIPART_PART_OVERHEAD = 16 * 1024
+
+class ThumbnailTooLargeError(ValueError):
+    pass
+
+class InvalidThumbnailError(ValueError):
+    pass
+
+class Thumbnail(NamedTuple):
+    data: bytes
+    mime_type: str
+    sha256: str
+
+def upload_body_limit(files: int) -> int:
+    """Largest request body accepted for an upload of `files` thumbnails."""
+    return files * (settings.THUMBNAIL_MAX_UPLOAD_BYTES + MULTIPART_PART_OVERHEAD)
+
+async def read_upload(file: UploadFile, max_bytes: int) -> bytes:
+    """
+    Read a parsed upload chunk by chunk, failing as soon as it exceeds
+    max_bytes (the per-file cap; the request as a whole is capped earlier).
+    """
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return bytes(buffer)
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise ThumbnailTooLargeError(f"Image exceeds the {max_bytes} byte upload limit")
+
+def normalize_image(data: bytes, mime_type: str) -> Thumbnail:
+    """Downscale and re-encode one image (CPU-bound; call via a worker thread)."""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        logger.warning("Pillow not installed, thumbnails are analyzed as uploaded")
+        return Thumbnail(data, mime_type, hashlib.sha256(data).hexdigest())
+
+    size = (settings.THUMBNAIL_MAX_WIDTH, settings.THUMBNAIL_MAX_HEIGHT)
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            # JPEG can decode straight at a reduced scale, which skips most of the work
+            img.draft("RGB", size)
+            img = ImageOps.exif_transpose(img)
+            img.thumbnail(size, Image.LANCZOS)
+            if img.mode in ("RGBA", "LA", "P"):
+                # JPEG has no alpha; flatten transparency onto white
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel("A"))
+                img = background
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+            output = io.BytesIO()
+            img.save(output, format="JPEG", quality=settings.THUMBNAIL_JPEG_QUALITY, optimize=True)
+    except (OSError, Image.DecompressionBombError) as e:
+        raise InvalidThumbnailError(f"File is not a valid image: {e}")
+
+    normalized = output.getvalue()
+    return Thumbnail(normalized, "image/jpeg", hashlib.sha256(normalized).hexdigest())
+
+async def prepare_thumbnail(file: UploadFile) -> Thumbnail:
+    """Size-capped read followed by off-loop normalization."""
+    data = await read_upload(file, settings.THUMBNAIL_MAX_UPLOAD_BYTES)
+    if not data:
+        raise InvalidThumbnailError("Empty file")
+    thumbnail = await asyncio.to_thread(normalize_image, data, file.content_type)
+    logger.info(f"Thumbnail normalized: {len(data)} -> {len(thumbnail.data)} bytes")
+    return thumbnail
@@ -0,0 +1,91 @@
+"""
+OAuth Token Cache
+In-memory cache of YouTube access tokens per connected account, with
+expiry awareness and single-flight refresh: concurrent syncs for the same
+account share one call to Google's token endpoint. Granted scopes from
+tokeninfo are cached per access token until it expires.
+"""
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+
+RefreshResult = Tuple[str, datetime]
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a stored timestamp (e.g. token_expires_at) into an aware UTC datetime.
+    Values written without an offset (datetime.utcnow().isoformat()) are UTC.
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _token_key(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode()).hexdigest()
+
+class TokenCache:
+    def __init__(self, refresh_margin: float = 300):
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self._tokens: Dict[str, Tuple[str, datetime]] = {}
+        self._scopes: Dict[str, Tuple[str, datetime]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    def is_fresh(self, expires_at: Optional[datetime]) -> bool:
+        """True while a token expiring at expires_at is usable for a whole sync."""
+        return expires_at is not None and expires_at > utcnow() + self.refresh_margin
+
+    def get(self, account_id: str) -> Optional[str]:
+        entry = self._tokens.get(account_id)
+        if entry and self.is_fresh(entry[1]):
+            return entry[0]
+        return None
+
+    def put(self, account_id: str, access_token: str, expires_at: datetime):
+        self._tokens[account_id] = (access_token, expires_at)
+
+    def invalidate(self, account_id: str):
+        """Forget an account's token (e.g. after Google rejected it)."""
+        entry = self._tokens.pop(account_id, None)
+        if entry:
+            self._scopes.pop(_token_key(entry[0]), None)
+
+    async def refresh(self, account_id: str, do_refresh: Callable[[], Awaitable[RefreshResult]]) -> str:
+        """
+        Refresh an account's token once, however many callers ask at the
+        same time. do_refresh returns (access_token, expires_at).
+        """
+        task = self._refreshing.get(account_id)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh(account_id, do_refresh))
+            self._refreshing[account_id] = task
+        return await asyncio.shield(task)
+
+    async def _refresh(self, account_id: str, do_refresh: Callable[[], Awaitable[RefreshResult]]) -> str:
+        try:
+            access_token, expires_at = await do_refresh()
+            self.put(account_id, access_token, expires_at)
+            return access_token
+        finally:
+            self._refreshing.pop(account_id, None)
+
+    def get_scopes(self, access_token: str) -> Optional[str]:
+        entry = self._scopes.get(_token_key(access_token))
+        if entry and entry[1] > utcnow():
+            return entry[0]
+        return None
+
+    def put_scopes(self, access_token: str, scopes: str, expires_at: datetime):
+        now = utcnow()
+        for key in [k for k, (_, exp) in self._scopes.items() if exp <= now]:
+            del self._scopes[key]
+        self._scopes[_token_key(access_token)] = (scopes, expires_at)
+
+token_cache = TokenCache(refresh_margin=settings.TOKEN_REFRESH_MARGIN_SECONDS)
@@ -0,0 +1,223 @@
+"""
+YouTube API Quota & Rate-Limit Scheduler
+Every Google API call made by the sync pipeline goes through
+youtube_scheduler.request(), which:
+
+- charges per-endpoint Data API quota units against a global daily budget
+  (YOUTUBE_DAILY_QUOTA) and a per-account daily budget, both resetting at
+  midnight Pacific time like the real YouTube quota;
+- paces requests with a token bucket (YOUTUBE_REQUESTS_PER_SECOND / YOUTUBE_BURST);
+- retries 429, 5xx, rate-limit 403s and transport errors with jittered
+  exponential backoff (honouring Retry-After);
+- gives interactive syncs priority: backfill calls wait while interactive
+  calls are queued and may only spend YOUTUBE_BACKFILL_QUOTA_SHARE of the
+  daily budget, leaving the rest for users waiting on a response.
+
+The account and priority of the current sync are carried in a context
+variable (youtube_call_context), so the API helpers need no extra arguments.
+Budgets are tracked per process.
+"""
+import asyncio
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+import httpx
+from app.core.config import settings
+from app.core.metrics import Gauge, google_api_requests
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+except Exception:
+    QUOTA_TIMEZONE = timezone.utc
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKFILL = "backfill"
+
+# Data API quota units per call; OAuth and Analytics API calls are paced but not charged
+YOUTUBE_API_COSTS = {
+    "channels": 1,
+    "playlistItems": 1,
+    "videos": 1,
+    "commentThreads": 1,
+}
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+QUOTA_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+
+class YouTubeAPIError(Exception):
+    """Non-200 response from a YouTube Data API call."""
+    def __init__(self, status_code: int, reason: Optional[str] = None):
+        super().__init__(f"YouTube API error {status_code}: {reason or 'unknown'}")
+        self.status_code = status_code
+        self.reason = reason
+
+class QuotaBudgetExceeded(YouTubeAPIError):
+    """The local quota budget for this call is spent; the request was not sent."""
+    def __init__(self, reason: str):
+        super().__init__(429, reason)
+
+def youtube_error_reason(response: httpx.Response) -> Optional[str]:
+    """errors[0].reason of a Google API error body, if any."""
+    try:
+        return response.json().get("error", {}).get("errors", [{}])[0].get("reason") or "unknown"
+    except Exception:
+        return None
+
+_call_context: ContextVar[Tuple[Optional[str], str]] = ContextVar("youtube_call_context", default=(None, INTERACTIVE))
+
+@contextmanager
+def youtube_call_context(account_key: Optional[str], priority: str = INTERACTIVE):
+    """Attribute the Google API calls made inside the block to an account and priority."""
+    token = _call_context.set((account_key, priority))
+    try:
+        yield
+    finally:
+        _call_context.reset(token)
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, amount: float = 1) -> float:
+        """Take tokens if available and return 0, else return seconds until they will be."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+class YouTubeScheduler:
+    def __init__(self, daily_quota: int, account_daily_quota: int, backfill_share: float,
+                 requests_per_second: float, burst: int):
+        self.daily_quota = daily_quota
+        self.account_daily_quota = account_daily_quota
+        self.backfill_share = backfill_share
+        self._bucket = TokenBucket(requests_per_second, max(1, burst))
+        self._interactive_waiting = 0
+        self._quota_day: Optional[str] = None
+        self._used = 0
+        self._used_by_account: Dict[str, int] = {}
+
+    def _roll_day(self):
+        today = datetime.now(QUOTA_TIMEZONE).date().isoformat()
+        if today != self._quota_day:
+            self._quota_day = today
+            self._used = 0
+            self._used_by_account = {}
+
+    def _check_budget(self, cost: int, account_key: Optional[str], priority: str):
+        self._roll_day()
+        if not cost:
+            return
+        limit = self.daily_quota if priority == INTERACTIVE else int(self.daily_quota * self.backfill_share)
+        if self._used + cost > limit:
+            raise QuotaBudgetExceeded("dailyQuotaBudget" if priority == INTERACTIVE else "backfillQuotaBudget")
+        if account_key and self._used_by_account.get(account_key, 0) + cost > self.account_daily_quota:
+            raise QuotaBudgetExceeded("accountQuotaBudget")
+
+    def _charge(self, cost: int, account_key: Optional[str]):
+        self._used += cost
+        if account_key:
+            self._used_by_account[account_key] = self._used_by_account.get(account_key, 0) + cost
+
+    def mark_quota_exhausted(self):
+        """Upstream reported the project quota spent: fail fast until the daily reset."""
+        self._roll_day()
+        self._used = max(self._used, self.daily_quota)
+
+    def usage(self) -> Dict[str, int]:
+        self._roll_day()
+        return {"quota_used": self._used, "quota_limit": self.daily_quota, "interactive_waiting": self._interactive_waiting}
+
+    async def acquire(self, cost: int, account_key: Optional[str], priority: str):
+        """Wait for a rate-limit slot and charge `cost` quota units."""
+        self._check_budget(cost, account_key, priority)
+        interactive = priority == INTERACTIVE
+        if interactive:
+            self._interactive_waiting += 1
+        try:
+            while True:
+                if not interactive and self._interactive_waiting:
+                    await asyncio.sleep(0.05)
+                    continue
+                wait = self._bucket.take()
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+        finally:
+            if interactive:
+                self._interactive_waiting -= 1
+        # Re-check: other calls may have spent the budget while this one waited
+        self._check_budget(cost, account_key, priority)
+        self._charge(cost, account_key)
+
+    @staticmethod
+    def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, or the server's Retry-After when given."""
+        if retry_after:
+            try:
+                return min(float(retry_after), settings.YOUTUBE_BACKOFF_MAX)
+            except ValueError:
+                pass
+        return random.uniform(0, min(settings.YOUTUBE_BACKOFF_MAX, settings.YOUTUBE_BACKOFF_BASE * (2 ** attempt)))
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, endpoint: str, **kwargs) -> httpx.Response:
+        """
+        Send one Google API request through the scheduler. Returns the final
+        response (callers keep their own status handling); raises
+        QuotaBudgetExceeded without sending when the budget is spent.
+        """
+        account_key, priority = _call_context.get()
+        cost = YOUTUBE_API_COSTS.get(endpoint, 0)
+        attempt = 0
+        while True:
+            await self.acquire(cost, account_key, priority)
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                google_api_requests.inc(endpoint=endpoint, status="error")
+                if attempt >= settings.YOUTUBE_MAX_RETRIES:
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.warning(f"{endpoint} transport error ({type(e).__name__}), retrying in {delay:.2f}s")
+            else:
+                status = response.status_code
+                google_api_requests.inc(endpoint=endpoint, status=str(status))
+                reason = youtube_error_reason(response) if status == 403 else None
+                if reason in QUOTA_REASONS:
+                    logger.error(f"YouTube quota exhausted ({reason}); refusing further calls until reset")
+                    self.mark_quota_exhausted()
+                    return response
+                retryable = status in RETRYABLE_STATUS or reason in RATE_LIMIT_REASONS
+                if not retryable or attempt >= settings.YOUTUBE_MAX_RETRIES:
+                    return response
+                delay = self.backoff_delay(attempt, response.headers.get("Retry-After"))
+                logger.warning(f"{endpoint} returned {status}{f' ({reason})' if reason else ''}, retrying in {delay:.2f}s")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+youtube_scheduler = YouTubeScheduler(
+    daily_quota=settings.YOUTUBE_DAILY_QUOTA,
+    account_daily_quota=settings.YOUTUBE_ACCOUNT_DAILY_QUOTA,
+    backfill_share=settings.YOUTUBE_BACKFILL_QUOTA_SHARE,
+    requests_per_second=settings.YOUTUBE_REQUESTS_PER_SECOND,
+    burst=settings.YOUTUBE_BURST,
+)
+
+Gauge(
+    "youtube_quota_units", "YouTube Data API quota units used today and the daily limit", ["kind"],
+    lambda: {("used",): youtube_scheduler.usage()["quota_used"], ("limit",): youtube_scheduler.daily_quota}
+)
@@ -0,0 +1,152 @@
+"""
+Analytics Fast Path: Equivalence and Latency
+Checks that the pandas-free per-account implementations (analytics_fast,
+and the incremental window in rolling_metrics) produce the same insights as
+the DataFrame implementations on random and edge-case inputs. Then it
+reports per-call latency of both at typical and larger sizes.
+
+    cd server-ai
+    python -m benchmarks.analytics_fast_path
+    python -m benchmarks.analytics_fast_path --cases 2000 --repeat 200
+
+Exits non-zero on any mismatch.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List
+
+os.environ.setdefault("SUPABASE_URL", "http://postgrest.invalid")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "benchmark")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.analytics_fast import daily_metrics_summary
+from app.services.processor import AnalyticsProcessor
+from app.services.rolling_metrics import DailyMetricsWindow
+
+processor = AnalyticsProcessor("benchmark")
+
+def random_history(rnd: random.Random, days: int) -> List[Dict[str, Any]]:
+    start = date(2025, 1, 1) + timedelta(days=rnd.randint(0, 365))
+    flat = rnd.random() < 0.1
+    history = [
+        {
+            "date": (start + timedelta(days=i)).isoformat(),
+            "views": 100 if flat else rnd.choice([0, rnd.randint(0, 50), rnd.randint(0, 20000)]),
+            "watch_time_hours": round(rnd.random() * 80, 1),
+            "subscribers_gained": rnd.randint(0, 12),
+        }
+        for i in range(days)
+    ]
+    if rnd.random() < 0.3:
+        rnd.shuffle(history)
+    return history
+
+def random_videos(rnd: random.Random, count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": f"v{i}",
+            "title": f"Video {i}",
+            "views": rnd.choice([0, 50, 101, rnd.randint(0, 100000)]),
+            "likes": rnd.choice([0, 5, rnd.randint(0, 4000)]),
+            "comments": rnd.choice([0, 5, rnd.randint(0, 600)]),
+        }
+        for i in range(count)
+    ]
+
+def mismatch(expected: Any, actual: Any, path: str = "") -> str:
+    """Empty string when equal (floats to 1e-9 relative), else the first difference."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        if list(expected) != list(actual):
+            return f"{path}: keys {list(expected)} != {list(actual)}"
+        for key in expected:
+            found = mismatch(expected[key], actual[key], f"{path}.{key}")
+            if found:
+                return found
+        return ""
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return f"{path}: length {len(expected)} != {len(actual)}"
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            found = mismatch(a, b, f"{path}[{i}]")
+            if found:
+                return found
+        return ""
+    if isinstance(expected, float) or isinstance(actual, float):
+        if math.isclose(float(expected), float(actual), rel_tol=1e-9, abs_tol=1e-9):
+            return ""
+    elif expected == actual:
+        return ""
+    return f"{path}: {expected!r} != {actual!r}"
+
+def without_flat_trend_noise(expected: Dict[str, Any], actual: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    np.polyfit returns +/-1e-13-ish instead of 0 for a flat week, so its
+    direction is arbitrary there; the fast paths report exactly 0 ("down").
+    """
+    if expected and actual["summary"]["trend_slope"] == 0 and abs(expected["summary"]["trend_slope"]) < 0.01:
+        expected = {**expected, "summary": {**expected["summary"], "trend_direction": actual["summary"]["trend_direction"], "trend_slope": 0.0}}
+    return expected
+
+def check_equivalence(cases: int, seed: int) -> List[str]:
+    rnd = random.Random(seed)
+    failures = []
+    sizes = [0, 1, 2, 6, 7, 13, 14, 15, 36, 37, 90]
+    for case in range(cases):
+        days = sizes[case] if case < len(sizes) else rnd.randint(0, 120)
+        history = random_history(rnd, days)
+        window = sorted(history, key=lambda row: row["date"])[-90:]
+        expected = processor.process_daily_metrics_pandas(window) if window else {}
+        for name, actual in (("daily_metrics_summary", daily_metrics_summary(window)),
+                             ("DailyMetricsWindow", DailyMetricsWindow.from_history(window).summary())):
+            found = mismatch(without_flat_trend_noise(expected, actual) if actual else expected, actual)
+            if found:
+                failures.append(f"{name} case {case} ({days} days){found}")
+
+        videos = random_videos(rnd, sizes[case] if case < len(sizes) else rnd.randint(0, 60))
+        expected = processor.process_video_stats_pandas(videos) if videos else {}
+        found = mismatch(expected, processor.process_video_stats(videos))
+        if found:
+            failures.append(f"process_video_stats case {case} ({len(videos)} videos){found}")
+    return failures
+
+def per_call_ms(function: Callable[[], Any], repeat: int) -> float:
+    function()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=500, help="Random inputs to compare")
+    parser.add_argument("--repeat", type=int, default=100, help="Calls per latency measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failures = check_equivalence(args.cases, args.seed)
+    print(f"Equivalence: {args.cases} cases, {len(failures)} mismatches")
+    for failure in failures[:20]:
+        print(f"  {failure}")
+
+    rnd = random.Random(args.seed)
+    print(f"\n{'input':<28}{'pandas ms':>11}{'fast ms':>10}{'speedup':>9}")
+    for days in (30, 90, 365):
+        history = random_history(rnd, days)
+        pandas_ms = per_call_ms(lambda: processor.process_daily_metrics_pandas(history), args.repeat)
+        fast_ms = per_call_ms(lambda: daily_metrics_summary(history), args.repeat)
+        print(f"{f'daily metrics, {days} days':<28}{pandas_ms:>11.3f}{fast_ms:>10.3f}{pandas_ms / fast_ms:>8.1f}x")
+    for count in (10, 50, 500):
+        videos = random_videos(rnd, count)
+        pandas_ms = per_call_ms(lambda: processor.process_video_stats_pandas(videos), args.repeat)
+        fast_ms = per_call_ms(lambda: processor.process_video_stats(videos), args.repeat)
+        print(f"{f'video stats, {count} videos':<28}{pandas_ms:>11.3f}{fast_ms:>10.3f}{pandas_ms / fast_ms:>8.1f}x")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Batch vs Per-account Analytics: Equivalence
+Seeds two in-memory PostgREST stubs with the same accounts: current, stale
+(data ending months ago), gappy, short, videos only and empty. It runs
+AnalyticsProcessor.run() per account against one stub and run_batch() over
+all accounts against the other, then checks that:
+
+- both paths return the same insights and store the same input fingerprints
+- neither path saves an insight type for an account without source rows
+- re-running either path over the other's results inserts nothing (the
+  insight cache agrees, so results do not flip between the two)
+
+    cd server-ai
+    python -m benchmarks.batch_equivalence
+
+Exits non-zero on any difference.
+"""
+import asyncio
+import os
+import random
+import sys
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+os.environ.setdefault("SUPABASE_URL", "http://postgrest.invalid")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "benchmark")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core import db as db_module
+from app.services.insight_cache import insight_cache
+from app.services.processor import AnalyticsProcessor
+from app.services.rolling_metrics import rolling_metrics
+from benchmarks.analytics_fast_path import mismatch
+from benchmarks.stubs import FakePostgREST
+
+# account -> (days of history, newest day's age in days, day step, videos)
+ACCOUNTS = {
+    "current": (120, 1, 1, 20),
+    "stale": (60, 200, 1, 20),
+    "gappy": (140, 10, 3, 5),
+    "short": (5, 1, 1, 3),
+    "videos-only": (0, 0, 1, 10),
+    "empty": (0, 0, 1, 0),
+}
+
+def seed(db: FakePostgREST, seed: int):
+    rnd = random.Random(seed)
+    today = date.today()
+    for account_id, (days, age, step, videos) in ACCOUNTS.items():
+        newest = today - timedelta(days=age)
+        if days:
+            db.write("channel_daily_metrics", [
+                {"account_id": account_id, "date": (newest - timedelta(days=i * step)).isoformat(),
+                 "views": rnd.randint(0, 5000), "watch_time_hours": round(rnd.random() * 90, 1),
+                 "subscribers_gained": rnd.randint(0, 20)}
+                for i in range(days)
+            ], "account_id,date")
+        items = db.write("content_items", [
+            {"id": f"{account_id}-item{i}", "account_id": account_id, "external_id": f"{account_id}-v{i}", "title": f"Video {i}", "type": "video",
+             "published_at": (today - timedelta(days=i)).isoformat()}
+            for i in range(videos)
+        ], "account_id,external_id") if videos else []
+        if items:
+            db.write("content_snapshots", [
+                {"content_id": item["id"], "views": rnd.randint(0, 90000), "likes": rnd.randint(0, 3000),
+                 "comments": rnd.randint(0, 400), "recorded_at": f"{today.isoformat()}T00:00:00"}
+                for item in items
+            ], None)
+
+def fresh_db(seed_value: int) -> FakePostgREST:
+    db = FakePostgREST(latency=0)
+    seed(db, seed_value)
+    db_module._client = db
+    # In-process state would leak results from the other stub
+    insight_cache._entries.clear()
+    rolling_metrics._windows.clear()
+    return db
+
+def saved(db: FakePostgREST) -> Dict[tuple, Dict[str, Any]]:
+    return {(row["account_id"], row["insight_type"]): row for row in db.rows("latest_analytics_insights")}
+
+async def run_single(accounts: List[str]) -> Dict[str, Dict[str, Any]]:
+    return {account_id: await AnalyticsProcessor(account_id).run() for account_id in accounts}
+
+async def run() -> List[str]:
+    failures = []
+    accounts = list(ACCOUNTS)
+
+    single_db = fresh_db(0)
+    single = await run_single(accounts)
+    batch_db = fresh_db(0)
+    batch = await AnalyticsProcessor.run_batch(accounts)
+
+    for account_id in accounts:
+        found = mismatch(single[account_id], batch[account_id])
+        if found:
+            failures.append(f"{account_id}: results differ{found}")
+    single_rows, batch_rows = saved(single_db), saved(batch_db)
+    if single_rows.keys() != batch_rows.keys():
+        failures.append(f"saved insight types differ: {sorted(single_rows.keys() ^ batch_rows.keys())}")
+    for key in single_rows.keys() & batch_rows.keys():
+        if single_rows[key]["input_fingerprint"] != batch_rows[key]["input_fingerprint"]:
+            failures.append(f"{key}: fingerprints differ")
+    for key, row in {**single_rows, **batch_rows}.items():
+        if not row["data"]:
+            failures.append(f"{key}: saved an empty insight")
+    for account_id, insight_type in (("videos-only", "weekly_trend"), ("empty", "weekly_trend"), ("empty", "engagement_summary")):
+        if (account_id, insight_type) in single_rows or (account_id, insight_type) in batch_rows:
+            failures.append(f"{account_id}: saved {insight_type} without source rows")
+
+    # Each path over the other's saved insights must hit the cache and insert nothing
+    for db, label, rerun in ((single_db, "run_batch after run", lambda: AnalyticsProcessor.run_batch(accounts)),
+                             (batch_db, "run after run_batch", lambda: run_single(accounts))):
+        db_module._client = db
+        insight_cache._entries.clear()
+        rolling_metrics._windows.clear()
+        before = len(db.rows("analytics_insights"))
+        await rerun()
+        inserted = len(db.rows("analytics_insights")) - before
+        if inserted:
+            failures.append(f"{label}: inserted {inserted} insights for unchanged data")
+
+    print(f"Batch vs per-account: {len(accounts)} accounts, {len(failures)} differences")
+    return failures
+
+def main() -> int:
+    failures = asyncio.run(run())
+    for failure in failures:
+        print(f"  {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Long-range Analytics: Supabase vs Local Columnar Store
+Seeds the in-memory PostgREST stub with years of channel_daily_metrics and
+compares the long-range trend read over paged PostgREST JSON against the
+memory-mapped metrics store (cold: seeded on first use, warm: mapped). It
+then simulates syncs appending to the store, compacts it and runs the
+consistency check, including repair of a tampered base file.
+
+    cd server-ai
+    python -m benchmarks.long_range
+    python -m benchmarks.long_range --years 5 --db-latency 0.02
+
+Exits non-zero when the two paths disagree or the check misses a difference.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+os.environ.setdefault("SUPABASE_URL", "http://postgrest.invalid")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "benchmark")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from app.core import db as db_module
+from app.services import processor as processor_module
+from app.services.metrics_store import ColumnarMetricsStore
+from app.services.processor import AnalyticsProcessor
+from benchmarks.stubs import FakePostgREST
+
+ACCOUNT = "long-range-account"
+
+def seed_history(db: FakePostgREST, days: int, seed: int):
+    rnd = random.Random(seed)
+    today = date.today()
+    db.write("channel_daily_metrics", [
+        {
+            "account_id": ACCOUNT,
+            "date": (today - timedelta(days=days - i)).isoformat(),
+            "views": rnd.randint(0, 5000) + i,
+            "watch_time_hours": round(rnd.random() * 90, 1),
+            "subscribers_gained": rnd.randint(0, 20),
+        }
+        for i in range(days)
+    ], on_conflict="account_id,date")
+
+async def timed(label: str, years: int, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = await AnalyticsProcessor(ACCOUNT).long_range(years)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    print(f"  {label:<34}{elapsed:>9.2f} ms")
+    return result
+
+async def run(args) -> int:
+    db = FakePostgREST(latency=args.db_latency)
+    db_module._client = db
+    seed_history(db, args.years * 365 + 30, args.seed)
+    failures = []
+
+    print(f"Long-range trend, {args.years} years ({len(db.rows('channel_daily_metrics'))} rows):")
+    processor_module.metrics_store = None
+    baseline = await timed("Supabase (paged JSON)", args.years, args.repeat)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = ColumnarMetricsStore(root, compact_rows=args.compact_rows)
+        processor_module.metrics_store = store
+        cold = await timed("store, cold (seeds from Supabase)", args.years, 1)
+        warm = await timed("store, warm (memory-mapped)", args.years, args.repeat)
+        if cold != baseline or warm != baseline:
+            failures.append("store result differs from Supabase result")
+
+        # Syncs: re-upsert a few recent (revised) days and add new ones
+        rnd = random.Random(args.seed)
+        for sync in range(args.syncs):
+            rows = [
+                {"account_id": ACCOUNT, "date": (date.today() + timedelta(days=sync - offset)).isoformat(),
+                 "views": rnd.randint(0, 9000), "watch_time_hours": round(rnd.random() * 90, 1), "subscribers_gained": rnd.randint(0, 20)}
+                for offset in range(3, -1, -1)
+            ]
+            db.write("channel_daily_metrics", rows, on_conflict="account_id,date")
+            await store.append(ACCOUNT, rows)
+        start = time.perf_counter()
+        await store.compact(ACCOUNT)
+        print(f"  {'compaction':<34}{(time.perf_counter() - start) * 1000:>9.2f} ms")
+        report = await store.verify(ACCOUNT, repair=False)
+        print(f"  after {args.syncs} syncs: {report['status']} ({report['rows']} rows)")
+        if report["status"] != "consistent":
+            failures.append(f"store inconsistent after syncs: {report}")
+
+        # Tamper with the base file: the check must notice and repair it
+        base = os.path.join(root, ACCOUNT, "base.npy")
+        records = np.load(base)
+        records["views"][len(records) // 2] += 1
+        np.save(base, records[1:])
+        report = await store.verify(ACCOUNT, repair=True)
+        print(f"  tampered base: {report['status']} (missing={report['missing']}, different={report['different']})")
+        if report["status"] != "repaired" or (await store.verify(ACCOUNT, repair=False))["status"] != "consistent":
+            failures.append(f"tampered store not repaired: {report}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20, help="Requests per warm measurement")
+    parser.add_argument("--db-latency", type=float, default=0.01, help="Seconds added per PostgREST round trip")
+    parser.add_argument("--syncs", type=int, default=100, help="Simulated syncs appended to the store")
+    parser.add_argument("--compact-rows", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
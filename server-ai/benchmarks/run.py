@@ -0,0 +1,386 @@
+"""
+Offline Benchmarks
+Drives the real FastAPI app (in process, over ASGI) against the local
+stand-ins in benchmarks/stubs.py and reports, per scenario: throughput,
+p50/p99 request latency, round trips to YouTube / Supabase / Gemini per
+request, and the mean time spent in each instrumented pipeline stage.
+
+    cd server-ai
+    python -m benchmarks.run                      # every scenario
+    python -m benchmarks.run sync_small ai_script --scale 2
+    python -m benchmarks.run --json results.json
+    python -m benchmarks.run --baseline results.json --tolerance 0.25
+
+With --baseline the run exits non-zero when a scenario's p50/p99 latency or
+round trips per request regress by more than the tolerance.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Settings are read at import time: configure before importing the app.
+# Quota and rate limits are lifted so the scheduler never throttles a run.
+for name, value in {
+    "SUPABASE_URL": "http://postgrest.invalid",
+    "SUPABASE_SERVICE_KEY": "benchmark",
+    "GEMINI_API_KEY": "benchmark",
+    "YOUTUBE_DAILY_QUOTA": "1000000000",
+    "YOUTUBE_ACCOUNT_DAILY_QUOTA": "1000000000",
+    "YOUTUBE_REQUESTS_PER_SECOND": "1000000",
+    "YOUTUBE_BURST": "1000000",
+    "YOUTUBE_BACKOFF_BASE": "0.02",
+    "SYNC_SCHEDULER_ENABLED": "false",
+}.items():
+    os.environ.setdefault(name, value)
+
+import httpx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core import db as db_module
+from app.core import http as http_module
+from app.core.metrics import stage_duration
+from app.main import app
+from app.services.ai_generator import get_ai_service
+from app.services.jobs import QUEUED, RUNNING, job_queue
+from benchmarks.stubs import FakeGemini, FakePostgREST, MockYouTube
+
+Request = Callable[[httpx.AsyncClient], Awaitable[None]]
+
+@dataclass
+class Options:
+    scale: float = 1.0
+    youtube_latency: float = 0.02
+    db_latency: float = 0.002
+    gemini_latency: float = 0.3
+    error_rate: float = 0.05
+
+@dataclass
+class Stubs:
+    youtube: MockYouTube
+    db: FakePostgREST
+    gemini: FakeGemini
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    # Seeds the stubs (untimed) and returns the timed requests
+    prepare: Callable[[Stubs, Options, httpx.AsyncClient], Awaitable[List[Request]]]
+    concurrency: int = 4
+    error_rate: bool = False
+
+@dataclass
+class Result:
+    name: str
+    requests: int
+    failures: int
+    seconds: float
+    latencies: List[float] = field(default_factory=list)
+    round_trips: Dict[str, float] = field(default_factory=dict)
+    stages: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.seconds if self.seconds else 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "throughput": round(self.throughput, 2),
+            "p50_ms": round(self.percentile(0.5) * 1000, 1),
+            "p99_ms": round(self.percentile(0.99) * 1000, 1),
+            "round_trips_per_request": {k: round(v, 2) for k, v in self.round_trips.items()},
+            "stage_mean_ms": {k: round(v * 1000, 1) for k, v in self.stages.items()},
+        }
+
+def scaled(options: Options, count: int) -> int:
+    return max(1, int(round(count * options.scale)))
+
+async def check(response: httpx.Response) -> httpx.Response:
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url.path} -> {response.status_code}: {response.text[:200]}")
+    return response
+
+async def wait_for_job(client: httpx.AsyncClient, job_id: str, poll: float = 0.005) -> Dict[str, Any]:
+    while True:
+        job = (await check(await client.get(f"/api/v1/jobs/{job_id}"))).json()
+        if job["status"] == "completed":
+            return job
+        if job["status"] == "failed":
+            raise RuntimeError(f"Job {job_id} failed: {job.get('error')}")
+        await asyncio.sleep(poll)
+
+# --- Scenarios ---
+
+def connect_accounts(stubs: Stubs, count: int, videos: int, comments: int) -> List[Dict[str, Any]]:
+    accounts = []
+    for _ in range(count):
+        token = stubs.youtube.add_channel(videos=videos, comments_per_video=comments)
+        accounts.append(stubs.db.add_account(f"user-{uuid.uuid4().hex[:10]}", token))
+    return accounts
+
+def sync_request(user_id: str, **budget) -> Request:
+    async def send(client: httpx.AsyncClient):
+        await check(await client.post("/api/v1/youtube/sync", json={"user_id": user_id, **budget}, timeout=None))
+    return send
+
+def sync_scenario(accounts: int, videos: int, comments: int, resync: bool = False):
+    async def prepare(stubs: Stubs, options: Options, client: httpx.AsyncClient) -> List[Request]:
+        connected = connect_accounts(stubs, scaled(options, accounts), videos, comments)
+        budget = {"max_videos": videos, "max_comments_per_video": comments}
+        if resync:
+            # Untimed first pass leaves watermarks; the timed pass is incremental
+            for account in connected:
+                await sync_request(account["user_id"], **budget)(client)
+        return [sync_request(account["user_id"], **budget) for account in connected]
+    return prepare
+
+def seed_analytics(stubs: Stubs, account_id: str, days: int = 90, videos: int = 50):
+    today = date.today()
+    stubs.db.write("channel_daily_metrics", [
+        {"account_id": account_id, "date": (today - timedelta(days=days - i)).isoformat(),
+         "views": 400 + 5 * i + (i % 7) * 20, "watch_time_hours": 10.0 + i / 10, "subscribers_gained": i % 4}
+        for i in range(days)
+    ], "account_id,date")
+    items = stubs.db.write("content_items", [
+        {"account_id": account_id, "external_id": f"{account_id}-v{i}", "title": f"Video {i}", "type": "video",
+         "published_at": (today - timedelta(days=i)).isoformat()}
+        for i in range(videos)
+    ], "account_id,external_id")
+    stubs.db.write("content_snapshots", [
+        {"content_id": item["id"], "views": 1000 + 17 * i, "likes": 40 + i, "comments": 5 + i % 9,
+         "recorded_at": f"{today.isoformat()}T00:00:00"}
+        for i, item in enumerate(items)
+    ], None)
+
+def analytics_accounts(stubs: Stubs, count: int) -> List[str]:
+    accounts = connect_accounts(stubs, count, videos=0, comments=0)
+    for account in accounts:
+        seed_analytics(stubs, account["id"])
+    return [account["id"] for account in accounts]
+
+async def prepare_analytics_process(stubs: Stubs, options: Options, client: httpx.AsyncClient) -> List[Request]:
+    def process(account_id: str) -> Request:
+        async def send(client: httpx.AsyncClient):
+            response = await check(await client.post("/api/v1/analytics/process", json={"account_id": account_id}))
+            await wait_for_job(client, response.json()["job_id"])
+        return send
+    return [process(account_id) for account_id in analytics_accounts(stubs, scaled(options, 40))]
+
+async def prepare_analytics_batch(stubs: Stubs, options: Options, client: httpx.AsyncClient) -> List[Request]:
+    def process_batch(account_ids: List[str]) -> Request:
+        async def send(client: httpx.AsyncClient):
+            response = await check(await client.post("/api/v1/analytics/process-batch", json={"account_ids": account_ids}))
+            await wait_for_job(client, response.json()["job_id"])
+        return send
+    return [process_batch(analytics_accounts(stubs, scaled(options, 100))) for _ in range(3)]
+
+async def prepare_insights_poll(stubs: Stubs, options: Options, client: httpx.AsyncClient) -> List[Request]:
+    # Untimed: compute insights and take each account's ETag, as a dashboard's first load would
+    etags = {}
+    for account_id in analytics_accounts(stubs, scaled(options, 20)):
+        response = await check(await client.post("/api/v1/analytics/process", json={"account_id": account_id}))
+        await wait_for_job(client, response.json()["job_id"])
+        etags[account_id] = (await check(await client.get(f"/api/v1/analytics/insights/{account_id}"))).headers["etag"]
+    def poll(account_id: str) -> Request:
+        async def send(client: httpx.AsyncClient):
+            response = await check(await client.get(f"/api/v1/analytics/insights/{account_id}", headers={"If-None-Match": etags[account_id]}))
+            if response.status_code != 304:
+                raise RuntimeError(f"Unchanged insights answered with {response.status_code}, not 304")
+        return send
+    return [poll(account_id) for account_id in etags for _ in range(10)]
+
+def script_request(topic: str) -> Request:
+    async def send(client: httpx.AsyncClient):
+        await check(await client.post("/api/v1/ai/generate-script", json={"topic": topic, "tone": "upbeat"}, timeout=None))
+    return send
+
+async def prepare_ai_script(stubs: Stubs, options: Options, client: httpx.AsyncClient) -> List[Request]:
+    return [script_request(f"Benchmark topic {uuid.uuid4().hex}") for _ in range(scaled(options, 40))]
+
+async def prepare_ai_script_cached(stubs: Stubs, options: Options, client: httpx.AsyncClient) -> List[Request]:
+    return [script_request("Benchmark topic (repeated)") for _ in range(scaled(options, 40))]
+
+def thumbnail_png(seed: int) -> bytes:
+    from PIL import Image
+    image = Image.new("RGB", (1280, 720), ((seed * 37) % 256, (seed * 91) % 256, (seed * 53) % 256))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+async def prepare_ai_thumbnails(stubs: Stubs, options: Options, client: httpx.AsyncClient) -> List[Request]:
+    def compare(seed: int) -> Request:
+        files = [("files", (f"variant{i}.png", thumbnail_png(seed * 3 + i), "image/png")) for i in range(3)]
+        async def send(client: httpx.AsyncClient):
+            await check(await client.post("/api/v1/ai/analyze-thumbnails", files=files, timeout=None))
+        return send
+    return [compare(seed) for seed in range(scaled(options, 12))]
+
+SCENARIOS = {scenario.name: scenario for scenario in [
+    Scenario("sync_small", "Full sync, 10 videos x 20 comments per channel", sync_scenario(20, 10, 20)),
+    Scenario("sync_large", "Full sync, 200 videos x 100 comments per channel", sync_scenario(3, 200, 100), concurrency=3),
+    Scenario("sync_incremental", "Second sync of unchanged channels (watermarks)", sync_scenario(20, 10, 20, resync=True)),
+    Scenario("sync_errors", "Full sync with injected 503s on Google API calls", sync_scenario(20, 10, 20), error_rate=True),
+    Scenario("analytics_process", "POST /analytics/process per account, until the job completes", prepare_analytics_process),
+    Scenario("analytics_batch", "POST /analytics/process-batch for 100 accounts", prepare_analytics_batch, concurrency=1),
+    Scenario("insights_poll", "Conditional GET /analytics/insights of unchanged accounts", prepare_insights_poll, concurrency=16),
+    Scenario("ai_script", "POST /ai/generate-script, distinct topics", prepare_ai_script, concurrency=8),
+    Scenario("ai_script_cached", "POST /ai/generate-script, one repeated topic", prepare_ai_script_cached, concurrency=8),
+    Scenario("ai_thumbnails", "POST /ai/analyze-thumbnails with 3 variants", prepare_ai_thumbnails, concurrency=4),
+]}
+
+# --- Runner ---
+
+def install_stubs(options: Options, scenario: Scenario) -> Stubs:
+    stubs = Stubs(
+        youtube=MockYouTube(latency=options.youtube_latency, error_rate=options.error_rate if scenario.error_rate else 0.0),
+        db=FakePostgREST(latency=options.db_latency),
+        gemini=FakeGemini(latency=options.gemini_latency),
+    )
+    db_module._client = stubs.db
+    http_module._google_client = httpx.AsyncClient(transport=stubs.youtube.transport())
+    get_ai_service().model = stubs.gemini
+    return stubs
+
+def round_trip_counts(stubs: Stubs) -> Dict[str, int]:
+    return {
+        "youtube": sum(stubs.youtube.calls.values()),
+        "db": sum(stubs.db.round_trips.values()),
+        "gemini": stubs.gemini.calls,
+    }
+
+async def run_scenario(scenario: Scenario, options: Options, client: httpx.AsyncClient) -> Result:
+    stubs = install_stubs(options, scenario)
+    requests = await scenario.prepare(stubs, options, client)
+    trips_before = round_trip_counts(stubs)
+    stages_before = stage_duration.totals()
+
+    latencies: List[float] = []
+    failures = 0
+    semaphore = asyncio.Semaphore(scenario.concurrency)
+
+    async def timed(request: Request):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await request(client)
+            except Exception as e:
+                failures += 1
+                logging.getLogger("benchmarks").warning(f"{scenario.name}: {e}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[timed(request) for request in requests])
+    elapsed = time.perf_counter() - start
+    # Follow-up jobs (insights queued by syncs) count towards this scenario
+    while job_queue.counts()[QUEUED] or job_queue.counts()[RUNNING]:
+        await asyncio.sleep(0.01)
+
+    trips_after = round_trip_counts(stubs)
+    stages = {}
+    for key, (total, count) in stage_duration.totals().items():
+        before_total, before_count = stages_before.get(key, (0.0, 0))
+        if count > before_count:
+            stages[key[0]] = (total - before_total) / (count - before_count)
+    return Result(
+        name=scenario.name,
+        requests=len(requests),
+        failures=failures,
+        seconds=elapsed,
+        latencies=latencies,
+        round_trips={name: (trips_after[name] - trips_before[name]) / max(1, len(requests)) for name in trips_after},
+        stages=stages,
+    )
+
+def print_report(results: List[Result]):
+    print(f"{'scenario':<20}{'reqs':>6}{'fail':>6}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'yt/req':>9}{'db/req':>9}{'ai/req':>8}")
+    for result in results:
+        trips = result.round_trips
+        print(f"{result.name:<20}{result.requests:>6}{result.failures:>6}{result.throughput:>9.1f}"
+              f"{result.percentile(0.5) * 1000:>9.1f}{result.percentile(0.99) * 1000:>9.1f}"
+              f"{trips['youtube']:>9.1f}{trips['db']:>9.1f}{trips['gemini']:>8.2f}")
+    for result in results:
+        if result.stages:
+            stages = ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in sorted(result.stages.items()))
+            print(f"  {result.name} stage means: {stages}")
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> List[str]:
+    """Regressions beyond tolerance against a previous --json run."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {previous[metric]} -> {current[metric]}")
+        for service, trips in current["round_trips_per_request"].items():
+            before = previous["round_trips_per_request"].get(service, 0)
+            if trips > before * (1 + tolerance) + 0.01:
+                regressions.append(f"{name}: {service} round trips/request {before} -> {trips}")
+    return regressions
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", help=f"Scenarios to run (default: all): {', '.join(SCENARIOS)}")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply accounts/requests per scenario")
+    parser.add_argument("--youtube-latency", type=float, default=0.02, help="Seconds per mock Google API call")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="Seconds per PostgREST round trip")
+    parser.add_argument("--gemini-latency", type=float, default=0.3, help="Seconds per Gemini generation")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Share of Google API calls failing with 503 in *_errors scenarios")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression against --baseline")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    options = Options(scale=args.scale, youtube_latency=args.youtube_latency, db_latency=args.db_latency,
+                      gemini_latency=args.gemini_latency, error_rate=args.error_rate)
+    # Injected errors make the app log every retry; only report real failures
+    logging.getLogger("app").setLevel(logging.ERROR)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    results: List[Result] = []
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for name in args.scenarios or list(SCENARIOS):
+                # The processor reports progress with print(); keep the report readable
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results.append(await run_scenario(SCENARIOS[name], options, client))
+
+    print_report(results)
+    summary = {result.name: result.to_dict() for result in results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(summary, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
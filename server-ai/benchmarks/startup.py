@@ -0,0 +1,94 @@
+"""
+Startup Benchmark
+Cold-start cost of the service, measured in fresh interpreters:
+
+- import: `import app.main`
+- ready: import plus app startup (lifespan) and a first GET /
+- which heavy dependencies are already loaded at that point
+- the deferred first-use cost of each lazy dependency (pandas/numpy for
+  the DataFrame paths, google.generativeai for the first Gemini call,
+  supabase for the first database call, PIL for the first thumbnail)
+
+    cd server-ai
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --eager   # compare with everything imported up front
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("pandas", "numpy", "google.generativeai", "supabase", "PIL")
+
+CHILD = r"""
+import asyncio, json, sys, time
+eager = sys.argv[1] == "1"
+start = time.perf_counter()
+if eager:
+    import pandas, numpy, google.generativeai, supabase, PIL.ImageOps
+import app.main
+imported = time.perf_counter() - start
+
+import httpx
+async def first_request():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.main.app), base_url="http://startup") as client:
+            (await client.get("/")).raise_for_status()
+asyncio.run(first_request())
+ready = time.perf_counter() - start
+loaded = [name for name in %(heavy)r if name in sys.modules]
+
+first_use = {}
+def timed(name, load):
+    t = time.perf_counter()
+    load()
+    first_use[name] = time.perf_counter() - t
+# PIL first: google.generativeai imports it too
+timed("PIL", lambda: __import__("PIL.ImageOps"))
+from app.services import processor
+timed("pandas+numpy", lambda: (processor.pd.DataFrame, processor.np.polyfit))
+from app.services.ai_generator import get_ai_service
+timed("google.generativeai", lambda: get_ai_service().model)
+timed("supabase", lambda: __import__("supabase").acreate_client)
+print(json.dumps({"import": imported, "ready": ready, "loaded": loaded, "first_use": first_use}))
+""" % {"heavy": HEAVY_MODULES}
+
+def run_once(eager: bool) -> dict:
+    env = {
+        "SUPABASE_URL": "http://postgrest.invalid",
+        "SUPABASE_SERVICE_KEY": "benchmark",
+        "GEMINI_API_KEY": "benchmark",
+        "SYNC_SCHEDULER_ENABLED": "false",
+        **os.environ,
+    }
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", CHILD, "1" if eager else "0"],
+        cwd=root, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per mode")
+    parser.add_argument("--eager", action="store_true", help="Also measure with heavy dependencies imported up front")
+    args = parser.parse_args(argv)
+
+    modes = [("lazy", False)] + ([("eager", True)] if args.eager else [])
+    print(f"{'mode':<8}{'import ms':>11}{'ready ms':>10}  loaded at ready")
+    first_use = None
+    for name, eager in modes:
+        runs = [run_once(eager) for _ in range(args.runs)]
+        print(f"{name:<8}{statistics.median(r['import'] for r in runs) * 1000:>11.0f}"
+              f"{statistics.median(r['ready'] for r in runs) * 1000:>10.0f}  {', '.join(runs[0]['loaded']) or '-'}")
+        if not eager:
+            first_use = {key: statistics.median(r["first_use"][key] for r in runs) for key in runs[0]["first_use"]}
+    print("\nDeferred to first use (lazy mode):")
+    for key, seconds in first_use.items():
+        print(f"  {key:<22}{seconds * 1000:>8.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
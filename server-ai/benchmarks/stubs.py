@@ -0,0 +1,403 @@
+"""
+Benchmark Stand-ins
+Local replacements for the three external services the AI service talks to,
+so the real FastAPI app can be exercised offline:
+
+- MockYouTube: an httpx transport answering the OAuth, Data API and
+  Analytics API endpoints used by the sync, for channels of configurable
+  size, with per-request latency and injected error rates.
+- FakePostgREST: an in-memory stand-in for the async Supabase client that
+  supports the query builder calls the app makes (filters, ordering, range
+  paging, upserts) and the two read views from the migrations.
+- FakeGemini: a GenerativeModel replacement returning schema-shaped JSON
+  after a configurable delay, streamed or not.
+
+Every stand-in counts the round trips it served.
+"""
+import asyncio
+import json
+import random
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+import httpx
+
+# --- YouTube ---
+
+class MockYouTube:
+    """
+    Async httpx.MockTransport handler serving every connected channel. Channels are
+    keyed by access token; `add_channel` returns the token to store on the
+    account. error_rate is the share of Data/Analytics API calls answered
+    with a retryable 503 (the scheduler retries them).
+    """
+    def __init__(self, latency: float = 0.02, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._random = random.Random(seed)
+        self._by_token: Dict[str, Dict[str, Any]] = {}
+
+    def add_channel(self, videos: int, comments_per_video: int, days: int = 90) -> str:
+        token = f"token-{uuid.uuid4().hex[:12]}"
+        channel_id = f"UC{uuid.uuid4().hex[:16]}"
+        self._by_token[token] = {
+            "id": channel_id,
+            "videos": [f"{channel_id[-8:]}v{i:05d}" for i in range(videos)],
+            "comments": comments_per_video,
+            "days": days,
+        }
+        return token
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        endpoint = request.url.path.rsplit("/", 1)[-1]
+        self.calls[endpoint] += 1
+        await asyncio.sleep(self.latency)
+
+        if endpoint == "token":
+            return httpx.Response(200, json={"access_token": f"token-{uuid.uuid4().hex[:12]}", "expires_in": 3600})
+        if endpoint == "tokeninfo":
+            return httpx.Response(200, json={"scope": "https://www.googleapis.com/auth/youtube.readonly", "expires_in": 3600})
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors[endpoint] += 1
+            return httpx.Response(503, json={"error": {"code": 503, "errors": [{"reason": "backendError"}]}})
+
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        channel = self._by_token.get(token)
+        if channel is None:
+            return httpx.Response(401, json={"error": {"code": 401, "errors": [{"reason": "authError"}]}})
+        params = request.url.params
+        handler = getattr(self, f"_{endpoint}", None)
+        if handler is None:
+            return httpx.Response(404)
+        return handler(channel, params)
+
+    def _channels(self, channel, params):
+        return httpx.Response(200, json={"items": [{
+            "id": channel["id"],
+            "snippet": {"title": f"Channel {channel['id'][-6:]}", "customUrl": "@bench",
+                        "thumbnails": {"default": {"url": "https://example.com/avatar.jpg"}}},
+            "statistics": {"subscriberCount": "1000", "viewCount": str(1000 * len(channel["videos"])),
+                           "videoCount": str(len(channel["videos"]))},
+            "contentDetails": {"relatedPlaylists": {"uploads": "UU" + channel["id"][2:]}},
+        }]})
+
+    def _reports(self, channel, params):
+        start = date.fromisoformat(params["startDate"])
+        end = date.fromisoformat(params["endDate"])
+        days = min((end - start).days + 1, channel["days"])
+        rows = []
+        for offset in range(days):
+            day = end - timedelta(days=days - 1 - offset)
+            rows.append([day.isoformat(), 500 + offset * 3, 900 + offset, offset % 5])
+        return httpx.Response(200, json={"rows": rows})
+
+    def _playlistItems(self, channel, params):
+        offset = int(params.get("pageToken") or 0)
+        size = int(params.get("maxResults", 50))
+        ids = channel["videos"][offset:offset + size]
+        body = {"etag": f"etag-{len(channel['videos'])}-{offset}",
+                "items": [{"contentDetails": {"videoId": video_id}} for video_id in ids]}
+        if offset + size < len(channel["videos"]):
+            body["nextPageToken"] = str(offset + size)
+        return httpx.Response(200, json=body)
+
+    def _videos(self, channel, params):
+        items = []
+        for i, video_id in enumerate(params["id"].split(",")):
+            items.append({
+                "id": video_id,
+                "snippet": {"title": f"Video {video_id}", "publishedAt": f"2026-01-{1 + i % 28:02d}T12:00:00Z",
+                            "thumbnails": {"default": {"url": f"https://i.ytimg.com/vi/{video_id}/default.jpg"}}},
+                "statistics": {"viewCount": str(1000 + 37 * i), "likeCount": str(50 + i),
+                               "commentCount": str(channel["comments"])},
+            })
+        return httpx.Response(200, json={"items": items})
+
+    def _commentThreads(self, channel, params):
+        video_id = params["videoId"]
+        offset = int(params.get("pageToken") or 0)
+        size = int(params.get("maxResults", 100))
+        total = channel["comments"]
+        items = []
+        for j in range(offset, min(total, offset + size)):
+            # Newest first, as order=time returns them
+            published = (datetime(2026, 1, 31) - timedelta(minutes=j)).strftime("%Y-%m-%dT%H:%M:%SZ")
+            items.append({"snippet": {"topLevelComment": {"id": f"{video_id}c{j}", "snippet": {
+                "authorDisplayName": "viewer", "authorProfileImageUrl": "https://example.com/a.jpg",
+                "textDisplay": "Great video", "likeCount": j % 7, "publishedAt": published,
+            }}}})
+        body = {"items": items}
+        if offset + size < total:
+            body["nextPageToken"] = str(offset + size)
+        return httpx.Response(200, json=body)
+
+# --- Supabase / PostgREST ---
+
+# Conflict target used when upsert() is called without on_conflict
+PRIMARY_KEY = "id"
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+class _Query:
+    def __init__(self, db: "FakePostgREST", table: str):
+        self.db = db
+        self.table = table
+        self.op = "select"
+        self.payload: Any = None
+        self.on_conflict: Optional[str] = None
+        self.filters: List = []
+        self.orders: List = []
+        self.limit_count: Optional[int] = None
+        self.offset = 0
+        self.single = False
+
+    def select(self, *columns, **kwargs):
+        return self
+
+    def insert(self, rows, **kwargs):
+        self.op, self.payload = "insert", rows
+        return self
+
+    def upsert(self, rows, on_conflict: str = "", **kwargs):
+        self.op, self.payload, self.on_conflict = "upsert", rows, on_conflict or PRIMARY_KEY
+        return self
+
+    def update(self, values, **kwargs):
+        self.op, self.payload = "update", values
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        allowed = set(values)
+        self.filters.append(lambda row: row.get(column) in allowed)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and str(row.get(column)) >= str(value))
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) <= value)
+        return self
+
+    def order(self, column, desc: bool = False, nullsfirst: bool = False, **kwargs):
+        self.orders.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def range(self, start, end):
+        self.offset, self.limit_count = start, end - start + 1
+        return self
+
+    def maybe_single(self):
+        self.single = True
+        return self
+
+    async def execute(self):
+        self.db.round_trips[(self.table, self.op)] += 1
+        if self.db.latency:
+            await asyncio.sleep(self.db.latency)
+        if self.op in ("insert", "upsert"):
+            return _Response(self.db.write(self.table, self.payload, self.on_conflict if self.op == "upsert" else None))
+        rows = [row for row in self.db.rows(self.table) if all(check(row) for check in self.filters)]
+        if self.op == "update":
+            for row in rows:
+                row.update(self.payload)
+            return _Response([dict(row) for row in rows])
+        for column, desc, nullsfirst in reversed(self.orders):
+            present = [row for row in rows if row.get(column) is not None]
+            missing = [row for row in rows if row.get(column) is None]
+            present.sort(key=lambda row: row[column], reverse=desc)
+            rows = missing + present if nullsfirst else present + missing
+        rows = rows[self.offset:]
+        if self.limit_count is not None:
+            rows = rows[:self.limit_count]
+        rows = [dict(row) for row in rows]
+        if self.single:
+            return _Response(rows[0]) if rows else None
+        return _Response(rows)
+
+class _HTTPClientStub:
+    """close_db() closes client.options.httpx_client on shutdown."""
+    async def aclose(self):
+        pass
+
+class _Options:
+    httpx_client = _HTTPClientStub()
+
+class FakePostgREST:
+    """
+    In-memory async Supabase client. Tables are lists of dicts; upserts
+    match on their conflict columns like ON CONFLICT DO UPDATE (and reject
+    a batch touching one row twice, as Postgres does). The
+    latest_content_snapshots, latest_analytics_insights and
+    recent_channel_daily_metrics views are computed on read. `latency` is
+    added to every round trip.
+    """
+    options = _Options()
+
+    def __init__(self, latency: float = 0.002):
+        self.latency = latency
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.round_trips: Counter = Counter()
+        self._indexes: Dict[tuple, Dict[tuple, Dict[str, Any]]] = {}
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    def write(self, table: str, payload, on_conflict: Optional[str]) -> List[Dict[str, Any]]:
+        rows = payload if isinstance(payload, list) else [payload]
+        stored = self.tables.setdefault(table, [])
+        now = datetime.utcnow().isoformat()
+        written = []
+        if on_conflict:
+            columns = tuple(on_conflict.split(","))
+            keys = [tuple(row.get(column) for column in columns) for row in rows]
+            if len(keys) != len(set(keys)):
+                raise Exception("ON CONFLICT DO UPDATE command cannot affect row a second time")
+            if (table, columns) not in self._indexes:
+                self._indexes[(table, columns)] = {tuple(row.get(column) for column in columns): row for row in stored}
+            index = self._indexes[(table, columns)]
+        for row in rows:
+            row = dict(row)
+            if on_conflict:
+                key = tuple(row.get(column) for column in columns)
+                existing = index.get(key)
+                if existing is not None:
+                    existing.update(row)
+                    written.append(dict(existing))
+                    continue
+            row.setdefault("id", str(uuid.uuid4()))
+            row.setdefault("created_at", now)
+            stored.append(row)
+            for (indexed_table, indexed_columns), indexed in self._indexes.items():
+                if indexed_table == table:
+                    indexed[tuple(row.get(column) for column in indexed_columns)] = row
+            written.append(dict(row))
+        return written
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        if table == "latest_content_snapshots":
+            return self._latest_content_snapshots()
+        if table == "latest_analytics_insights":
+            return self._latest_insights()
+        if table == "recent_channel_daily_metrics":
+            return self._recent_daily_metrics()
+        return self.tables.get(table, [])
+
+    def _latest_content_snapshots(self):
+        latest: Dict[str, Dict[str, Any]] = {}
+        for snapshot in self.tables.get("content_snapshots", []):
+            current = latest.get(snapshot["content_id"])
+            if current is None or snapshot["recorded_at"] >= current["recorded_at"]:
+                latest[snapshot["content_id"]] = snapshot
+        rows = []
+        for item in self.tables.get("content_items", []):
+            snapshot = latest.get(item["id"], {})
+            rows.append({
+                "id": item["id"], "account_id": item["account_id"], "title": item["title"],
+                "type": item.get("type"), "published_at": item.get("published_at"),
+                "views": snapshot.get("views"), "likes": snapshot.get("likes"),
+                "comments": snapshot.get("comments"), "recorded_at": snapshot.get("recorded_at"),
+            })
+        return rows
+
+    def _recent_daily_metrics(self):
+        rows = []
+        by_account: Dict[str, List[Dict[str, Any]]] = {}
+        for row in self.tables.get("channel_daily_metrics", []):
+            by_account.setdefault(row["account_id"], []).append(row)
+        for account_rows in by_account.values():
+            for recency, row in enumerate(sorted(account_rows, key=lambda row: row["date"], reverse=True), 1):
+                rows.append({**row, "recency": recency})
+        return rows
+
+    def _latest_insights(self):
+        latest: Dict[tuple, Dict[str, Any]] = {}
+        for row in self.tables.get("analytics_insights", []):
+            latest[(row["account_id"], row["insight_type"])] = row
+        return list(latest.values())
+
+    def add_account(self, user_id: str, access_token: str, **fields) -> Dict[str, Any]:
+        """Store a connected YouTube account with a token that is valid for a day."""
+        account = {
+            "user_id": user_id,
+            "platform": "youtube",
+            "external_account_id": f"UC-{user_id}",
+            "account_name": user_id,
+            "access_token": access_token,
+            "refresh_token": f"refresh-{user_id}",
+            "token_expires_at": (datetime.utcnow() + timedelta(days=1)).isoformat(),
+            "is_active": True,
+            **fields,
+        }
+        return self.write("connected_accounts", account, None)[0]
+
+# --- Gemini ---
+
+class _Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+class _Stream:
+    def __init__(self, chunks: List[str], delay: float):
+        self._chunks = chunks
+        self._delay = delay
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            await asyncio.sleep(self._delay)
+            yield _Chunk(chunk)
+
+class FakeGemini:
+    """
+    Stands in for genai.GenerativeModel: returns a JSON object matching the
+    requested response_schema (or a generic one) after `latency` seconds.
+    Streams are split into `chunks` pieces spread over the same latency.
+    """
+    def __init__(self, latency: float = 0.3, chunks: int = 8):
+        self.latency = latency
+        self.chunks = chunks
+        self.calls = 0
+
+    @staticmethod
+    def _sample(schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if not schema:
+            return {"titles": ["A", "B", "C"], "description": "d", "hashtags": ["#a"],
+                    "hook": "h", "intro": "i", "body": ["b"], "cta": "c",
+                    "score": 7, "pros": ["p"], "cons": ["c"], "suggestions": ["s"]}
+        sample = {}
+        for name, spec in schema.get("properties", {}).items():
+            if spec["type"] == "array":
+                sample[name] = [f"{name} {i}" for i in range(3)]
+            elif spec["type"] == "number":
+                sample[name] = round(random.uniform(4, 9), 1)
+            else:
+                sample[name] = f"Generated {name}"
+        return sample
+
+    async def generate_content_async(self, contents, stream: bool = False, generation_config=None, request_options=None):
+        self.calls += 1
+        schema = (generation_config or {}).get("response_schema")
+        text = json.dumps(self._sample(schema))
+        if stream:
+            size = max(1, len(text) // self.chunks + 1)
+            pieces = [text[i:i + size] for i in range(0, len(text), size)]
+            return _Stream(pieces, self.latency / len(pieces))
+        await asyncio.sleep(self.latency)
+        return _Chunk(text)
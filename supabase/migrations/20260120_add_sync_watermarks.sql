@@ -0,0 +1,16 @@
+-- Migration: Per-account watermarks for incremental YouTube sync
+-- Date: 2026-01-20
+-- Purpose: Let /api/v1/youtube/sync fetch and write only the delta since the last run
+
+CREATE TABLE IF NOT EXISTS public.sync_watermarks (
+    account_id UUID PRIMARY KEY REFERENCES public.connected_accounts(id) ON DELETE CASCADE,
+    analytics_synced_through DATE,                   -- Last channel_daily_metrics date written
+    uploads_etag TEXT,                               -- ETag of the uploads playlist page
+    uploads_video_ids JSONB DEFAULT '[]'::jsonb,     -- Playlist order of the last fetched page
+    content_ids JSONB DEFAULT '{}'::jsonb,           -- YouTube video id -> content_items.id
+    comment_watermarks JSONB DEFAULT '{}'::jsonb,    -- YouTube video id -> {published_at, pending_newest, resume_page_token}
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now()) NOT NULL
+);
+
+-- Only the service role (AI service) reads and writes sync state
+ALTER TABLE public.sync_watermarks ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,40 @@
+-- Migration: Latest snapshot per content item, resolved in Postgres
+-- Date: 2026-01-21
+-- Purpose: Let the analytics processor read one snapshot per video instead of every snapshot ever recorded
+
+-- One row per content item with its newest snapshot (NULL columns when none exist).
+-- The LATERAL ... ORDER BY recorded_at DESC LIMIT 1 is a single probe of
+-- idx_snapshots_content_time (content_id, recorded_at desc) per item, so the
+-- cost and payload stay O(items) however many snapshots accumulate.
+-- A plain view (not materialized) means no refresh is needed after each sync.
+CREATE OR REPLACE VIEW public.latest_content_snapshots
+WITH (security_invoker = true) AS
+SELECT
+    ci.id,
+    ci.account_id,
+    ci.type,
+    ci.title,
+    ci.published_at,
+    s.views,
+    s.likes,
+    s.comments,
+    s.recorded_at
+FROM public.content_items ci
+LEFT JOIN LATERAL (
+    SELECT cs.views, cs.likes, cs.comments, cs.recorded_at
+    FROM public.content_snapshots cs
+    WHERE cs.content_id = ci.id
+    ORDER BY cs.recorded_at DESC
+    LIMIT 1
+) s ON true;
+
+-- Bulk variant for ad hoc callers: newest snapshot of each requested item
+CREATE OR REPLACE FUNCTION public.latest_snapshots_for(content_ids uuid[])
+RETURNS TABLE (content_id uuid, views bigint, likes bigint, comments bigint, recorded_at timestamptz)
+LANGUAGE sql STABLE SECURITY INVOKER AS $$
+    SELECT DISTINCT ON (cs.content_id)
+        cs.content_id, cs.views, cs.likes, cs.comments, cs.recorded_at
+    FROM public.content_snapshots cs
+    WHERE cs.content_id = ANY(content_ids)
+    ORDER BY cs.content_id, cs.recorded_at DESC;
+$$;
@@ -0,0 +1,24 @@
+-- Migration: Input fingerprints for cached analytics insights
+-- Date: 2026-01-22
+-- Purpose: Let the AI service skip recomputing and re-inserting insights whose source data is unchanged
+
+ALTER TABLE public.analytics_insights
+ADD COLUMN IF NOT EXISTS input_fingerprint text;  -- "<row count>:<newest date>:<digest>" of the source rows
+
+-- Latest insight per (account, type)
+CREATE INDEX IF NOT EXISTS idx_insights_account_type_time
+ON public.analytics_insights(account_id, insight_type, created_at DESC);
+
+CREATE OR REPLACE VIEW public.latest_analytics_insights
+WITH (security_invoker = true) AS
+SELECT DISTINCT ON (account_id, insight_type)
+    id,
+    account_id,
+    insight_type,
+    start_date,
+    end_date,
+    data,
+    input_fingerprint,
+    created_at
+FROM public.analytics_insights
+ORDER BY account_id, insight_type, created_at DESC;
@@ -0,0 +1,19 @@
+-- Migration: Newest N daily metrics per account, resolved in Postgres
+-- Date: 2026-01-23
+-- Purpose: Let batch analytics select exactly the rows the per-account path reads (the newest N days per account, no date cutoff)
+
+-- recency = 1 is an account's newest day. A filter on account_id is pushed
+-- below the window (it is the partition key), so each requested account is
+-- one range scan of the (account_id, date) unique index; filtering on
+-- recency <= N keeps the payload at N rows per account however old or gappy
+-- the account's data is.
+CREATE OR REPLACE VIEW public.recent_channel_daily_metrics
+WITH (security_invoker = true) AS
+SELECT
+    account_id,
+    date,
+    views,
+    watch_time_hours,
+    subscribers_gained,
+    row_number() OVER (PARTITION BY account_id ORDER BY date DESC) AS recency
+FROM public.channel_daily_metrics;